@@ -0,0 +1,27 @@
+# DB helpers live inside the Scrapy package; re-export them for deep_research
+from deep_research.komkom_scraper.komkom_scraper.db.db import (  # noqa: F401
+    Base,
+    Opportunity,
+    OpportunityBucket,
+    OpportunityChange,
+    ChangeOp,
+    OpportunityFeedback,
+    UserWeights,
+    OpportunityType,
+    SavedSearch,
+    AlertMatch,
+    AlertFrequency,
+    get_engine,
+    create_tables,
+    upsert_opportunity,
+    bulk_upsert_opportunities,
+    assign_clusters,
+    compute_content_hash,
+    log_changes,
+)
+from deep_research.komkom_scraper.komkom_scraper.db.migrations import (  # noqa: F401
+    SCHEMA_VERSION,
+    SchemaOutdatedError,
+    check_schema,
+    migrate,
+)
@@ -11,9 +11,12 @@ class OpportunityItem(scrapy.Item):
     sector = scrapy.Field()
     stage = scrapy.Field()
     amount = scrapy.Field()
+    currency = scrapy.Field()
     source_url = scrapy.Field()
     scraped_at = scrapy.Field()
     updated_at = scrapy.Field()
     # New fields for eligibility and publication date
     eligibility_criteria = scrapy.Field()
-    publication_date = scrapy.Field()
\ No newline at end of file
+    publication_date = scrapy.Field()
+    # Fingerprint of the normalized content, set by the pipeline
+    content_hash = scrapy.Field()
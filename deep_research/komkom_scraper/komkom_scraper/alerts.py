@@ -0,0 +1,316 @@
+"""
+Saved-search alerts (US008): match new opportunities against every alert at once.
+
+``AlertIndex`` compiles the active ``SavedSearch`` rows into:
+
+- an inverted index from keyword to the searches that require it. An
+  opportunity only visits the searches that share a word with it, and a
+  search matches when every one of its keywords was seen;
+- buckets keyed by (sector, type) for searches without keywords. Searches
+  with an amount range go into the bucket's ``IntervalIndex`` (a centred
+  interval tree), so a filter-only alert is found by a dict lookup plus a
+  tree walk rather than a scan of all alerts.
+
+The remaining criteria of each candidate (sector/type for keyword searches,
+amount range, deadline window) are then checked individually. Matching
+therefore costs in proportion to the candidates, not to the number of
+saved searches.
+
+Keywords are folded like the taxonomy (lowercase, no accents) and a final
+"s"/"x" is dropped on both sides, so "startups" matches "startup".
+
+``AlertMatcher`` (an extension) only sees opportunities that are new to
+the database: the batched and threaded upsert pipelines send
+``opportunities_inserted`` once a write commits, with the items whose rows
+it inserted (re-scrapes and updates are left out). They are matched in
+batches, and one ``AlertMatch`` is queued per (search, opportunity), tagged
+with the search's delivery frequency; the unique key keeps each alert to
+one match per opportunity. The last batch is matched at ``spider_closed``,
+after the upsert pipelines have waited for their writes. Delivery jobs read
+the queue with ``pending_alerts(session, frequency)``.
+
+Settings:
+- ALERTS_ENABLED (default False)
+- ALERTS_BATCH_SIZE (default 200): items matched per flush
+- ALERTS_INDEX_REFRESH (default 300): seconds before saved searches are reloaded
+"""
+
+import bisect
+import datetime
+import logging
+import math
+import re
+import time
+from collections import defaultdict
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from .db.db import AlertFrequency, AlertMatch, SavedSearch, _insert_for, get_engine
+from .utils.taxonomy import fold
+
+logger = logging.getLogger(__name__)
+
+ANY = "*"
+_WORD_RE = re.compile(r"\w+")
+
+# Sent by the upsert pipelines once a write commits:
+# send_catch_log(opportunities_inserted, items=[rows the write inserted], spider=...)
+opportunities_inserted = object()
+
+
+def tokens(text):
+    """Folded, singularized word set of ``text``."""
+    return {
+        word[:-1] if len(word) > 3 and word[-1] in "sx" else word
+        for word in _WORD_RE.findall(fold(text or ""))
+    }
+
+
+def _enum_value(value):
+    return getattr(value, "value", value)
+
+
+class _Node:
+    __slots__ = ("center", "lows", "by_low", "highs", "by_high", "left", "right")
+
+    def __init__(self, intervals):
+        endpoints = sorted(bound for low, high, _ in intervals for bound in (low, high))
+        # Median endpoint: each child gets at most half of the intervals
+        self.center = center = endpoints[(len(endpoints) - 1) // 2]
+        here = [entry for entry in intervals if entry[0] <= center <= entry[1]]
+        left = [entry for entry in intervals if entry[1] < center]
+        right = [entry for entry in intervals if entry[0] > center]
+        here.sort(key=lambda entry: entry[0])
+        self.lows = [low for low, _, _ in here]
+        self.by_low = [key for _, _, key in here]
+        here.sort(key=lambda entry: -entry[1])
+        self.highs = [-high for _, high, _ in here]  # ascending
+        self.by_high = [key for _, _, key in here]
+        self.left = _Node(left) if left else None
+        self.right = _Node(right) if right else None
+
+
+class IntervalIndex:
+    """Closed intervals [low, high] stabbed by a point (``stab``), in a centred interval tree.
+
+    Each node keeps the intervals containing its centre sorted by both
+    endpoints; the others go to the left or right subtree. The tree is
+    (re)built on the first ``stab`` after an ``add``, in O(n log n) per
+    level, and a stab walks one root-to-leaf path, bisecting at each node:
+    O(log n + k) for k keys found.
+    """
+
+    def __init__(self):
+        self.intervals = []  # (low, high, key)
+        self.root = None
+
+    def add(self, key, low, high):
+        self.intervals.append((low, high, key))
+        self.root = None
+
+    def stab(self, point):
+        """Keys whose interval contains ``point``."""
+        if self.root is None and self.intervals:
+            self.root = _Node(self.intervals)
+        found = []
+        node = self.root
+        while node is not None:
+            if point < node.center:
+                # Every interval here ends at or after the centre: keep those starting by point
+                found.extend(node.by_low[:bisect.bisect_right(node.lows, point)])
+                node = node.left
+            elif point > node.center:
+                found.extend(node.by_high[:bisect.bisect_right(node.highs, -point)])
+                node = node.right
+            else:
+                found.extend(node.by_low)
+                node = None
+        return found
+
+    def __len__(self):
+        return len(self.intervals)
+
+
+class CompiledSearch:
+    __slots__ = ("id", "frequency", "keywords", "sectors", "opportunity_type",
+                 "low", "high", "deadline_within_days")
+
+    def __init__(self, search):
+        self.id = search.id
+        self.frequency = _enum_value(search.frequency) or AlertFrequency.immediate.value
+        self.keywords = tokens(search.keywords)
+        self.sectors = {s.strip() for s in (search.sector or "").split(",") if s.strip()} or None
+        self.opportunity_type = _enum_value(search.opportunity_type)
+        self.low = float(search.min_amount) if search.min_amount is not None else -math.inf
+        self.high = float(search.max_amount) if search.max_amount is not None else math.inf
+        self.deadline_within_days = search.deadline_within_days
+
+    @property
+    def amount_bounded(self):
+        return self.low != -math.inf or self.high != math.inf
+
+    def accepts(self, sector, opportunity_type, amount, days_left):
+        """Check the non-keyword criteria."""
+        if self.sectors is not None and sector not in self.sectors:
+            return False
+        if self.opportunity_type is not None and opportunity_type != self.opportunity_type:
+            return False
+        if self.amount_bounded and (amount is None or not self.low <= amount <= self.high):
+            return False
+        if self.deadline_within_days is not None and (
+            days_left is None or not 0 <= days_left <= self.deadline_within_days
+        ):
+            return False
+        return True
+
+
+class AlertIndex:
+    def __init__(self, searches=()):
+        self.searches = {}
+        self.by_keyword = defaultdict(list)
+        # (sector, type) -> filter-only searches, without / with an amount range
+        self.open_buckets = defaultdict(list)
+        self.amount_buckets = defaultdict(IntervalIndex)
+        for search in searches:
+            self.add(search)
+
+    @classmethod
+    def load(cls, session):
+        return cls(session.execute(select(SavedSearch).where(SavedSearch.active.is_(True))).scalars())
+
+    def add(self, search):
+        compiled = CompiledSearch(search)
+        self.searches[compiled.id] = compiled
+        if compiled.keywords:
+            for word in compiled.keywords:
+                self.by_keyword[word].append(compiled.id)
+            return
+        for sector in compiled.sectors or (ANY,):
+            key = (sector, compiled.opportunity_type or ANY)
+            if compiled.amount_bounded:
+                self.amount_buckets[key].add(compiled.id, compiled.low, compiled.high)
+            else:
+                self.open_buckets[key].append(compiled.id)
+
+    def __len__(self):
+        return len(self.searches)
+
+    def match(self, item, today=None):
+        """Ids of the saved searches ``item`` satisfies."""
+        today = today or datetime.date.today()
+        sector = item.get("sector")
+        opportunity_type = _enum_value(item.get("opportunity_type"))
+        amount = float(item["amount"]) if item.get("amount") is not None else None
+        deadline = item.get("deadline")
+        days_left = (deadline - today).days if isinstance(deadline, datetime.date) else None
+
+        seen = defaultdict(int)
+        text = " ".join(item.get(field) or "" for field in ("title", "description", "eligibility_criteria"))
+        for word in tokens(text):
+            for search_id in self.by_keyword.get(word, ()):
+                seen[search_id] += 1
+        candidates = [sid for sid, count in seen.items() if count == len(self.searches[sid].keywords)]
+
+        for key in ((sector, opportunity_type), (sector, ANY), (ANY, opportunity_type), (ANY, ANY)):
+            candidates.extend(self.open_buckets.get(key, ()))
+            if amount is not None and key in self.amount_buckets:
+                candidates.extend(self.amount_buckets[key].stab(amount))
+
+        return [
+            sid for sid in dict.fromkeys(candidates)
+            if self.searches[sid].accepts(sector, opportunity_type, amount, days_left)
+        ]
+
+
+def enqueue_matches(session, index, items, today=None):
+    """Match ``items`` and queue new (search, opportunity) pairs; return the number queued."""
+    rows = []
+    for item in items:
+        for search_id in index.match(item, today):
+            rows.append({
+                "saved_search_id": search_id,
+                "opportunity_id": item["id"],
+                "frequency": AlertFrequency(index.searches[search_id].frequency),
+            })
+    if not rows:
+        return 0
+    insert = _insert_for(session)
+    result = session.execute(
+        insert(AlertMatch.__table__).values(rows)
+        .on_conflict_do_nothing(index_elements=["saved_search_id", "opportunity_id"])
+    )
+    session.commit()
+    return result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(rows)
+
+
+def pending_alerts(session, frequency):
+    """Undelivered matches of one frequency, grouped by saved search id."""
+    grouped = defaultdict(list)
+    for match in session.execute(
+        select(AlertMatch)
+        .where(AlertMatch.frequency == AlertFrequency(frequency), AlertMatch.delivered_at.is_(None))
+        .order_by(AlertMatch.saved_search_id, AlertMatch.id)
+    ).scalars():
+        grouped[match.saved_search_id].append(match)
+    return dict(grouped)
+
+
+def mark_delivered(session, match_ids):
+    session.execute(
+        update(AlertMatch).where(AlertMatch.id.in_(list(match_ids)))
+        .values(delivered_at=datetime.datetime.utcnow())
+    )
+    session.commit()
+
+
+class AlertMatcher:
+    """Extension queueing alert matches for newly inserted opportunities, batch by batch."""
+
+    def __init__(self, batch_size=200, refresh_interval=300.0, stats=None):
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self.stats = stats
+        self.engine = get_engine()
+        self.buffer = []
+        self.index = None
+        self.loaded_at = 0.0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("ALERTS_ENABLED"):
+            raise NotConfigured
+        matcher = cls(
+            batch_size=crawler.settings.getint("ALERTS_BATCH_SIZE", 200),
+            refresh_interval=crawler.settings.getfloat("ALERTS_INDEX_REFRESH", 300.0),
+            stats=crawler.stats,
+        )
+        crawler.signals.connect(matcher.opportunities_inserted, signal=opportunities_inserted)
+        # spider_closed comes after the upsert pipelines' last writes
+        crawler.signals.connect(matcher.spider_closed, signal=signals.spider_closed)
+        return matcher
+
+    def opportunities_inserted(self, items, spider):
+        self.buffer.extend(items)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def spider_closed(self, spider):
+        self.flush()
+
+    def flush(self):
+        batch, self.buffer = self.buffer, []
+        if not batch:
+            return
+        with Session(self.engine) as session:
+            if self.index is None or time.monotonic() - self.loaded_at >= self.refresh_interval:
+                self.index = AlertIndex.load(session)
+                self.loaded_at = time.monotonic()
+            if not len(self.index):
+                return
+            queued = enqueue_matches(session, self.index, batch)
+        if self.stats is not None:
+            self.stats.inc_value("alerts/matched", queued)
+        logger.debug("Queued %d alert matches for %d items", queued, len(batch))
@@ -0,0 +1,258 @@
+"""
+Bulk re-normalization of stored opportunities without re-crawling.
+
+Run after changing the extraction rules in ``utils/amounts.py``:
+
+    python -m deep_research.komkom_scraper.komkom_scraper.db.backfill amounts
+
+and once after introducing ``utils/urls.py``, to move rows stored under
+random ids to the deterministic id of their canonical URL:
+
+    python -m deep_research.komkom_scraper.komkom_scraper.db.backfill urls
+
+and ``clusters`` to index rows stored before near-duplicate clustering, and
+``features`` to (re-)encode ranking features after a ``utils.features``
+layout change.
+
+Rows are read in primary-key order with keyset pagination (constant memory,
+one short transaction per chunk). Only rows whose amount or currency actually
+change are written, with one executemany UPDATE per chunk that also refreshes
+``content_hash`` (so the next crawl does not see a spurious change) and the
+ranking ``features``, whose amount bucket follows the new value. An amount
+is never cleared: if the new rules find nothing, the stored value is kept.
+
+Like the upsert, every backfill that rewrites published columns moves
+their rows' ``updated_at`` and records them in the change log, so exports
+filtered on ``updated_at`` and offline clients pick the new values up.
+``features`` is left out: it never reaches exports or the delta feed, so
+re-encoding it alone does neither.
+"""
+
+import argparse
+import datetime
+import logging
+from decimal import Decimal
+
+from sqlalchemy import and_, bindparam, delete, select, update
+from sqlalchemy.orm import Session
+
+from .db import (
+    AlertMatch, ChangeOp, Opportunity, OpportunityBucket, OpportunityFeedback, UPSERT_FIELDS, assign_clusters,
+    compute_content_hash, get_engine, log_changes,
+)
+from ..utils import features
+from ..utils.amounts import extract_amounts
+from ..utils.urls import opportunity_id
+
+logger = logging.getLogger(__name__)
+
+
+def _same_amount(stored, value):
+    if stored is None or value is None:
+        return stored is value
+    return Decimal(str(stored)) == Decimal(str(value))
+
+
+def backfill_amounts(session, chunk_size=5000):
+    """Re-extract amount and currency from every description; return rows updated."""
+    columns = [Opportunity.id] + [getattr(Opportunity, field) for field in UPSERT_FIELDS]
+    last_id = None
+    updated = 0
+    while True:
+        query = select(*columns).order_by(Opportunity.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(Opportunity.id > last_id)
+        rows = session.execute(query).mappings().all()
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+
+        amounts = extract_amounts(row["description"] for row in rows)
+        now = datetime.datetime.utcnow()
+        changes = []
+        for row, amount in zip(rows, amounts):
+            if amount is None:
+                continue
+            if _same_amount(row["amount"], amount.value) and row["currency"] == amount.currency:
+                continue
+            new_row = dict(row, amount=amount.value, currency=amount.currency)
+            changes.append({
+                "id": row["id"],
+                "amount": amount.value,
+                "currency": amount.currency,
+                "content_hash": compute_content_hash(new_row),
+                "features": features.pack(features.encode(new_row)),
+                "updated_at": now,
+            })
+        if changes:
+            session.execute(update(Opportunity), changes)
+            log_changes(session, [change["id"] for change in changes])
+        session.commit()
+        updated += len(changes)
+        logger.info("Backfill: scanned up to id %s, %d rows updated so far", last_id, updated)
+    return updated
+
+
+def _move_references(session, moves):
+    """Point LSH buckets, alert matches, feedback and clusters at the new ids of ``moves`` (old -> new).
+
+    A duplicate's match or vote that the kept row already has for the same
+    search or user is dropped; so are its buckets, the kept row has its own.
+    """
+    params = [{"old_id": old, "new_id": new} for old, new in moves.items()]
+    old_id, new_id = bindparam("old_id"), bindparam("new_id")
+    buckets = OpportunityBucket.__table__
+    session.execute(delete(buckets).where(
+        buckets.c.opportunity_id == old_id,
+        select(buckets.c.opportunity_id).where(buckets.c.opportunity_id == new_id).exists(),
+    ), params)
+    for table, owner in ((AlertMatch.__table__, "saved_search_id"), (OpportunityFeedback.__table__, "user_id")):
+        kept = table.alias("kept")
+        session.execute(delete(table).where(
+            table.c.opportunity_id == old_id,
+            select(kept.c.opportunity_id).where(
+                and_(kept.c.opportunity_id == new_id, kept.c[owner] == table.c[owner])
+            ).exists(),
+        ), params)
+    for table in (buckets, AlertMatch.__table__, OpportunityFeedback.__table__):
+        session.execute(update(table).where(table.c.opportunity_id == old_id).values(opportunity_id=new_id), params)
+    opportunities = Opportunity.__table__
+    session.execute(
+        update(opportunities).where(opportunities.c.cluster_id == old_id).values(cluster_id=new_id), params,
+    )
+
+
+def backfill_urls(session, chunk_size=5000):
+    """Move rows to ``opportunity_id(source_url)``; return (rows updated, duplicates deleted).
+
+    ``source_url`` keeps the URL as fetched. When several stored rows share
+    a canonical URL, the one already stored under its id (or else the first
+    in id order) is kept and the others deleted. Rows referring to a moved
+    or deleted id (``_move_references``) follow it to the new one.
+    """
+    table = Opportunity.__table__
+    rename = update(table).where(table.c.id == bindparam("old_id")).values(id=bindparam("new_id"))
+    last_id = None
+    updated = deleted = 0
+    while True:
+        query = select(Opportunity.id, Opportunity.source_url).order_by(Opportunity.id).limit(chunk_size)
+        if last_id is not None:
+            query = query.where(Opportunity.id > last_id)
+        rows = session.execute(query).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        target = {row.id: opportunity_id(row.source_url) for row in rows}
+        changed = [row for row in rows if row.id != target[row.id]]
+        claimed = set(session.execute(
+            select(Opportunity.id).where(Opportunity.id.in_({target[row.id] for row in changed}))
+        ).scalars())
+        renames, duplicates = [], []
+        for row in changed:
+            new_id = target[row.id]
+            if new_id in claimed:
+                duplicates.append(row.id)
+                continue
+            claimed.add(new_id)
+            renames.append({"old_id": row.id, "new_id": new_id})
+        if duplicates:
+            session.execute(delete(Opportunity).where(Opportunity.id.in_(duplicates)))
+        if renames:
+            session.execute(rename, renames)
+        if renames:
+            _move_references(session, {r["old_id"]: r["new_id"] for r in renames})
+        for row_id in duplicates:
+            # One at a time: two duplicates of one row may carry the same match or vote
+            _move_references(session, {row_id: target[row_id]})
+        # Offline clients see a renamed row as removed under its old id and added under the new one
+        log_changes(session, duplicates + [r["old_id"] for r in renames], ChangeOp.delete)
+        log_changes(session, [r["new_id"] for r in renames])
+        session.commit()
+        updated += len(renames)
+        deleted += len(duplicates)
+        logger.info("Backfill: scanned up to id %s, %d rows updated, %d duplicates deleted",
+                    last_id, updated, deleted)
+    return updated, deleted
+
+
+def backfill_clusters(session, chunk_size=5000):
+    """Cluster and index every row without a MinHash signature; return rows processed."""
+    last_id = None
+    processed = 0
+    while True:
+        query = (
+            select(Opportunity.id, Opportunity.title, Opportunity.description, Opportunity.cluster_id)
+            .where(Opportunity.minhash.is_(None))
+            .order_by(Opportunity.id)
+            .limit(chunk_size)
+        )
+        if last_id is not None:
+            query = query.where(Opportunity.id > last_id)
+        rows = [dict(row) for row in session.execute(query).mappings()]
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        assign_clusters(session, rows)
+        session.execute(
+            update(Opportunity),
+            [{"id": row["id"], "cluster_id": row["cluster_id"], "minhash": row["minhash"]} for row in rows],
+        )
+        session.commit()
+        processed += len(rows)
+        logger.info("Backfill: clustered up to id %s, %d rows so far", last_id, processed)
+    return processed
+
+
+def backfill_features(session, chunk_size=5000, all_rows=False):
+    """Encode ranking features of rows without them (every row if ``all_rows``); return rows encoded."""
+    columns = [Opportunity.id, Opportunity.updated_at] + [getattr(Opportunity, field) for field in UPSERT_FIELDS]
+    last_id = None
+    processed = 0
+    while True:
+        query = select(*columns).order_by(Opportunity.id).limit(chunk_size)
+        if not all_rows:
+            query = query.where(Opportunity.features.is_(None))
+        if last_id is not None:
+            query = query.where(Opportunity.id > last_id)
+        rows = session.execute(query).mappings().all()
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        # Internal to ranking: keep updated_at (despite its onupdate) and leave the change log alone
+        session.execute(
+            update(Opportunity),
+            [{"id": row["id"], "features": features.pack(features.encode(row)), "updated_at": row["updated_at"]}
+             for row in rows],
+        )
+        session.commit()
+        processed += len(rows)
+        logger.info("Backfill: encoded features up to id %s, %d rows so far", last_id, processed)
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-normalize stored opportunities in bulk.")
+    parser.add_argument("target", choices=["amounts", "urls", "clusters", "features"])
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--all", action="store_true", help="features: re-encode every row")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    with Session(get_engine()) as session:
+        if args.target == "urls":
+            updated, deleted = backfill_urls(session, chunk_size=args.chunk_size)
+            print(f"Backfill of urls complete: {updated} rows updated, {deleted} duplicates deleted.")
+        elif args.target == "clusters":
+            updated = backfill_clusters(session, chunk_size=args.chunk_size)
+            print(f"Backfill of clusters complete: {updated} rows clustered.")
+        elif args.target == "features":
+            updated = backfill_features(session, chunk_size=args.chunk_size, all_rows=args.all)
+            print(f"Backfill of features complete: {updated} rows encoded.")
+        else:
+            updated = backfill_amounts(session, chunk_size=args.chunk_size)
+            print(f"Backfill of {args.target} complete: {updated} rows updated.")
+
+
+if __name__ == "__main__":
+    main()
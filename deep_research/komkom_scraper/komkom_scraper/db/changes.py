@@ -0,0 +1,168 @@
+"""
+Delta-sync change feed for offline mobile clients (US012, US013).
+
+Every write path appends to the ``opportunity_changes`` log in the same
+transaction as the write (``db.log_changes``): the upsert for the rows it
+actually inserted or updated, the amount and feature backfills for the rows
+they rewrite, the URL backfill for deleted and renamed ones. On PostgreSQL,
+``log_changes`` serializes writers until they commit, so log sequence numbers
+become visible in order and a cursor past N never misses an entry below N.
+A client keeps the opaque cursor of its last sync and asks for what changed
+since:
+
+    changes = changes_since(session, cursor, limit=500)
+    payload = encode_changes(changes)  # gzip'ed compact JSON
+
+The cursor packs the last log sequence number seen and the day of the sync.
+The answer holds, per page of at most ``limit`` log entries:
+
+- ``upserted``: current rows of opportunities inserted or changed (several
+  entries for one opportunity collapse into one row);
+- ``removed``: ids deleted, plus opportunities whose deadline passed since
+  the day in the cursor, so expirations need no log entries.
+
+A missing cursor means a first sync: the whole log is replayed (migration 8
+seeded it with the existing rows), and removals are omitted since the client
+has nothing to remove. Follow ``cursor`` while ``has_more`` is true.
+
+``compact_change_log`` drops entries superseded by a later one for the same
+opportunity; a client at any cursor still ends up in the same state.
+
+    python -m deep_research.komkom_scraper.komkom_scraper.db.changes compact
+"""
+
+import argparse
+import base64
+import datetime
+import gzip
+import json
+import logging
+import struct
+from typing import NamedTuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from .db import ChangeOp, Opportunity, OpportunityChange, get_engine
+from .export import _plain
+
+logger = logging.getLogger(__name__)
+
+FEED_FIELDS = [
+    "id", "title", "description", "deadline", "opportunity_type", "sector", "stage",
+    "amount", "currency", "eligibility_criteria", "source_url",
+]
+PAGE_SIZE = 500
+_CURSOR = struct.Struct(">BQI")  # version, last seq, day ordinal
+_CURSOR_VERSION = 1
+
+
+class InvalidCursorError(ValueError):
+    """The cursor was not issued by ``changes_since``."""
+
+
+class ChangeSet(NamedTuple):
+    upserted: list  # row dicts with FEED_FIELDS
+    removed: list  # opportunity ids
+    cursor: str
+    has_more: bool
+
+
+def encode_cursor(seq, day):
+    return base64.urlsafe_b64encode(_CURSOR.pack(_CURSOR_VERSION, seq, day.toordinal())).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor):
+    """(last seq, sync day) of ``cursor``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        version, seq, day = _CURSOR.unpack(raw)
+        if version != _CURSOR_VERSION:
+            raise ValueError(version)
+        return seq, datetime.date.fromordinal(day)
+    except (ValueError, TypeError, struct.error) as exc:
+        raise InvalidCursorError(f"Invalid change feed cursor: {cursor!r}") from exc
+
+
+def changes_since(session, cursor=None, limit=PAGE_SIZE, today=None):
+    """Opportunities upserted and removed since ``cursor`` (see module docstring)."""
+    today = today or datetime.date.today()
+    last_seq, since_day = decode_cursor(cursor) if cursor else (0, None)
+
+    entries = session.execute(
+        select(OpportunityChange.seq, OpportunityChange.opportunity_id, OpportunityChange.op)
+        .where(OpportunityChange.seq > last_seq)
+        .order_by(OpportunityChange.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    latest = {}
+    for _, opportunity_id, op in entries:
+        latest.pop(opportunity_id, None)  # keep log order of the last entry
+        latest[opportunity_id] = op
+
+    upsert_ids = [i for i, op in latest.items() if op == ChangeOp.upsert]
+    rows = {}
+    if upsert_ids:
+        for row in session.execute(
+            select(*(getattr(Opportunity, name) for name in FEED_FIELDS)).where(Opportunity.id.in_(upsert_ids))
+        ).mappings():
+            rows[row["id"]] = row
+    upserted, removed = [], []
+    for opportunity_id, op in latest.items():
+        row = rows.get(opportunity_id)
+        if op == ChangeOp.upsert and row is not None and not (row["deadline"] and row["deadline"] < today):
+            upserted.append({name: _plain(row[name]) for name in FEED_FIELDS})
+        else:
+            removed.append(opportunity_id)
+
+    if since_day is None:
+        removed = []
+    elif since_day < today:
+        # Expired since the last sync: deadline in [since_day, today)
+        removed += [
+            i for i in session.execute(
+                select(Opportunity.id).where(Opportunity.deadline >= since_day, Opportunity.deadline < today)
+            ).scalars()
+            if i not in latest
+        ]
+
+    next_seq = entries[-1][0] if entries else last_seq
+    return ChangeSet(upserted, removed, encode_cursor(next_seq, today), has_more)
+
+
+def encode_changes(changes):
+    """Gzip'ed JSON payload: field names once, then one array per row."""
+    payload = {
+        "cursor": changes.cursor,
+        "has_more": changes.has_more,
+        "fields": FEED_FIELDS,
+        "upserted": [[row[name] for name in FEED_FIELDS] for row in changes.upserted],
+        "removed": changes.removed,
+    }
+    return gzip.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(), mtime=0)
+
+
+def compact_change_log(session):
+    """Delete log entries superseded by a later one for the same opportunity; return the count."""
+    latest = select(func.max(OpportunityChange.seq)).group_by(OpportunityChange.opportunity_id)
+    result = session.execute(
+        delete(OpportunityChange).where(OpportunityChange.seq.not_in(latest))
+    )
+    session.commit()
+    return result.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the opportunity change log.")
+    parser.add_argument("command", choices=["compact"])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    with Session(get_engine()) as session:
+        deleted = compact_change_log(session)
+    print(f"Change log compacted: {deleted} superseded entries deleted.")
+
+
+if __name__ == "__main__":
+    main()
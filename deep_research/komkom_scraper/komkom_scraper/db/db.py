@@ -1,16 +1,24 @@
 import os
+import json
 import uuid
 import enum
+import hashlib
 import datetime
+from decimal import Decimal
 from sqlalchemy import (
-    create_engine, Column, String, Date, Enum, Numeric, Text,
-    TIMESTAMP, func, UniqueConstraint
+    create_engine, Column, String, Date, Enum, Numeric, Text, BigInteger, LargeBinary,
+    Boolean, Integer, Index, TIMESTAMP, func, UniqueConstraint, select, delete, literal_column
 )
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.engine.url import URL
 
+from ..utils import features, minhash
+from ..utils.urls import opportunity_id
+
 Base = declarative_base()
 
 
@@ -25,26 +33,140 @@ class Opportunity(Base):
     source_id = Column(Text, nullable=False)
     title = Column(Text, nullable=False)
     description = Column(Text, nullable=False)
-    deadline = Column(Date, nullable=True)
-    opportunity_type = Column(Enum(OpportunityType), nullable=False)
-    sector = Column(Text, nullable=True)
+    deadline = Column(Date, nullable=True, index=True)
+    opportunity_type = Column(Enum(OpportunityType), nullable=False, index=True)
+    sector = Column(Text, nullable=True, index=True)
     stage = Column(Text, nullable=True)
-    amount = Column(Numeric, nullable=True)
+    amount = Column(Numeric, nullable=True, index=True)
+    # ISO 4217 code of amount (XOF, EUR, USD), see utils.amounts
+    currency = Column(String(3), nullable=True)
     source_url = Column(Text, unique=True, nullable=False)
     scraped_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
-    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
     # New fields for eligibility and publication date
     eligibility_criteria = Column(Text, nullable=True)
     publication_date = Column(Date, nullable=True)
+    # SHA-256 of the normalized content fields, see compute_content_hash()
+    content_hash = Column(String(64), nullable=True)
+    # Near-duplicate cluster (id of the first opportunity seen in it), see assign_clusters()
+    cluster_id = Column(String(36), nullable=True, index=True)
+    # Packed MinHash signature of title + description, see utils.minhash
+    minhash = Column(LargeBinary, nullable=True)
+    # Packed float32 ranking features, see utils.features
+    features = Column(LargeBinary, nullable=True)
 
     __table_args__ = (
         UniqueConstraint('source_url', name='_source_url_uc'),
     )
 
 
+class AlertFrequency(enum.Enum):
+    # US008: Immédiat / Quotidien / Hebdomadaire
+    immediate = "immediate"
+    daily = "daily"
+    weekly = "weekly"
+
+
+class SavedSearch(Base):
+    """A user's alert: every criterion is optional, all given ones must match."""
+    __tablename__ = "saved_searches"
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(Text, nullable=False, index=True)
+    # Words that must all appear in title, description or eligibility criteria
+    keywords = Column(Text, nullable=True)
+    # Comma-separated sectors, any of which matches
+    sector = Column(Text, nullable=True)
+    opportunity_type = Column(Enum(OpportunityType), nullable=True)
+    min_amount = Column(Numeric, nullable=True)
+    max_amount = Column(Numeric, nullable=True)
+    # Only opportunities whose deadline is at most this many days away
+    deadline_within_days = Column(Integer, nullable=True)
+    frequency = Column(Enum(AlertFrequency), nullable=False, default=AlertFrequency.immediate)
+    active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+
+class AlertMatch(Base):
+    """Delivery queue: one row per (saved search, opportunity), pending until delivered_at is set."""
+    __tablename__ = "alert_matches"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    saved_search_id = Column(String(36), nullable=False)
+    opportunity_id = Column(String(36), nullable=False)
+    frequency = Column(Enum(AlertFrequency), nullable=False)
+    matched_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+    delivered_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('saved_search_id', 'opportunity_id', name='_alert_match_uc'),
+        Index('ix_alert_matches_pending', 'frequency', 'delivered_at'),
+    )
+
+
+class OpportunityFeedback(Base):
+    """US011: a user's thumbs up/down on an opportunity of their journal (latest vote wins)."""
+    __tablename__ = "opportunity_feedback"
+    user_id = Column(Text, primary_key=True)
+    opportunity_id = Column(String(36), primary_key=True)
+    liked = Column(Boolean, nullable=False)
+    comment = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+
+class UserWeights(Base):
+    """A user's ranking weights (packed float32, see ranking.py), learned from feedback."""
+    __tablename__ = "user_weights"
+    user_id = Column(Text, primary_key=True)
+    weights = Column(LargeBinary, nullable=False)
+    feedback_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
+class ChangeOp(enum.Enum):
+    upsert = "upsert"
+    delete = "delete"
+
+
+class OpportunityChange(Base):
+    """Append-only change log read by the delta-sync feed (see db.changes)."""
+    __tablename__ = "opportunity_changes"
+    # SQLite only auto-increments INTEGER PRIMARY KEY
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    opportunity_id = Column(String(36), nullable=False, index=True)
+    op = Column(Enum(ChangeOp), nullable=False)
+    changed_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+
+CHANGE_LOG_LOCK = 0x6B6F6D636867  # pg_advisory_xact_lock key serializing change log writers
+
+
+def log_changes(session, ids, op=ChangeOp.upsert):
+    """Append one change log entry per id, in the caller's transaction; call it right before commit.
+
+    On PostgreSQL a transaction-level advisory lock is taken first and held
+    until commit, so sequence numbers are drawn in commit order: a reader
+    never sees ``seq`` N committed while a smaller one is still in flight,
+    which would let a change feed cursor skip it.
+    """
+    ids = list(ids)
+    if ids:
+        if session.get_bind().dialect.name == "postgresql":
+            session.execute(select(func.pg_advisory_xact_lock(CHANGE_LOG_LOCK)))
+        session.execute(OpportunityChange.__table__.insert(), [{'opportunity_id': i, 'op': op} for i in ids])
+
+
+class OpportunityBucket(Base):
+    """LSH band buckets: opportunities sharing a bucket are near-duplicate candidates."""
+    __tablename__ = "opportunity_lsh_buckets"
+    bucket = Column(BigInteger, primary_key=True)
+    opportunity_id = Column(String(36), primary_key=True, index=True)
+
+
 def get_engine(echo=False, use_sqlite_memory=False):
     if use_sqlite_memory:
         return create_engine("sqlite:///:memory:", echo=echo, future=True)
+    if os.environ.get("DATABASE_URL"):
+        # Full SQLAlchemy URL, e.g. a SQLite file for local benchmarks
+        return create_engine(os.environ["DATABASE_URL"], echo=echo, future=True)
     db_url = URL.create(
         drivername="postgresql+psycopg2",
         username=os.environ.get("DB_USER"),
@@ -57,57 +179,249 @@ def get_engine(echo=False, use_sqlite_memory=False):
 
 
 def create_tables(engine=None):
-    if engine is None:
-        engine = get_engine()
-    Base.metadata.create_all(engine)
+    """Bring the schema up to date (see ``migrations.migrate``)."""
+    from .migrations import migrate
+    migrate(engine or get_engine())
+
+
+UPSERT_FIELDS = [
+    'title', 'description', 'deadline', 'opportunity_type',
+    'sector', 'stage', 'amount', 'currency',
+    'eligibility_criteria', 'publication_date',
+]
+
+
+def _normalize_for_hash(value):
+    if value is None:
+        return None
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return str(Decimal(str(value)).normalize())
+    if isinstance(value, str):
+        return " ".join(value.split()) or None
+    return str(value)
+
+
+def compute_content_hash(item):
+    """SHA-256 over the normalized ``UPSERT_FIELDS`` of an item.
+
+    Whitespace runs, numeric representation (1000 vs 1000.0) and enum vs
+    plain string types do not change the hash, so a re-scrape of identical
+    content always produces the same fingerprint.
+    """
+    payload = [_normalize_for_hash(item.get(field)) for field in UPSERT_FIELDS]
+    return hashlib.sha256(
+        json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+    ).hexdigest()
 
 
 def upsert_opportunity(session, item):
-    """Upsert logic based on source_url SHA256 uniqueness."""
-    from sqlalchemy import select, update
+    """Upsert a single item (see ``bulk_upsert_opportunities``); return the id of its row."""
+    row_id = item.get('id') or opportunity_id(item['source_url'])
+    bulk_upsert_opportunities(session, [{**item, 'id': row_id}])
+    return row_id
+
+
+def _insert_for(session):
+    """Pick the dialect-specific INSERT construct that supports ON CONFLICT."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return pg_insert
+    if dialect == "sqlite":
+        return sqlite_insert
+    raise NotImplementedError(f"Bulk upsert is not supported on {dialect}")
+
+
+def _upsert_row(item, now):
+    return {
+        # Items without an id get the same deterministic one the pipelines assign
+        'id': item.get('id') or opportunity_id(item['source_url']),
+        'source_id': item['source_id'],
+        'title': item['title'],
+        'description': item['description'],
+        'deadline': item.get('deadline'),
+        'opportunity_type': item['opportunity_type'],
+        'sector': item.get('sector'),
+        'stage': item.get('stage'),
+        'amount': item.get('amount'),
+        'currency': item.get('currency'),
+        'source_url': item['source_url'],
+        'scraped_at': item.get('scraped_at') or now,
+        'updated_at': now,
+        'eligibility_criteria': item.get('eligibility_criteria'),
+        'publication_date': item.get('publication_date'),
+        'content_hash': item.get('content_hash') or compute_content_hash(item),
+    }
+
+
+def assign_clusters(session, rows, threshold=0.6):
+    """Set ``cluster_id`` and ``minhash`` on upsert rows and index their LSH buckets.
+
+    Candidates are the stored opportunities (and earlier rows of the batch)
+    that share at least one band bucket with a row, found through the
+    indexed ``opportunity_lsh_buckets`` table, so the cost does not grow
+    with the table. A new row joins the cluster of its most similar
+    candidate when the estimated Jaccard similarity of title + description
+    reaches ``threshold``; otherwise it starts a cluster named after its own
+    id. Rows that already carry a ``cluster_id`` keep it. Bucket rows another
+    transaction wrote for the same ids in the meantime are left in place.
+    """
+    signatures = {}
+    row_keys = {}
+    for row in rows:
+        sig = minhash.signature(f"{row.get('title') or ''} {row.get('description') or ''}")
+        row['minhash'] = minhash.pack(sig) if sig else None
+        row.setdefault('cluster_id', None)
+        if sig:
+            signatures[row['id']] = sig
+            row_keys[row['id']] = set(minhash.band_keys(sig))
+
+    ids = [row['id'] for row in rows]
+    session.execute(delete(OpportunityBucket).where(OpportunityBucket.opportunity_id.in_(ids)))
+    buckets = {}
+    all_keys = set().union(*row_keys.values())
+    if all_keys:
+        for bucket, opportunity_id in session.execute(
+            select(OpportunityBucket.bucket, OpportunityBucket.opportunity_id)
+            .where(OpportunityBucket.bucket.in_(all_keys))
+        ):
+            buckets.setdefault(bucket, set()).add(opportunity_id)
+    candidate_ids = set().union(*buckets.values())
+    stored = {}
+    if candidate_ids:
+        for row_id, cluster_id, blob in session.execute(
+            select(Opportunity.id, Opportunity.cluster_id, Opportunity.minhash)
+            .where(Opportunity.id.in_(candidate_ids))
+        ):
+            if blob:
+                stored[row_id] = (cluster_id or row_id, minhash.unpack(blob))
+
+    new_buckets = []
+    for row in rows:
+        row_id = row['id']
+        sig = signatures.get(row_id)
+        if row['cluster_id'] is None and sig:
+            candidates = set().union(*(buckets.get(key, ()) for key in row_keys[row_id]))
+            best, best_score = None, threshold
+            for candidate in candidates - {row_id}:
+                if candidate in stored:
+                    score = minhash.similarity(sig, stored[candidate][1])
+                    if score >= best_score:
+                        best, best_score = candidate, score
+            if best is not None:
+                row['cluster_id'] = stored[best][0]
+        if row['cluster_id'] is None:
+            row['cluster_id'] = row_id
+        if sig:
+            # Later rows of the same batch can match this one
+            stored[row_id] = (row['cluster_id'], sig)
+            for key in row_keys[row_id]:
+                buckets.setdefault(key, set()).add(row_id)
+                new_buckets.append({'bucket': key, 'opportunity_id': row_id})
+    if new_buckets:
+        # A concurrent writer of the same id may have indexed it since our delete
+        insert = _insert_for(session)
+        session.execute(insert(OpportunityBucket.__table__).on_conflict_do_nothing(), new_buckets)
+
+
+class UpsertCounts(dict):
+    """``{'new': n, 'changed': n, 'unchanged': n}``; ``inserted`` and ``updated`` list the ids written."""
+
+    def __init__(self):
+        super().__init__(new=0, changed=0, unchanged=0)
+        self.inserted = []
+        self.updated = []
+
+
+def bulk_upsert_opportunities(session, items):
+    """Upsert a batch of items with one multi-row INSERT ... ON CONFLICT.
+
+    Rows are keyed on ``id`` (``opportunity_id`` of the canonical URL unless
+    the item carries one) and compared by ``content_hash`` only: one lookup
+    by primary key classifies the batch, unchanged rows are not sent at all,
+    and the ``WHERE content_hash IS DISTINCT FROM excluded`` guard keeps
+    ``updated_at`` still if a concurrent writer got there first.
+    ``source_url`` is the URL as fetched, for display; a changed row takes
+    the latest one. Duplicate ids inside the batch (variants of one URL)
+    collapse to the last occurrence, since Postgres refuses to touch the
+    same row twice in one statement. New and
+    changed rows are clustered with ``assign_clusters`` and get their ranking
+    features (``utils.features``) before the write; the rows the write
+    actually inserted or updated are recorded in the ``opportunity_changes``
+    log in the same transaction.
+
+    Returns an ``UpsertCounts``: the number of ``new``, ``changed`` and
+    ``unchanged`` rows, with the ids this call actually inserted or updated,
+    as reported by ``RETURNING`` (a row a concurrent writer inserted or
+    updated first is not counted as ours).
+    """
     now = datetime.datetime.utcnow()
-    existing = session.execute(
-        select(Opportunity).where(Opportunity.source_url == item['source_url'])
-    ).scalar_one_or_none()
-
-    if existing:
-        changed = False
-        fields_to_update = [
-            'title', 'description', 'deadline', 'opportunity_type',
-            'sector', 'stage', 'amount',
-            'eligibility_criteria', 'publication_date'  # new fields
-        ]
-        for field in fields_to_update:
-            if getattr(existing, field) != item.get(field):
-                setattr(existing, field, item.get(field))
-                changed = True
-        if changed:
-            existing.updated_at = now
-        session.commit()
-        return existing.id
-    else:
-        opp = Opportunity(
-            id=item.get('id', str(uuid.uuid4())),
-            source_id=item['source_id'],
-            title=item['title'],
-            description=item['description'],
-            deadline=item.get('deadline'),
-            opportunity_type=item['opportunity_type'],
-            sector=item.get('sector'),
-            stage=item.get('stage'),
-            amount=item.get('amount'),
-            source_url=item['source_url'],
-            scraped_at=item.get('scraped_at', now),
-            updated_at=now,
-            eligibility_criteria=item.get('eligibility_criteria'),
-            publication_date=item.get('publication_date'),
+    rows = {}
+    for item in items:
+        row = _upsert_row(item, now)
+        rows[row['id']] = row
+    counts = UpsertCounts()
+    if not rows:
+        return counts
+
+    known = {
+        row_id: (content_hash, cluster_id)
+        for row_id, content_hash, cluster_id in session.execute(
+            select(Opportunity.id, Opportunity.content_hash, Opportunity.cluster_id)
+            .where(Opportunity.id.in_(list(rows)))
         )
-        session.add(opp)
-        session.commit()
-        return opp.id
+    }
+    to_write = []
+    for row_id, row in rows.items():
+        if row_id in known:
+            if known[row_id][0] == row['content_hash']:
+                continue
+            # Changed rows keep their cluster
+            row['cluster_id'] = known[row_id][1]
+        to_write.append(row)
+
+    if to_write:
+        assign_clusters(session, to_write)
+        for row in to_write:
+            row['features'] = features.pack(features.encode(row))
+        insert = _insert_for(session)
+        table = Opportunity.__table__
+        stmt = insert(table).values(to_write)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={
+                **{field: stmt.excluded[field] for field in UPSERT_FIELDS},
+                'source_url': stmt.excluded.source_url,
+                'content_hash': stmt.excluded.content_hash,
+                'cluster_id': stmt.excluded.cluster_id,
+                'minhash': stmt.excluded.minhash,
+                'features': stmt.excluded.features,
+                'updated_at': stmt.excluded.updated_at,
+            },
+            where=table.c.content_hash.is_distinct_from(stmt.excluded.content_hash),
+        )
+        if session.get_bind().dialect.name == "postgresql":
+            # xmax is 0 on a freshly inserted row version
+            written = session.execute(stmt.returning(table.c.id, literal_column("xmax = 0"))).all()
+        else:
+            # SQLite serializes writers: the lookup above is still current
+            written = [(row_id, row_id not in known) for (row_id,) in session.execute(stmt.returning(table.c.id))]
+        for row_id, inserted in written:
+            (counts.inserted if inserted else counts.updated).append(row_id)
+        # Not the rows the content_hash guard skipped
+        log_changes(session, counts.inserted + counts.updated)
+    session.commit()
+    counts['new'] = len(counts.inserted)
+    counts['changed'] = len(counts.updated)
+    counts['unchanged'] = len(rows) - counts['new'] - counts['changed']
+    return counts
+
 
 if __name__ == "__main__":
-    # For Makefile migrate
+    # Kept for older tooling; `make migrate` runs db.migrations
     engine = get_engine()
     create_tables(engine)
     print("DB migration complete.")
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Bulk export of opportunities to NDJSON, CSV or Parquet in constant memory.
+
+    python -m deep_research.komkom_scraper.komkom_scraper.db.export \\
+        --format ndjson --out opportunities.ndjson.gz [--updated-since 2024-05-01] \\
+        [--type financement] [--deadline-from 2024-06-01] [--deadline-to 2024-12-31]
+
+Rows are read with ``yield_per``, i.e. a server-side (named) cursor on
+PostgreSQL, and written one chunk at a time: only ``--chunk-size`` rows are
+ever held in memory, whatever the size of the table. NDJSON and CSV outputs
+are gzip-compressed when the path ends in ``.gz``; ``-`` writes to stdout.
+Parquet needs the optional ``pyarrow`` package and writes one row group per
+chunk.
+
+Only plain columns are exported; the binary ``minhash`` and ``features``
+columns are internal.
+"""
+
+import argparse
+import csv
+import datetime
+import decimal
+import gzip
+import io
+import json
+import logging
+import sys
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .db import Opportunity, OpportunityType, get_engine
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "csv", "parquet")
+CHUNK_SIZE = 5000
+EXPORT_COLUMNS = [
+    "id", "source_id", "title", "description", "deadline", "opportunity_type", "sector", "stage",
+    "amount", "currency", "source_url", "scraped_at", "updated_at", "eligibility_criteria",
+    "publication_date", "content_hash", "cluster_id",
+]
+
+
+def export_query(updated_since=None, opportunity_type=None, deadline_from=None, deadline_to=None):
+    conditions = []
+    if updated_since is not None:
+        conditions.append(Opportunity.updated_at >= updated_since)
+    if opportunity_type is not None:
+        conditions.append(Opportunity.opportunity_type == OpportunityType(opportunity_type))
+    if deadline_from is not None:
+        conditions.append(Opportunity.deadline >= deadline_from)
+    if deadline_to is not None:
+        conditions.append(Opportunity.deadline <= deadline_to)
+    return (
+        select(*(getattr(Opportunity, name) for name in EXPORT_COLUMNS))
+        .where(*conditions)
+        .order_by(Opportunity.id)
+    )
+
+
+def iter_chunks(session, query, chunk_size=CHUNK_SIZE):
+    """Lists of at most ``chunk_size`` row dicts, fetched through a streaming cursor."""
+    result = session.execute(query.execution_options(yield_per=chunk_size))
+    for partition in result.mappings().partitions():
+        yield partition
+
+
+def _plain(value):
+    if isinstance(value, OpportunityType):
+        return value.value
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+class NdjsonWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, rows):
+        self.stream.write("".join(
+            json.dumps({name: _plain(row[name]) for name in EXPORT_COLUMNS}, ensure_ascii=False) + "\n"
+            for row in rows
+        ))
+
+    def close(self):
+        pass
+
+
+class CsvWriter:
+    def __init__(self, stream):
+        self.writer = csv.writer(stream)
+        self.writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, rows):
+        self.writer.writerows([_plain(row[name]) for name in EXPORT_COLUMNS] for row in rows)
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from exc
+        self.pa = pa
+        self.schema = pa.schema([
+            (name, pa.date32() if name in ("deadline", "publication_date")
+             else pa.timestamp("us") if name in ("scraped_at", "updated_at")
+             else pa.float64() if name == "amount"
+             else pa.string())
+            for name in EXPORT_COLUMNS
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows):
+        columns = {}
+        for name in EXPORT_COLUMNS:
+            values = [row[name] for row in rows]
+            if name == "opportunity_type":
+                values = [_plain(value) for value in values]
+            elif name == "amount":
+                values = [None if value is None else float(value) for value in values]
+            columns[name] = values
+        self.writer.write_table(self.pa.Table.from_pydict(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def _open_text(path):
+    if path == "-":
+        return sys.stdout
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "wb"), encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_opportunities(session, path, fmt="ndjson", chunk_size=CHUNK_SIZE, **filters):
+    """Stream the filtered opportunities to ``path``; return the number of rows written."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    stream = None
+    if fmt == "parquet":
+        writer = ParquetWriter(path)
+    else:
+        stream = _open_text(path)
+        writer = NdjsonWriter(stream) if fmt == "ndjson" else CsvWriter(stream)
+    written = 0
+    try:
+        for rows in iter_chunks(session, export_query(**filters), chunk_size):
+            writer.write(rows)
+            written += len(rows)
+            logger.debug("Exported %d rows", written)
+    finally:
+        writer.close()
+        if stream is not None and stream is not sys.stdout:
+            stream.close()
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export opportunities in bulk.")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--out", default="-", help="output path, '-' for stdout (not for parquet)")
+    parser.add_argument("--updated-since", type=datetime.datetime.fromisoformat)
+    parser.add_argument("--type", dest="opportunity_type", choices=[t.value for t in OpportunityType])
+    parser.add_argument("--deadline-from", type=datetime.date.fromisoformat)
+    parser.add_argument("--deadline-to", type=datetime.date.fromisoformat)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    if args.format == "parquet" and args.out == "-":
+        parser.error("parquet export needs --out")
+
+    with Session(get_engine()) as session:
+        written = export_opportunities(
+            session, args.out, args.format, args.chunk_size,
+            updated_since=args.updated_since, opportunity_type=args.opportunity_type,
+            deadline_from=args.deadline_from, deadline_to=args.deadline_to,
+        )
+    print(f"Exported {written} opportunities.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
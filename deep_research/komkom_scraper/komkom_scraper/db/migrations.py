@@ -0,0 +1,338 @@
+"""
+Versioned schema migrations for the opportunities database.
+
+``migrate(engine)`` applies, in order, every entry of ``MIGRATIONS`` whose
+version is above the highest one recorded in the ``schema_version`` table,
+and records each one as it completes. ``make migrate`` runs it:
+
+    python -m deep_research.komkom_scraper.komkom_scraper.db.migrations
+
+Pipelines do not touch the schema any more; they call ``check_schema``, a
+single ``SELECT max(version)``, and refuse to start on an outdated database.
+
+Every step is idempotent (``IF NOT EXISTS``, added columns are looked up
+first), so a database created by the old ``create_all`` is brought up to
+date safely. On PostgreSQL, index migrations run outside a transaction with
+``CREATE INDEX CONCURRENTLY`` so writers are never blocked; an invalid index
+left behind by an interrupted concurrent build is dropped and rebuilt.
+Large tables are never rewritten: new columns are nullable without a
+default, and existing rows are filled in small committed batches.
+
+Migrations carry their own frozen copy of the tables and columns they
+create, never the live models of ``db.py``: editing a model does not change
+what an old migration does, it needs a new migration.
+
+On PostgreSQL, ``migrate`` holds an advisory lock for the whole run, so two
+``make migrate`` started together apply each migration once, one after the
+other. SQLite has no such lock; only run one migration at a time there.
+
+To change the schema, append a ``Migration`` with the next version number;
+never edit one that has shipped.
+"""
+
+import datetime
+import logging
+from contextlib import contextmanager
+from typing import Callable, NamedTuple
+
+from sqlalchemy import (
+    TIMESTAMP, BigInteger, Boolean, Column, Date, DateTime, Enum, Index, Integer, LargeBinary, MetaData, Numeric,
+    String, Table, Text, UniqueConstraint, func, inspect, select, text,
+)
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateColumn
+
+from .db import get_engine
+from .search import FTS_TABLE, POSTGRES_DDL, POSTGRES_FILL_BATCH, SQLITE_DDL
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_LOCK = 0x6B6F6D6B6F6D  # pg_advisory_lock key held by migrate()
+FILL_BATCH_SIZE = 5000
+
+_metadata = MetaData()
+schema_version = Table(
+    "schema_version", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", Text, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable  # apply(conn); conn is in AUTOCOMMIT mode when concurrent
+    concurrent: bool = False  # PostgreSQL: run outside a transaction
+
+
+class SchemaOutdatedError(RuntimeError):
+    """The database is behind ``SCHEMA_VERSION``; run ``make migrate``."""
+
+
+# Frozen DDL, as each migration shipped it
+_OPPORTUNITY_TYPE = Enum("financement", "accompagnement", name="opportunitytype")
+_ALERT_FREQUENCY = Enum("immediate", "daily", "weekly", name="alertfrequency")
+
+_v1 = MetaData()
+_V1_OPPORTUNITIES = Table(
+    "opportunities", _v1,
+    Column("id", String(36), primary_key=True),
+    Column("source_id", Text, nullable=False),
+    Column("title", Text, nullable=False),
+    Column("description", Text, nullable=False),
+    Column("deadline", Date, nullable=True, index=True),
+    Column("opportunity_type", _OPPORTUNITY_TYPE, nullable=False, index=True),
+    Column("sector", Text, nullable=True, index=True),
+    Column("stage", Text, nullable=True),
+    Column("amount", Numeric, nullable=True, index=True),
+    Column("currency", String(3), nullable=True),
+    Column("source_url", Text, unique=True, nullable=False),
+    Column("scraped_at", TIMESTAMP, server_default=func.now(), nullable=False),
+    Column("updated_at", TIMESTAMP, server_default=func.now(), nullable=False),
+    Column("eligibility_criteria", Text, nullable=True),
+    Column("publication_date", Date, nullable=True),
+    Column("content_hash", String(64), nullable=True),
+    Column("cluster_id", String(36), nullable=True, index=True),
+    Column("minhash", LargeBinary, nullable=True),
+    UniqueConstraint("source_url", name="_source_url_uc"),
+)
+Table(
+    "opportunity_lsh_buckets", _v1,
+    Column("bucket", BigInteger, primary_key=True),
+    Column("opportunity_id", String(36), primary_key=True, index=True),
+)
+
+_v6 = MetaData()
+Table(
+    "saved_searches", _v6,
+    Column("id", String(36), primary_key=True),
+    Column("user_id", Text, nullable=False, index=True),
+    Column("keywords", Text, nullable=True),
+    Column("sector", Text, nullable=True),
+    Column("opportunity_type", _OPPORTUNITY_TYPE, nullable=True),
+    Column("min_amount", Numeric, nullable=True),
+    Column("max_amount", Numeric, nullable=True),
+    Column("deadline_within_days", Integer, nullable=True),
+    Column("frequency", _ALERT_FREQUENCY, nullable=False),
+    Column("active", Boolean, nullable=False),
+    Column("created_at", TIMESTAMP, server_default=func.now(), nullable=False),
+)
+Table(
+    "alert_matches", _v6,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("saved_search_id", String(36), nullable=False),
+    Column("opportunity_id", String(36), nullable=False),
+    Column("frequency", _ALERT_FREQUENCY, nullable=False),
+    Column("matched_at", TIMESTAMP, server_default=func.now(), nullable=False),
+    Column("delivered_at", TIMESTAMP, nullable=True),
+    UniqueConstraint("saved_search_id", "opportunity_id", name="_alert_match_uc"),
+    Index("ix_alert_matches_pending", "frequency", "delivered_at"),
+)
+
+_v7 = MetaData()
+_V7_OPPORTUNITIES = Table(
+    "opportunities", _v7,
+    Column("features", LargeBinary, nullable=True),
+)
+Table(
+    "opportunity_feedback", _v7,
+    Column("user_id", Text, primary_key=True),
+    Column("opportunity_id", String(36), primary_key=True),
+    Column("liked", Boolean, nullable=False),
+    Column("comment", Text, nullable=True),
+    Column("created_at", TIMESTAMP, server_default=func.now(), nullable=False),
+)
+Table(
+    "user_weights", _v7,
+    Column("user_id", Text, primary_key=True),
+    Column("weights", LargeBinary, nullable=False),
+    Column("feedback_count", Integer, nullable=False),
+    Column("updated_at", TIMESTAMP, server_default=func.now(), nullable=False),
+)
+
+_v8 = MetaData()
+Table(
+    "opportunity_changes", _v8,
+    Column("seq", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+    Column("opportunity_id", String(36), nullable=False, index=True),
+    Column("op", Enum("upsert", "delete", name="changeop"), nullable=False),
+    Column("changed_at", TIMESTAMP, server_default=func.now(), nullable=False),
+)
+
+
+def _create_tables(conn):
+    _v1.create_all(conn)
+
+
+def _add_missing_columns(conn, table=_V1_OPPORTUNITIES):
+    """ALTER TABLE ADD COLUMN for the columns of frozen ``table`` the database does not have yet."""
+    existing = {col["name"] for col in inspect(conn).get_columns(table.name)}
+    for col in table.columns:
+        if col.name not in existing:
+            ddl = CreateColumn(col).compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+            logger.info("Added column %s.%s", table.name, col.name)
+
+
+def _create_index(conn, name, table, columns, using=None):
+    if conn.dialect.name == "postgresql":
+        valid = conn.execute(
+            text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                 "WHERE c.relname = :name"),
+            {"name": name},
+        ).scalar()
+        if valid is False:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        method = f" USING {using}" if using else ""
+        conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}{method} ({columns})"))
+    else:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+def _filter_indexes(conn):
+    for column in ("sector", "opportunity_type", "amount", "deadline", "cluster_id"):
+        _create_index(conn, f"ix_opportunities_{column}", "opportunities", column)
+    _create_index(conn, "ix_opportunity_lsh_buckets_opportunity_id",
+                  "opportunity_lsh_buckets", "opportunity_id")
+
+
+def _search_column(conn):
+    if conn.dialect.name == "postgresql":
+        # A nullable column without default is added without rewriting the table;
+        # the trigger fills new and edited rows, _search_index the existing ones
+        for statement in POSTGRES_DDL:
+            conn.execute(text(statement))
+    elif conn.dialect.name == "sqlite":
+        for statement in SQLITE_DDL:
+            conn.execute(text(statement))
+        # Index the rows that existed before the triggers
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def _search_index(conn):
+    if conn.dialect.name == "postgresql":
+        # Each batch commits on its own (AUTOCOMMIT), so row locks stay short
+        after, filled = "", 0
+        while True:
+            ids = conn.execute(text(POSTGRES_FILL_BATCH), {"after": after, "batch": FILL_BATCH_SIZE}).scalars().all()
+            if not ids:
+                break
+            after, filled = max(ids), filled + len(ids)
+        logger.info("Filled search_vector on %d rows", filled)
+        _create_index(conn, "ix_opportunities_search_vector", "opportunities", "search_vector", using="GIN")
+
+
+def _alert_tables(conn):
+    _v6.create_all(conn)
+
+
+def _ranking(conn):
+    _add_missing_columns(conn, _V7_OPPORTUNITIES)
+    _v7.create_all(conn, tables=[_v7.tables["opportunity_feedback"], _v7.tables["user_weights"]])
+
+
+def _change_log(conn):
+    _v8.create_all(conn)
+    # Existing rows enter the log once, so a first sync from an empty cursor sees them all
+    conn.execute(text(
+        "INSERT INTO opportunity_changes (opportunity_id, op, changed_at) "
+        "SELECT id, 'upsert', updated_at FROM opportunities ORDER BY updated_at, id"
+    ))
+
+
+def _updated_at_index(conn):
+    _create_index(conn, "ix_opportunities_updated_at", "opportunities", "updated_at")
+
+
+MIGRATIONS = [
+    Migration(1, "create tables", _create_tables),
+    Migration(2, "add columns missing from databases created by older versions", _add_missing_columns),
+    Migration(3, "B-tree indexes on filter and cluster columns", _filter_indexes, concurrent=True),
+    Migration(4, "full-text search column and trigger (PostgreSQL) / FTS5 table (SQLite)", _search_column),
+    Migration(5, "fill search_vector in batches, then its GIN index", _search_index, concurrent=True),
+    Migration(6, "saved searches and alert match queue (US008)", _alert_tables),
+    Migration(7, "ranking features column, feedback and user weights (US011)", _ranking),
+    Migration(8, "opportunity change log for delta sync (US013)", _change_log),
+    Migration(9, "index on updated_at", _updated_at_index, concurrent=True),
+]
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def current_version(conn):
+    """Highest applied version, or 0 when the database was never migrated."""
+    try:
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        conn.rollback()
+        return 0
+
+
+def migrate(engine=None):
+    """Apply pending migrations; return the list of versions applied."""
+    if engine is None:
+        engine = get_engine()
+    with _migration_lock(engine):
+        return _migrate(engine)
+
+
+@contextmanager
+def _migration_lock(engine):
+    """Hold the PostgreSQL advisory lock ``MIGRATION_LOCK``; other runs wait for it."""
+    if engine.dialect.name != "postgresql":
+        yield
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK})
+
+
+def _migrate(engine):
+    # Read the version under the lock: a run that waited sees what the other one applied
+    _metadata.create_all(engine)
+    with engine.connect() as conn:
+        version = current_version(conn)
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        logger.info("Applying migration %d: %s", migration.version, migration.description)
+        if migration.concurrent and engine.dialect.name == "postgresql":
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                migration.apply(conn)
+            with engine.begin() as conn:
+                _record(conn, migration)
+        else:
+            with engine.begin() as conn:
+                migration.apply(conn)
+                _record(conn, migration)
+        applied.append(migration.version)
+    return applied
+
+
+def _record(conn, migration):
+    conn.execute(schema_version.insert().values(
+        version=migration.version,
+        description=migration.description,
+        applied_at=datetime.datetime.utcnow(),
+    ))
+
+
+def check_schema(engine):
+    """Raise ``SchemaOutdatedError`` unless the database is at ``SCHEMA_VERSION``."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version < SCHEMA_VERSION:
+        raise SchemaOutdatedError(
+            f"Database schema is at version {version}, expected {SCHEMA_VERSION}; run `make migrate`."
+        )
+    return version
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    applied = migrate()
+    print(f"DB migration complete (schema version {SCHEMA_VERSION}, applied: {applied or 'none'}).")
@@ -0,0 +1,145 @@
+"""
+Keyword search over opportunities with Secteur/Type/Montant/Deadline filters (US007).
+
+Two backends share one API, ``search_opportunities``:
+
+- PostgreSQL: a ``search_vector`` tsvector column, kept up to date by a
+  trigger, using the ``french`` text search config (stemming, stop words),
+  weighted title (A) > description (B) > eligibility criteria (C), with a
+  GIN index.
+  Queries go through ``websearch_to_tsquery`` and rank with ``ts_rank_cd``.
+- SQLite (tests, local runs): an external-content FTS5 table kept in sync by
+  triggers, tokenized with ``unicode61 remove_diacritics 2``. FTS5 has no
+  French stemmer, so every keyword is matched as a prefix ("financ" finds
+  "financement"); results are ranked with weighted ``bm25``.
+
+The filter columns have plain B-tree indexes. The DDL below is applied by
+``migrations.py`` (``make migrate``).
+"""
+
+import re
+from typing import NamedTuple
+
+from sqlalchemy import column, func, literal_column, select, table, text
+
+from .db import Opportunity
+
+WEIGHTS = {"title": "A", "description": "B", "eligibility_criteria": "C"}
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+FTS_TABLE = "opportunities_fts"
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _pg_vector(row=""):
+    return " || ".join(
+        f"setweight(to_tsvector('french', coalesce({row}{name}, '')), '{weight}')"
+        for name, weight in WEIGHTS.items()
+    )
+
+
+POSTGRES_DDL = [
+    "ALTER TABLE opportunities ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE OR REPLACE FUNCTION opportunities_search_vector() RETURNS trigger AS $$ "
+    f"BEGIN NEW.search_vector := {_pg_vector('NEW.')}; RETURN NEW; END $$ LANGUAGE plpgsql",
+    "DROP TRIGGER IF EXISTS opportunities_search_vector ON opportunities",
+    "CREATE TRIGGER opportunities_search_vector "
+    f"BEFORE INSERT OR UPDATE OF {', '.join(WEIGHTS)} ON opportunities "
+    "FOR EACH ROW EXECUTE FUNCTION opportunities_search_vector()",
+]
+# Fills the rows written before the trigger, by id after :after; returns the ids filled
+POSTGRES_FILL_BATCH = (
+    f"UPDATE opportunities o SET search_vector = {_pg_vector('o.')} "
+    "FROM (SELECT id FROM opportunities WHERE id > :after AND search_vector IS NULL "
+    "ORDER BY id LIMIT :batch) batch WHERE o.id = batch.id RETURNING o.id"
+)
+_FTS_COLUMNS = ", ".join(WEIGHTS)
+_NEW_VALUES = ", ".join(f"new.{name}" for name in WEIGHTS)
+_OLD_VALUES = ", ".join(f"old.{name}" for name in WEIGHTS)
+SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"{_FTS_COLUMNS}, content='opportunities', content_rowid='rowid', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON opportunities BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES (new.rowid, {_NEW_VALUES}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON opportunities BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS}) "
+    f"VALUES ('delete', old.rowid, {_OLD_VALUES}); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON opportunities BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS}) "
+    f"VALUES ('delete', old.rowid, {_OLD_VALUES}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS}) VALUES (new.rowid, {_NEW_VALUES}); END",
+]
+
+
+class SearchPage(NamedTuple):
+    results: list  # Opportunity rows, best match first
+    total: int
+    page: int
+    per_page: int
+
+
+def _fts5_query(keywords):
+    """Quote each keyword (no FTS5 syntax injection) and match it as a prefix."""
+    return " ".join(f'"{token}"*' for token in _TOKEN_RE.findall(keywords))
+
+
+def _full_text(dialect, keywords):
+    """(FROM clause, match condition or None, rank ordered best-first) for ``keywords``."""
+    opportunities = Opportunity.__table__
+    if dialect == "postgresql":
+        vector = literal_column("opportunities.search_vector")
+        query = func.websearch_to_tsquery("french", keywords)
+        return opportunities, vector.op("@@")(query), func.ts_rank_cd(vector, query).desc()
+    if dialect == "sqlite":
+        # Run the MATCH once into a materialized CTE: joined directly, the
+        # planner may drive from a filter index and re-run MATCH per row.
+        fts = table(FTS_TABLE, column("rowid"))
+        hits = (
+            select(fts.c.rowid, func.bm25(literal_column(FTS_TABLE), *BM25_WEIGHTS).label("rank"))
+            .where(literal_column(FTS_TABLE).op("MATCH")(_fts5_query(keywords)))
+            .cte("fts_hits")
+            .prefix_with("MATERIALIZED")
+        )
+        joined = opportunities.join(hits, hits.c.rowid == literal_column("opportunities.rowid"))
+        return joined, None, hits.c.rank.asc()
+    raise NotImplementedError(f"Full-text search is not supported on {dialect}")
+
+
+def search_opportunities(session, keywords=None, sector=None, opportunity_type=None,
+                         min_amount=None, max_amount=None, deadline_from=None,
+                         deadline_to=None, page=1, per_page=20):
+    """Ranked, paginated search; every argument is optional.
+
+    ``sector`` and ``opportunity_type`` accept a value or a list of values.
+    Without keywords, results are ordered by closest deadline. Returns a
+    ``SearchPage``.
+    """
+    source = Opportunity.__table__
+    conditions = []
+    order_by = []
+    if keywords and _TOKEN_RE.search(keywords):
+        source, match, rank = _full_text(session.get_bind().dialect.name, keywords)
+        if match is not None:
+            conditions.append(match)
+        order_by.append(rank)
+    for col, value in ((Opportunity.sector, sector), (Opportunity.opportunity_type, opportunity_type)):
+        if value is None:
+            continue
+        conditions.append(col.in_(value) if isinstance(value, (list, tuple, set)) else col == value)
+    if min_amount is not None:
+        conditions.append(Opportunity.amount >= min_amount)
+    if max_amount is not None:
+        conditions.append(Opportunity.amount <= max_amount)
+    if deadline_from is not None:
+        conditions.append(Opportunity.deadline >= deadline_from)
+    if deadline_to is not None:
+        conditions.append(Opportunity.deadline <= deadline_to)
+    order_by += [Opportunity.deadline.is_(None), Opportunity.deadline, Opportunity.id]
+
+    total = session.execute(select(func.count()).select_from(source).where(*conditions)).scalar_one()
+    page = max(page, 1)
+    results = session.execute(
+        select(Opportunity).select_from(source).where(*conditions).order_by(*order_by)
+        .limit(per_page).offset((page - 1) * per_page)
+    ).scalars().all()
+    return SearchPage(results, total, page, per_page)
@@ -15,5 +15,7 @@ class OpportunityItem(scrapy.Item):
     sector = scrapy.Field()
     stage = scrapy.Field()
     amount = scrapy.Field()
+    currency = scrapy.Field()   # Code ISO de la devise du montant (XOF, EUR, USD)
     scraped_at = scrapy.Field() # Correspond à la colonne scraped_at en DB
-    updated_at = scrapy.Field() # Correspond à la colonne updated_at en DB
\ No newline at end of file
+    updated_at = scrapy.Field() # Correspond à la colonne updated_at en DB
+    content_hash = scrapy.Field() # Empreinte du contenu normalisé (voir db.compute_content_hash)
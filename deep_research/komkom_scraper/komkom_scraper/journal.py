@@ -0,0 +1,294 @@
+"""
+Weekly personalized journal builder (US003).
+
+    python -m deep_research.komkom_scraper.komkom_scraper.journal \\
+        --profiles users.jsonl --out local_static/journals [--week 2024-05-06] [--workers 4]
+
+``--profiles`` is a JSON-lines file with one entrepreneur per line, as set up
+during onboarding (US002)::
+
+    {"user_id": "u1", "sectors": ["agritech"], "stage": "lancement",
+     "opportunity_types": ["financement"], "language": "fr"}
+
+The week's candidates (open on Monday, updated within ``--max-age-days``,
+one per near-duplicate cluster) are loaded with a single query into a
+column-oriented ``Candidates`` structure, with sector and type postings
+lists. The structure is sent once to each worker process; workers then
+select and render journals for chunks of users without touching the
+database.
+
+Journals are appended to ``<out>/journal-<monday>.jsonl`` as chunks
+complete. A rerun for the same week skips users already written (a
+truncated last line from a crash is dropped), so an interrupted build
+resumes where it stopped.
+"""
+
+import argparse
+import datetime
+import heapq
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from .db.db import Opportunity, get_engine
+
+logger = logging.getLogger(__name__)
+
+MAX_ITEMS = 7  # US003: 5-7 opportunities per edition
+MIN_ITEMS = 5
+MAX_AGE_DAYS = 60
+CHUNK_SIZE = 250
+DESCRIPTION_CHARS = 600
+# Relevance points; urgency adds up to 1 for deadlines within URGENCY_DAYS
+SECTOR_SCORE = 4.0
+TYPE_SCORE = 2.0
+STAGE_SCORE = 1.0
+URGENCY_DAYS = 30
+
+
+def week_start(day=None):
+    """Monday of the week containing ``day`` (today by default)."""
+    day = day or datetime.date.today()
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def _as_set(value):
+    if not value:
+        return frozenset()
+    if isinstance(value, str):
+        value = value.split(",")
+    return frozenset(v.strip().lower() for v in value if v and v.strip())
+
+
+class Candidates:
+    """The week's opportunities as parallel column tuples, plus postings by sector and type."""
+
+    __slots__ = ("week", "ids", "titles", "descriptions", "deadlines", "eligibility", "urls",
+                 "sectors", "types", "stages", "urgency", "by_sector", "by_type", "fallback")
+
+    def __init__(self, week, rows):
+        self.week = week
+        columns = list(zip(*rows)) or [()] * 9
+        (self.ids, self.titles, self.descriptions, self.deadlines, self.eligibility,
+         self.urls, sectors, types, stages) = (tuple(col) for col in columns)
+        self.sectors = tuple((s or "").lower() for s in sectors)
+        self.types = tuple(getattr(t, "value", t) for t in types)
+        self.stages = tuple((s or "").lower() for s in stages)
+        self.urgency = tuple(self._urgency(deadline) for deadline in self.deadlines)
+
+        by_sector, by_type = {}, {}
+        for i, (sector, type_) in enumerate(zip(self.sectors, self.types)):
+            if sector:
+                by_sector.setdefault(sector, []).append(i)
+            by_type.setdefault(type_, []).append(i)
+        self.by_sector = {key: tuple(ids) for key, ids in by_sector.items()}
+        self.by_type = {key: tuple(ids) for key, ids in by_type.items()}
+        # Most urgent first: fills journals of users with few or no matches
+        self.fallback = tuple(heapq.nlargest(MAX_ITEMS * 4, range(len(self.ids)), key=self.urgency.__getitem__))
+
+    def _urgency(self, deadline):
+        if deadline is None:
+            return 0.0
+        days = (deadline - self.week).days
+        return max(0.0, 1.0 - days / URGENCY_DAYS)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, session, week, max_age_days=MAX_AGE_DAYS):
+        """One query: open opportunities updated recently, first row of each cluster."""
+        since = week - datetime.timedelta(days=max_age_days)
+        query = (
+            select(
+                Opportunity.id, Opportunity.title, Opportunity.description, Opportunity.deadline,
+                Opportunity.eligibility_criteria, Opportunity.source_url, Opportunity.sector,
+                Opportunity.opportunity_type, Opportunity.stage, Opportunity.cluster_id,
+            )
+            .where(
+                or_(Opportunity.deadline.is_(None), Opportunity.deadline >= week),
+                Opportunity.updated_at >= since,
+            )
+            .order_by(Opportunity.updated_at.desc(), Opportunity.id)
+            .execution_options(yield_per=2000)
+        )
+        rows, clusters = [], set()
+        for row in session.execute(query):
+            cluster = row.cluster_id or row.id
+            if cluster in clusters:
+                continue
+            clusters.add(cluster)
+            rows.append(tuple(row)[:9])
+        return cls(week, rows)
+
+
+def select_for(candidates, profile, limit=MAX_ITEMS):
+    """Indexes of the best candidates for ``profile``, best first."""
+    sectors = _as_set(profile.get("sectors") or profile.get("sector"))
+    types = _as_set(profile.get("opportunity_types"))
+    stage = (profile.get("stage") or "").lower()
+
+    pool = set()
+    for sector in sectors:
+        pool.update(candidates.by_sector.get(sector, ()))
+    # A sector match outscores any type-only one, so type postings (large)
+    # are only needed when the sector ones cannot fill the journal
+    if len(pool) < limit:
+        for type_ in types:
+            pool.update(candidates.by_type.get(type_, ()))
+
+    def score(i):
+        points = candidates.urgency[i]
+        if candidates.sectors[i] in sectors:
+            points += SECTOR_SCORE
+        if candidates.types[i] in types:
+            points += TYPE_SCORE
+        if stage and candidates.stages[i] == stage:
+            points += STAGE_SCORE
+        return points
+
+    picked = heapq.nlargest(limit, pool, key=lambda i: (score(i), -i))
+    if len(picked) < MIN_ITEMS:
+        chosen = set(picked)
+        picked += [i for i in candidates.fallback if i not in chosen][:MIN_ITEMS - len(picked)]
+    return picked
+
+
+def _excerpt(text, limit=DESCRIPTION_CHARS):
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + "…"
+
+
+def render(candidates, profile, picked):
+    """Journal record for one user: structured entries plus the text edition."""
+    entries = []
+    lines = [f"Komkom News — semaine du {candidates.week:%d/%m/%Y}", ""]
+    for rank, i in enumerate(picked, 1):
+        deadline = candidates.deadlines[i]
+        entry = {
+            "id": candidates.ids[i],
+            "title": candidates.titles[i],
+            "description": _excerpt(candidates.descriptions[i]),
+            "deadline": deadline.isoformat() if deadline else None,
+            "eligibility_criteria": candidates.eligibility[i],
+            "source_url": candidates.urls[i],
+        }
+        entries.append(entry)
+        lines += [
+            f"{rank}. {entry['title']}",
+            entry["description"],
+            f"Date limite : {deadline:%d/%m/%Y}" if deadline else "Date limite : non précisée",
+            f"Éligibilité : {_excerpt(entry['eligibility_criteria']) or 'non précisée'}",
+            entry["source_url"],
+            "",
+        ]
+    return {
+        "user_id": profile["user_id"],
+        "week": candidates.week.isoformat(),
+        "language": profile.get("language") or "fr",
+        "opportunities": entries,
+        "text": "\n".join(lines).rstrip() + "\n",
+    }
+
+
+_worker_candidates = None
+
+
+def _init_worker(candidates):
+    global _worker_candidates
+    _worker_candidates = candidates
+
+
+def _build_chunk(profiles):
+    candidates = _worker_candidates
+    return [render(candidates, p, select_for(candidates, p)) for p in profiles]
+
+
+def load_profiles(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def completed_users(path):
+    """User ids already written to ``path``; drops a truncated last line."""
+    if not os.path.exists(path):
+        return set()
+    done, good_end = set(), 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["user_id"])
+            except (ValueError, KeyError):
+                break
+            good_end += len(line)
+    if good_end != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good_end)
+    return done
+
+
+def _chunks(profiles, size):
+    profiles = iter(profiles)
+    while chunk := list(islice(profiles, size)):
+        yield chunk
+
+
+def build_journals(candidates, profiles, out_dir, workers=None, chunk_size=CHUNK_SIZE):
+    """Write one journal per profile not yet built this week; return the number written."""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"journal-{candidates.week.isoformat()}.jsonl")
+    done = completed_users(path)
+    pending = (p for p in profiles if p["user_id"] not in done)
+    chunks = _chunks(pending, chunk_size)
+    written = 0
+    with open(path, "a", encoding="utf-8") as out:
+        if workers == 1:
+            _init_worker(candidates)
+            results = map(_build_chunk, chunks)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(candidates,))
+            results = executor.map(_build_chunk, chunks)
+        try:
+            for journals in results:
+                out.writelines(json.dumps(j, ensure_ascii=False) + "\n" for j in journals)
+                out.flush()
+                os.fsync(out.fileno())
+                written += len(journals)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+    logger.info("Wrote %d journals to %s (%d already done)", written, path, len(done))
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the weekly personalized journals.")
+    parser.add_argument("--profiles", required=True, help="JSON-lines file of user profiles")
+    parser.add_argument("--out", default="local_static/journals", help="output directory")
+    parser.add_argument("--week", type=datetime.date.fromisoformat, default=None,
+                        help="any day of the week to build (default: this week)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-age-days", type=int, default=MAX_AGE_DAYS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    week = week_start(args.week)
+    with Session(get_engine()) as session:
+        candidates = Candidates.load(session, week, args.max_age_days)
+    logger.info("Loaded %d candidate opportunities for the week of %s", len(candidates), week)
+    written = build_journals(candidates, load_profiles(args.profiles), args.out, args.workers)
+    print(f"Built {written} journals for the week of {week}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+Crawl instrumentation: per-source latency and throughput metrics.
+
+``MetricsRegistry`` holds thread-safe counters and histograms labelled by
+spider and source, and writes them as a Prometheus textfile (for the
+node_exporter textfile collector) plus a JSON run summary. Both files are
+replaced atomically, periodically during the run and once at the end.
+
+In Scrapy, ``CrawlMetrics`` (extension) fills it from signals:
+
+- ``komkom_request_latency_seconds``: download latency per source
+- ``komkom_response_bytes_total``, ``komkom_responses_total`` (by status)
+- ``komkom_items_total`` and, in the summary, items/sec per source
+- ``komkom_parse_cpu_seconds``: CPU time spent in parse callbacks, measured
+  by ``ParseTimeMiddleware`` (spider middleware) around each step of the
+  callback's output
+- ``komkom_upsert_latency_seconds``: DB write latency, sent by the upsert
+  pipelines through the ``upsert_timed`` signal
+- ``komkom_items_dropped_total``, ``komkom_errors_total`` (by kind)
+
+The source of a request is the ``id`` of its ``sources.yaml`` entry
+(``meta["source"]``), else the spider name; items take the source of the
+response they came from. ``source_id`` is never a label: Wekomkom stores a
+URL there, which would make one series per page.
+``google_search_scraper.py`` uses the registry directly.
+
+Settings:
+- METRICS_ENABLED (default False)
+- METRICS_TEXTFILE (default "metrics/%(spider)s.prom")
+- METRICS_SUMMARY (default "metrics/%(spider)s.json")
+- METRICS_INTERVAL (default 60): seconds between intermediate writes, 0 to disable
+"""
+
+import bisect
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "komkom_"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CPU_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+HELP = {
+    "request_latency_seconds": "Download latency of responses.",
+    "response_bytes_total": "Bytes of response bodies downloaded.",
+    "responses_total": "Responses received, by HTTP status.",
+    "items_total": "Items scraped.",
+    "items_per_second": "Items scraped per second of run time.",
+    "parse_cpu_seconds": "CPU time of parse callbacks per response.",
+    "upsert_latency_seconds": "Latency of database upsert batches.",
+    "upsert_rows_total": "Rows sent to the database.",
+    "items_dropped_total": "Items dropped by a pipeline.",
+    "errors_total": "Errors, by kind.",
+    "cache_hits_total": "Result pages served from the search cache.",
+    "browser_restarts_total": "Headless browsers restarted after a block.",
+}
+
+# Sent by the upsert pipelines: send_catch_log(upsert_timed, seconds=..., rows=..., spider=...)
+upsert_timed = object()
+# Sent by ParseTimeMiddleware: send_catch_log(parse_timed, seconds=..., response=..., spider=...)
+parse_timed = object()
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "max")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile (``max`` past the last bound)."""
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _prom_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _label_key(labels):
+    return ",".join(f"{k}={v}" for k, v in labels) or "all"
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class MetricsRegistry:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self.lock = threading.Lock()
+        self.counters = {}  # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> Histogram
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _labels(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _labels(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def _rates(self, elapsed):
+        """items_per_second gauges derived from items_total."""
+        return {
+            labels: value / elapsed
+            for (name, labels), value in self.counters.items()
+            if name == "items_total" and elapsed > 0
+        }
+
+    def render_prometheus(self):
+        with self.lock:
+            elapsed = self.clock() - self.started
+            families = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                families.setdefault((name, "counter"), []).append(f"{PREFIX}{name}{_prom_labels(labels)} {value:g}")
+            for labels, rate in sorted(self._rates(elapsed).items()):
+                families.setdefault(("items_per_second", "gauge"), []).append(
+                    f"{PREFIX}items_per_second{_prom_labels(labels)} {rate:.6g}")
+            for (name, labels), hist in sorted(self.histograms.items(), key=lambda entry: entry[0]):
+                lines = families.setdefault((name, "histogram"), [])
+                cumulative = 0
+                for bound, count in zip(hist.buckets + (float("inf"),), hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{PREFIX}{name}_bucket{_prom_labels(labels, [('le', le)])} {cumulative}")
+                lines.append(f"{PREFIX}{name}_sum{_prom_labels(labels)} {hist.sum:.6g}")
+                lines.append(f"{PREFIX}{name}_count{_prom_labels(labels)} {hist.count}")
+        out = []
+        for (name, kind), lines in sorted(families.items()):
+            out += [f"# HELP {PREFIX}{name} {HELP.get(name, name)}", f"# TYPE {PREFIX}{name} {kind}"]
+            out += lines
+        return "\n".join(out) + "\n"
+
+    def summary(self):
+        with self.lock:
+            elapsed = self.clock() - self.started
+            counters = {}
+            for (name, labels), value in sorted(self.counters.items()):
+                counters.setdefault(name, {})[_label_key(labels)] = value
+            rates = {_label_key(labels): round(rate, 3) for labels, rate in sorted(self._rates(elapsed).items())}
+            if rates:
+                counters["items_per_second"] = rates
+            histograms = {}
+            for (name, labels), hist in sorted(self.histograms.items(), key=lambda entry: entry[0]):
+                histograms.setdefault(name, {})[_label_key(labels)] = {
+                    "count": hist.count,
+                    "sum": round(hist.sum, 6),
+                    "mean": round(hist.sum / hist.count, 6) if hist.count else None,
+                    "p50": hist.quantile(0.5),
+                    "p95": hist.quantile(0.95),
+                    "max": round(hist.max, 6),
+                }
+        return {
+            "started_at": self.started_at.isoformat(),
+            "elapsed_seconds": round(elapsed, 3),
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def write(self, textfile=None, summary=None):
+        if textfile:
+            _write_atomic(textfile, self.render_prometheus())
+        if summary:
+            _write_atomic(summary, json.dumps(self.summary(), indent=2, ensure_ascii=False) + "\n")
+
+
+def source_of(request, spider):
+    """Bounded ``source`` label of ``request`` (may be None): its sources.yaml id, else the spider name."""
+    source = request.meta.get("source") if request is not None else None
+    if isinstance(source, dict) and source.get("id"):
+        return source["id"]
+    return spider.name
+
+
+def _request(response):
+    return getattr(response, "request", None)
+
+
+class CrawlMetrics:
+    """Scrapy extension recording per-spider, per-source metrics (see module docstring)."""
+
+    def __init__(self, crawler, textfile, summary, interval):
+        self.crawler = crawler
+        self.textfile = textfile
+        self.summary = summary
+        self.interval = interval
+        self.registry = MetricsRegistry()
+        self.task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("METRICS_ENABLED"):
+            raise NotConfigured
+        ext = cls(
+            crawler,
+            textfile=settings.get("METRICS_TEXTFILE", "metrics/%(spider)s.prom"),
+            summary=settings.get("METRICS_SUMMARY", "metrics/%(spider)s.json"),
+            interval=settings.getfloat("METRICS_INTERVAL", 60.0),
+        )
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(ext.response_received, signal=signals.response_received)
+        crawler.signals.connect(ext.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(ext.item_dropped, signal=signals.item_dropped)
+        crawler.signals.connect(ext.item_error, signal=signals.item_error)
+        crawler.signals.connect(ext.spider_error, signal=signals.spider_error)
+        crawler.signals.connect(ext.parse_timed, signal=parse_timed)
+        crawler.signals.connect(ext.upsert_timed, signal=upsert_timed)
+        return ext
+
+    def paths(self, spider):
+        return (
+            self.textfile % {"spider": spider.name} if self.textfile else None,
+            self.summary % {"spider": spider.name} if self.summary else None,
+        )
+
+    def spider_opened(self, spider):
+        if self.interval > 0:
+            from twisted.internet import task
+
+            self.task = task.LoopingCall(self.write, spider)
+            self.task.start(self.interval, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.task is not None and self.task.running:
+            self.task.stop()
+        stats = self.crawler.stats
+        for kind in ("exception_count", "response_status_count/429"):
+            value = stats.get_value(f"downloader/{kind}") if stats is not None else None
+            if value:
+                self.registry.inc("errors_total", value, spider=spider.name, kind=f"downloader/{kind}")
+        self.write(spider)
+        logger.info("Crawl metrics written to %s", ", ".join(p for p in self.paths(spider) if p))
+
+    def write(self, spider):
+        try:
+            self.registry.write(*self.paths(spider))
+        except OSError as exc:
+            logger.warning("Could not write crawl metrics: %s", exc)
+
+    def response_received(self, response, request, spider):
+        labels = {"spider": spider.name, "source": source_of(request, spider)}
+        latency = request.meta.get("download_latency")
+        if latency is not None:
+            self.registry.observe("request_latency_seconds", latency, **labels)
+        self.registry.inc("response_bytes_total", len(response.body), **labels)
+        self.registry.inc("responses_total", status=response.status, **labels)
+
+    def item_scraped(self, item, response, spider):
+        self.registry.inc("items_total", spider=spider.name, source=source_of(_request(response), spider))
+
+    def item_dropped(self, item, response, exception, spider):
+        self.registry.inc("items_dropped_total", spider=spider.name, source=source_of(_request(response), spider))
+
+    def item_error(self, item, response, spider, failure):
+        self.registry.inc("errors_total", spider=spider.name, kind="pipeline")
+
+    def spider_error(self, failure, response, spider):
+        source = source_of(_request(response), spider)
+        self.registry.inc("errors_total", spider=spider.name, source=source, kind="callback")
+
+    def parse_timed(self, seconds, response, spider):
+        source = source_of(_request(response), spider)
+        self.registry.observe("parse_cpu_seconds", seconds, buckets=CPU_BUCKETS, spider=spider.name, source=source)
+
+    def upsert_timed(self, seconds, rows, spider):
+        name = spider.name if spider is not None else "unknown"
+        self.registry.observe("upsert_latency_seconds", seconds, spider=name)
+        self.registry.inc("upsert_rows_total", rows, spider=name)
+
+
+class ParseTimeMiddleware:
+    """Spider middleware timing the CPU spent inside parse callbacks.
+
+    The callback runs lazily while its output is iterated, so the thread CPU
+    time of each ``next()`` is summed, excluding what later middlewares do
+    with the items in between. Sends ``parse_timed`` once per response.
+    """
+
+    def __init__(self, crawler):
+        self.signals = crawler.signals
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("METRICS_ENABLED"):
+            raise NotConfigured
+        return cls(crawler)
+
+    def process_spider_output(self, response, result, spider):
+        spent = 0.0
+        iterator = iter(result)
+        while True:
+            started = time.thread_time()
+            try:
+                value = next(iterator)
+            except StopIteration:
+                spent += time.thread_time() - started
+                break
+            spent += time.thread_time() - started
+            yield value
+        self.signals.send_catch_log(parse_timed, seconds=spent, response=response, spider=spider)
+
+    async def process_spider_output_async(self, response, result, spider):
+        spent = 0.0
+        iterator = result.__aiter__()
+        while True:
+            started = time.thread_time()
+            try:
+                value = await iterator.__anext__()
+            except StopAsyncIteration:
+                spent += time.thread_time() - started
+                break
+            spent += time.thread_time() - started
+            yield value
+        self.signals.send_catch_log(parse_timed, seconds=spent, response=response, spider=spider)
@@ -1,31 +1,45 @@
-import hashlib
 import logging
 import datetime
+import time
 from sqlalchemy.orm import sessionmaker
+from twisted.internet import defer, task, threads
+from twisted.python.threadpool import ThreadPool
 
 # DB helpers are now located inside the Scrapy package
 from komkom_scraper.db.db import (
     get_engine,
-    create_tables,
     upsert_opportunity,
+    bulk_upsert_opportunities,
+    compute_content_hash,
 )
+from komkom_scraper.alerts import opportunities_inserted
+from komkom_scraper.db.migrations import check_schema
+from komkom_scraper.metrics import upsert_timed
+from komkom_scraper.profiling import profiled, profiler_for
+from komkom_scraper.utils.urls import opportunity_id
 
 logger = logging.getLogger(__name__)
 
 
+class UpsertFailedError(RuntimeError):
+    """Raised at spider close when some batches could not be written, even after retries."""
+
+
 class PostgresUpsertPipeline:
     """Scrapy pipeline that performs an upsert of each scraped opportunity into Postgres."""
 
-    def __init__(self):
+    def __init__(self, profiler=None):
+        self.profiler = profiler
         # Lazily build engine/session factory once per spider run
         self.engine = get_engine()
-        create_tables(self.engine)
+        # Cheap version check; the schema itself is managed by `make migrate`
+        check_schema(self.engine)
         self.Session = sessionmaker(bind=self.engine, future=True)
 
     @classmethod
     def from_crawler(cls, crawler):
-        # Scrapy instantiation hook ➜ no settings needed for now
-        return cls()
+        # Scrapy instantiation hook ➜ only the opt-in profiler is configurable
+        return cls(profiler=profiler_for(crawler))
 
     def open_spider(self, spider):
         # Create a DB session at spider startup
@@ -36,14 +50,16 @@ class PostgresUpsertPipeline:
         self.session.close()
 
     def process_item(self, item, spider):
-        # Generate a deterministic ID from the source_url so duplicates collapse
-        item["id"] = hashlib.sha256(item["source_url"].encode()).hexdigest()
+        # Deterministic ID from the canonical URL, so tracking params, http/https, www. etc.
+        # collapse; source_url keeps the fetched URL for display
+        item["id"] = opportunity_id(item["source_url"])
         now = datetime.datetime.utcnow()
         item["scraped_at"] = now
         item["updated_at"] = now
+        item["content_hash"] = compute_content_hash(item)
 
         try:
-            upsert_opportunity(self.session, item)
+            profiled(self.profiler, upsert_opportunity, self.session, item)
         except Exception as exc:
             logger.error(
                 "DB upsert failed for %s: %s", item.get("source_url", "<unknown>"), exc
@@ -51,4 +67,245 @@ class PostgresUpsertPipeline:
             # Re-raise so Scrapy knows something went wrong and can handle/retry as configured
             raise
 
-        return item
\ No newline at end of file
+        return item
+
+
+class BatchedUpsertPipeline(PostgresUpsertPipeline):
+    """Buffer items and write them with one multi-row INSERT ... ON CONFLICT.
+
+    The buffer is flushed when it holds ``UPSERT_BATCH_SIZE`` items, every
+    ``UPSERT_FLUSH_INTERVAL`` seconds (a ``LoopingCall``, so items are written
+    even while no new ones arrive), and in ``close_spider``. Throughput (rows/sec spent in the database) and the
+    number of new, changed and unchanged rows are logged at close and
+    recorded in the crawler stats; each batch's latency is sent as the
+    ``upsert_timed`` signal for the crawl metrics, and the items whose rows
+    it inserted as ``opportunities_inserted`` for alert matching.
+    """
+
+    clock = None  # reactor by default; tests use task.Clock
+
+    def __init__(self, batch_size=500, flush_interval=5.0, stats=None, signals=None, profiler=None):
+        super().__init__(profiler)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = stats
+        self.signals = signals
+        self.buffer = []
+        self.rows_written = 0
+        self.write_seconds = 0.0
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            batch_size=crawler.settings.getint("UPSERT_BATCH_SIZE", 500),
+            flush_interval=crawler.settings.getfloat("UPSERT_FLUSH_INTERVAL", 5.0),
+            stats=crawler.stats,
+            signals=crawler.signals,
+            profiler=profiler_for(crawler),
+        )
+
+    def open_spider(self, spider):
+        super().open_spider(spider)
+        self.start_flush_loop(spider)
+
+    def start_flush_loop(self, spider):
+        self.spider = spider
+        self.flush_loop = None
+        if self.flush_interval > 0:
+            self.flush_loop = task.LoopingCall(self.flush_on_timer)
+            if self.clock is not None:
+                self.flush_loop.clock = self.clock
+            self.flush_loop.start(self.flush_interval, now=False)
+
+    def stop_flush_loop(self):
+        if self.flush_loop is not None and self.flush_loop.running:
+            self.flush_loop.stop()
+
+    def flush_on_timer(self):
+        try:
+            return self.flush()
+        except Exception:
+            # Already logged by write_batch; keep the timer running
+            return None
+
+    def close_spider(self, spider):
+        self.stop_flush_loop()
+        try:
+            self.flush()
+        finally:
+            self.log_throughput()
+            super().close_spider(spider)
+
+    def process_item(self, item, spider):
+        if profiled(self.profiler, self.buffer_item, item):
+            self.flush()
+        return item
+
+    def buffer_item(self, item):
+        """Stamp and buffer ``item``; return True when a flush is due."""
+        item["id"] = opportunity_id(item["source_url"])
+        now = datetime.datetime.utcnow()
+        item["scraped_at"] = now
+        item["updated_at"] = now
+        item["content_hash"] = compute_content_hash(item)
+        self.buffer.append(dict(item))
+        return len(self.buffer) >= self.batch_size
+
+    def take_batch(self):
+        batch, self.buffer = self.buffer, []
+        return batch
+
+    def flush(self):
+        batch = self.take_batch()
+        if batch:
+            self.record_write(batch, *self.write_batch(self.session, batch))
+
+    def write_batch(self, session, batch):
+        """Upsert ``batch`` through ``session``; return (counts, seconds)."""
+        started = time.perf_counter()
+        try:
+            counts = profiled(self.profiler, bulk_upsert_opportunities, session, batch)
+        except Exception as exc:
+            session.rollback()
+            logger.error("Batched DB upsert of %d items failed: %s", len(batch), exc)
+            raise
+        return counts, time.perf_counter() - started
+
+    def record_write(self, batch, counts, seconds):
+        self.write_seconds += seconds
+        self.rows_written += sum(counts.values())
+        for status, count in counts.items():
+            self.counts[status] += count
+        if self.stats is not None:
+            for status, count in counts.items():
+                self.stats.inc_value(f"upsert/{status}", count)
+            self.stats.inc_value("upsert/batches")
+        if self.signals is not None:
+            self.signals.send_catch_log(upsert_timed, seconds=seconds, rows=sum(counts.values()),
+                                        spider=self.spider)
+            if counts.inserted:
+                inserted = set(counts.inserted)
+                self.signals.send_catch_log(opportunities_inserted, spider=self.spider,
+                                            items=[row for row in batch if row["id"] in inserted])
+
+    def log_throughput(self):
+        rate = self.rows_written / self.write_seconds if self.write_seconds else 0.0
+        logger.info(
+            "Batched upsert processed %d rows in %.2fs (%.1f rows/sec): "
+            "%d new, %d changed, %d unchanged",
+            self.rows_written, self.write_seconds, rate,
+            self.counts["new"], self.counts["changed"], self.counts["unchanged"],
+        )
+        if self.stats is not None:
+            self.stats.set_value("upsert/rows_per_sec", round(rate, 1))
+
+
+class ThreadedUpsertPipeline(BatchedUpsertPipeline):
+    """Batched upserts executed on a worker thread pool, off the reactor thread.
+
+    Each flush is handed to a bounded ``ThreadPool`` (``UPSERT_THREADS``
+    workers) with its own session, so downloads and parsing continue while
+    Postgres commits. At most ``UPSERT_MAX_PENDING`` batches may be in flight;
+    past that, ``process_item`` returns a Deferred that only fires once a
+    write completes, which makes Scrapy stop feeding new items (backpressure).
+    ``close_spider`` flushes the buffer and waits for every pending write.
+
+    A failed batch is retried ``UPSERT_RETRIES`` times on its worker, after
+    ``UPSERT_RETRY_DELAY`` seconds doubling each time. Its items were already
+    handed back to Scrapy, so a batch that still fails is counted in
+    ``upsert/failed_rows`` and ``close_spider`` fails with
+    ``UpsertFailedError``, which Scrapy logs as an error.
+    """
+
+    def __init__(self, batch_size=500, flush_interval=5.0, stats=None,
+                 threads=2, max_pending=4, signals=None, profiler=None,
+                 retries=2, retry_delay=1.0):
+        super().__init__(batch_size, flush_interval, stats, signals, profiler)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.failed_rows = 0
+        self.threadpool = ThreadPool(minthreads=1, maxthreads=threads, name="upsert")
+        self.semaphore = defer.DeferredSemaphore(max_pending)
+        self.pending = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            batch_size=crawler.settings.getint("UPSERT_BATCH_SIZE", 500),
+            flush_interval=crawler.settings.getfloat("UPSERT_FLUSH_INTERVAL", 5.0),
+            stats=crawler.stats,
+            threads=crawler.settings.getint("UPSERT_THREADS", 2),
+            max_pending=crawler.settings.getint("UPSERT_MAX_PENDING", 4),
+            signals=crawler.signals,
+            profiler=profiler_for(crawler),
+            retries=crawler.settings.getint("UPSERT_RETRIES", 2),
+            retry_delay=crawler.settings.getfloat("UPSERT_RETRY_DELAY", 1.0),
+        )
+
+    def open_spider(self, spider):
+        # Writes open their own sessions on the workers
+        self.start_flush_loop(spider)
+        self.threadpool.start()
+
+    def close_spider(self, spider):
+        self.stop_flush_loop()
+        d = self.flush()
+        d.addCallback(lambda _: defer.DeferredList(list(self.pending)))
+        d.addBoth(self._shutdown, spider)
+        return d
+
+    def process_item(self, item, spider):
+        if profiled(self.profiler, self.buffer_item, item):
+            return self.flush().addCallback(lambda _: item)
+        return item
+
+    def flush(self):
+        batch = self.take_batch()
+        if not batch:
+            return defer.succeed(None)
+        acquired = self.semaphore.acquire()
+        acquired.addCallback(self._dispatch, batch)
+        return acquired
+
+    def _dispatch(self, _, batch):
+        from twisted.internet import reactor
+
+        d = threads.deferToThreadPool(reactor, self.threadpool, self._write_in_thread, batch)
+        d.addCallback(lambda result: self.record_write(batch, *result))
+        d.addErrback(self._write_failed, batch)
+
+        def done(result):
+            self.pending.discard(d)
+            self.semaphore.release()
+            return result
+
+        d.addBoth(done)
+        self.pending.add(d)
+
+    def _write_in_thread(self, batch):
+        for attempt in range(self.retries + 1):
+            try:
+                with self.Session() as session:
+                    return self.write_batch(session, batch)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                delay = self.retry_delay * 2 ** attempt
+                logger.warning("Retrying upsert of %d items in %.1fs (retry %d/%d)",
+                               len(batch), delay, attempt + 1, self.retries)
+                time.sleep(delay)
+
+    def _write_failed(self, failure, batch):
+        # Items were already handed back to Scrapy; count the loss, fail at close
+        self.failed_rows += len(batch)
+        if self.stats is not None:
+            self.stats.inc_value("upsert/failed_rows", len(batch))
+        logger.error("Threaded upsert dropped %d items: %s", len(batch), failure.getErrorMessage())
+
+    def _shutdown(self, result, spider):
+        self.threadpool.stop()
+        self.log_throughput()
+        if self.failed_rows:
+            raise UpsertFailedError(f"{self.failed_rows} items could not be written to the database")
+        return result
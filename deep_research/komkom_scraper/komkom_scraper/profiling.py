@@ -0,0 +1,250 @@
+"""
+Opt-in sampling profiler for spider callbacks and the upsert pipelines.
+
+With ``PROFILING_ENABLED``, a fraction (``PROFILING_SAMPLE_RATE``) of the
+invocations runs under cProfile:
+
+- spider callbacks (``parse_list``, ``parse_opportunity`` and the parsers
+  they call), through ``ProfilingMiddleware`` (spider middleware);
+- the upsert pipelines' item stamping and database writes
+  (``upsert_opportunity``, ``bulk_upsert_opportunities``), through
+  ``profiled``.
+
+Samples from the whole crawl are merged by function and written at
+``spider_closed`` next to ``PROFILING_OUTPUT``:
+
+- ``<output>.pstats``: ``python -m pstats`` or snakeviz
+- ``<output>.collapsed``: one ``frame;frame;... microseconds`` line per
+  stack for flamegraph.pl or speedscope. cProfile only keeps caller/callee
+  pairs, so a function's time is split across its callers' stacks in
+  proportion, as gprof2dot and flameprof do.
+
+Disabled (the default), the middleware raises NotConfigured and the
+pipelines hold ``None`` instead of a profiler: the only cost left is one
+``if`` per call, so both can stay installed in production.
+
+Only one sample runs at a time (cProfile profiles a single thread, and
+Python 3.12+ allows one active profiler): a call, or a callback step, that
+starts while another one is being profiled runs unprofiled.
+
+Settings:
+- PROFILING_ENABLED (default False)
+- PROFILING_SAMPLE_RATE (default 0.05)
+- PROFILING_OUTPUT (default "profiles/%(spider)s")
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import weakref
+from collections import Counter, defaultdict
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+logger = logging.getLogger(__name__)
+
+TOP_FUNCTIONS = 20
+_MAX_DEPTH = 64
+_profilers = weakref.WeakKeyDictionary()  # crawler -> SamplingProfiler
+
+
+class SamplingProfiler:
+    def __init__(self, rate, output=None):
+        self.rate = rate
+        self.output = output
+        self.random = random.random
+        self.lock = threading.Lock()  # held while a sample runs
+        self.merge_lock = threading.Lock()  # guards the counters and stats
+        self.stats = None
+        self.calls = Counter()  # label -> invocations seen
+        self.samples = Counter()  # label -> invocations profiled
+
+    def _sampled(self, label):
+        # Pipeline calls come from the upsert worker threads too
+        with self.merge_lock:
+            self.calls[label] += 1
+        return self.random() < self.rate
+
+    def _merge(self, label, profile):
+        with self.merge_lock:
+            self.samples[label] += 1
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+
+    def call(self, fn, *args, **kwargs):
+        """``fn(*args, **kwargs)``, profiled when sampled."""
+        label = f"pipeline {fn.__name__}"
+        if not self._sampled(label) or not self.lock.acquire(blocking=False):
+            return fn(*args, **kwargs)
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(fn, *args, **kwargs)
+        finally:
+            self.lock.release()
+            self._merge(label, profile)
+
+    def iterate(self, label, iterable):
+        """Yield from ``iterable``, profiling each step when sampled.
+
+        Generator callbacks run while their output is iterated; the time
+        other middlewares and pipelines spend between steps is left out.
+        """
+        if not self._sampled(label):
+            yield from iterable
+            return
+        profile = cProfile.Profile()
+        steps = 0
+        iterator = iter(iterable)
+        try:
+            while True:
+                locked = self.lock.acquire(blocking=False)
+                if locked:
+                    profile.enable()
+                try:
+                    value = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    if locked:
+                        profile.disable()
+                        self.lock.release()
+                        steps += 1
+                yield value
+        finally:
+            if steps:
+                self._merge(label, profile)
+
+    def collapsed(self):
+        """Collapsed stack lines (``a;b;c microseconds``) from the merged stats."""
+        if self.stats is None:
+            return []
+        entries = self.stats.stats
+        children = defaultdict(list)
+        roots = []
+        for func, (_, _, _, _, callers) in entries.items():
+            if _is_profiler(func):
+                continue
+            if not callers:
+                roots.append(func)
+            for caller, edge in callers.items():
+                children[caller].append((func, edge[3]))
+        totals = Counter()
+
+        def walk(func, path, seconds):
+            _, _, tt, ct, _ = entries[func]
+            path = path + (_frame(func),)
+            if ct <= 0:
+                return
+            totals[";".join(path)] += seconds * tt / ct
+            if len(path) >= _MAX_DEPTH:
+                return
+            for child, edge_ct in children.get(func, ()):
+                share = seconds * edge_ct / ct
+                if _frame(child) not in path and share >= 1e-6:
+                    walk(child, path, share)
+
+        for root in roots:
+            if root[0] == "~" and root in children:
+                # The next() stepping a sampled callback: start at the callback
+                for child, edge_ct in children[root]:
+                    walk(child, (), edge_ct)
+            else:
+                walk(root, (), entries[root][3])
+        return [f"{stack} {round(seconds * 1e6)}" for stack, seconds in sorted(totals.items())
+                if seconds >= 5e-7]
+
+    def write(self, output):
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.stats.dump_stats(f"{output}.pstats")
+        with open(f"{output}.collapsed", "w", encoding="utf-8") as f:
+            f.writelines(line + "\n" for line in self.collapsed())
+
+    def report(self, limit=TOP_FUNCTIONS):
+        out = io.StringIO()
+        self.stats.stream = out
+        self.stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return out.getvalue()
+
+    def spider_closed(self, spider, reason):
+        sampled = ", ".join(f"{label} {self.samples[label]}/{count}" for label, count in sorted(self.calls.items()))
+        if self.stats is None:
+            logger.info("Profiler: no invocation sampled (%s)", sampled or "none seen")
+            return
+        logger.info("Profiler samples: %s\n%s", sampled, self.report())
+        if self.output:
+            output = self.output % {"spider": spider.name}
+            try:
+                self.write(output)
+            except OSError as exc:
+                logger.warning("Could not write profile: %s", exc)
+                return
+            logger.info("Profile written to %s.pstats and %s.collapsed", output, output)
+
+
+def _frame(func):
+    filename, line, name = func
+    if filename == "~":  # built-in
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def _is_profiler(func):
+    return "_lsprof.Profiler" in func[2]
+
+
+def profiler_for(crawler):
+    """The crawl's shared ``SamplingProfiler``, or None unless PROFILING_ENABLED."""
+    settings = crawler.settings
+    if not settings.getbool("PROFILING_ENABLED"):
+        return None
+    profiler = _profilers.get(crawler)
+    if profiler is None:
+        profiler = _profilers[crawler] = SamplingProfiler(
+            rate=settings.getfloat("PROFILING_SAMPLE_RATE", 0.05),
+            output=settings.get("PROFILING_OUTPUT", "profiles/%(spider)s"),
+        )
+        crawler.signals.connect(profiler.spider_closed, signal=signals.spider_closed)
+    return profiler
+
+
+def profiled(profiler, fn, *args, **kwargs):
+    """``fn(*args, **kwargs)``, sampled by ``profiler`` when there is one."""
+    if profiler is None:
+        return fn(*args, **kwargs)
+    return profiler.call(fn, *args, **kwargs)
+
+
+class ProfilingMiddleware:
+    """Spider middleware sampling callbacks into the crawl's profiler."""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        profiler = profiler_for(crawler)
+        if profiler is None:
+            raise NotConfigured
+        return cls(profiler)
+
+    def process_spider_output(self, response, result, spider):
+        return self.profiler.iterate(f"callback {_callback_name(response, spider)}", result)
+
+    async def process_spider_output_async(self, response, result, spider):
+        # Async callbacks are not sampled
+        async for value in result:
+            yield value
+
+
+def _callback_name(response, spider):
+    callback = response.request.callback if response.request is not None else None
+    return getattr(callback, "__name__", None) or "parse"
@@ -0,0 +1,228 @@
+"""
+Vectorized relevance ranking from preferences (US002) and feedback (US011).
+
+``FeatureMatrix`` stacks the stored ``Opportunity.features`` vectors (see
+``utils.features``) into one float32 NumPy array, loaded with a single
+query; long-lived processes keep it current with ``upsert``/``remove``
+instead of reloading. Deadline proximity is derived from the deadlines
+column when scoring, since it changes every day; opportunities whose
+deadline has passed are never ranked. Vectors encoded with another
+``FEATURES_VERSION`` are refused (``StaleFeaturesError``).
+
+A user is a weight vector over the same layout plus the proximity columns.
+``profile_weights`` seeds it from the onboarding preferences and
+``record_feedback`` nudges it with one logistic-regression step per
+thumbs up/down, persisted in ``user_weights`` with the features version;
+weights learned on another layout are dropped for the profile's.
+
+``FeatureMatrix.top_k(weights, k)`` scores every candidate for a batch of
+users with one matrix product per block of users and keeps the k best per
+user with ``argpartition``, so no Python loop runs over candidates.
+"""
+
+import datetime
+
+import numpy as np
+from sqlalchemy import select
+
+from .db.db import Opportunity, OpportunityFeedback, UserWeights, _insert_for
+from .utils import features
+
+WEIGHTS_DIM = features.DIM + features.PROXIMITY_DIM
+# Prior weights from preferences, on the scale of the journal's scores
+SECTOR_WEIGHT = 4.0
+TYPE_WEIGHT = 2.0
+STAGE_WEIGHT = 1.0
+PROXIMITY_WEIGHTS = (0.0, 1.0, 0.5, 0.0)  # no deadline, 0-7 days, 8-30 days, later
+LEARNING_RATE = 0.5
+NO_DEADLINE = -1
+
+
+class FeatureMatrix:
+    """Opportunity feature vectors as rows of a float32 array, addressable by id."""
+
+    def __init__(self, capacity=1024):
+        self.ids = []
+        self.index = {}
+        self.data = np.zeros((capacity, features.DIM), dtype=np.float32)
+        self.deadlines = np.full(capacity, NO_DEADLINE, dtype=np.int64)  # date ordinals
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, session, *conditions):
+        """All opportunities with stored features (filtered by ``conditions``), in one query."""
+        rows = session.execute(
+            select(Opportunity.id, Opportunity.features, Opportunity.deadline)
+            .where(Opportunity.features.is_not(None), *conditions)
+            .execution_options(yield_per=5000)
+        ).all()
+        matrix = cls(capacity=max(len(rows), 1))
+        matrix.upsert(rows)
+        return matrix
+
+    def _grow(self, size):
+        capacity = len(self.data)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        data = np.zeros((capacity, features.DIM), dtype=np.float32)
+        data[:len(self.ids)] = self.data[:len(self.ids)]
+        deadlines = np.full(capacity, NO_DEADLINE, dtype=np.int64)
+        deadlines[:len(self.ids)] = self.deadlines[:len(self.ids)]
+        self.data, self.deadlines = data, deadlines
+
+    def upsert(self, rows):
+        """Add or replace (id, packed features, deadline) rows."""
+        rows = [row for row in rows if row[1]]
+        self._grow(len(self.ids) + len(rows))
+        for row_id, blob, deadline in rows:
+            position = self.index.get(row_id)
+            if position is None:
+                position = self.index[row_id] = len(self.ids)
+                self.ids.append(row_id)
+            self.data[position] = np.frombuffer(features.payload(blob), dtype=np.float32)
+            self.deadlines[position] = deadline.toordinal() if deadline else NO_DEADLINE
+
+    def remove(self, ids):
+        """Drop rows by id; the last row moves into each freed slot."""
+        for row_id in ids:
+            position = self.index.pop(row_id, None)
+            if position is None:
+                continue
+            last = len(self.ids) - 1
+            if position != last:
+                moved = self.ids[last]
+                self.ids[position] = moved
+                self.index[moved] = position
+                self.data[position] = self.data[last]
+                self.deadlines[position] = self.deadlines[last]
+            self.ids.pop()
+
+    def expired(self, today=None):
+        """Boolean mask of the rows whose deadline is before ``today``."""
+        today = (today or datetime.date.today()).toordinal()
+        deadlines = self.deadlines[:len(self.ids)]
+        return (deadlines != NO_DEADLINE) & (deadlines < today)
+
+    def proximity(self, today=None):
+        """One-hot deadline proximity of every row, shape (n, PROXIMITY_DIM); expired rows are all zero."""
+        today = (today or datetime.date.today()).toordinal()
+        deadlines = self.deadlines[:len(self.ids)]
+        days = deadlines - today
+        columns = [deadlines == NO_DEADLINE]
+        lower = -1
+        for limit in features.PROXIMITY_DAYS:
+            columns.append((deadlines != NO_DEADLINE) & (days > lower) & (days <= limit))
+            lower = limit
+        columns.append((deadlines != NO_DEADLINE) & (days > lower))
+        return np.stack(columns, axis=1).astype(np.float32)
+
+    def top_k(self, weights, k=7, today=None, batch_size=1024):
+        """Best ``k`` rows per user for a (users, WEIGHTS_DIM) weight array.
+
+        Rows whose deadline has passed are never returned. Returns (indices,
+        scores), both (users, k') with k' = min(k, open rows), best first;
+        map indices to ids with ``self.ids``.
+        """
+        weights = np.asarray(weights, dtype=np.float32).reshape(-1, WEIGHTS_DIM)
+        n = len(self.ids)
+        expired = self.expired(today)
+        k = min(k, n - int(expired.sum()))
+        indices = np.empty((len(weights), k), dtype=np.int64)
+        scores = np.empty((len(weights), k), dtype=np.float32)
+        if k == 0:
+            return indices, scores
+        data = self.data[:n]
+        proximity = self.proximity(today)
+        for start in range(0, len(weights), batch_size):
+            block = weights[start:start + batch_size]
+            block_scores = block[:, :features.DIM] @ data.T + block[:, features.DIM:] @ proximity.T
+            block_scores[:, expired] = -np.inf
+            top = np.argpartition(-block_scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(block_scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            indices[start:start + len(block)] = np.take_along_axis(top, order, axis=1)
+            scores[start:start + len(block)] = np.take_along_axis(top_scores, order, axis=1)
+        return indices, scores
+
+
+def _as_list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [v for v in value.split(",") if v.strip()]
+    return list(value)
+
+
+def profile_weights(profile):
+    """Initial weight vector from onboarding preferences (sectors, opportunity_types, stage)."""
+    weights = np.zeros(WEIGHTS_DIM, dtype=np.float32)
+    for sector in _as_list(profile.get("sectors") or profile.get("sector")):
+        weights[features.sector_slot(sector)] = SECTOR_WEIGHT
+    for opportunity_type in _as_list(profile.get("opportunity_types")):
+        weights[features.type_slot(opportunity_type)] = TYPE_WEIGHT
+    if profile.get("stage"):
+        weights[features.stage_slot(profile["stage"])] = STAGE_WEIGHT
+    weights[features.DIM:] = PROXIMITY_WEIGHTS
+    return weights
+
+
+def update_weights(weights, x, liked, learning_rate=LEARNING_RATE):
+    """One logistic-regression SGD step towards ``liked`` for the full feature row ``x``."""
+    predicted = 1.0 / (1.0 + np.exp(-float(weights @ x)))
+    return (weights + learning_rate * ((1.0 if liked else 0.0) - predicted) * x).astype(np.float32)
+
+
+def _stored_weights(blob, profile):
+    """Weights stored by ``record_feedback``, or the profile's when missing or of another features version."""
+    if blob is not None:
+        try:
+            return np.frombuffer(features.payload(blob), dtype=np.float32)
+        except features.StaleFeaturesError:
+            pass
+    return profile_weights(profile or {})
+
+
+def load_weights(session, user_ids, profiles=None):
+    """(users, WEIGHTS_DIM) array in ``user_ids`` order; users without usable stored weights use their profile."""
+    stored = dict(session.execute(
+        select(UserWeights.user_id, UserWeights.weights).where(UserWeights.user_id.in_(list(user_ids)))
+    ).all())
+    profiles = profiles or {}
+    return np.stack([
+        _stored_weights(stored.get(user_id), profiles.get(user_id))
+        for user_id in user_ids
+    ]) if user_ids else np.zeros((0, WEIGHTS_DIM), dtype=np.float32)
+
+
+def record_feedback(session, user_id, opportunity_id, liked, comment=None, profile=None, today=None):
+    """Store a thumbs up/down and update the user's weights; return the new weights."""
+    opportunity = session.execute(
+        select(Opportunity.id, Opportunity.features, Opportunity.deadline).where(Opportunity.id == opportunity_id)
+    ).one()
+    insert = _insert_for(session)
+    stmt = insert(OpportunityFeedback.__table__).values(
+        user_id=user_id, opportunity_id=opportunity_id, liked=liked, comment=comment,
+    )
+    session.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "opportunity_id"],
+        set_={"liked": stmt.excluded.liked, "comment": stmt.excluded.comment},
+    ))
+
+    current = session.get(UserWeights, user_id)
+    weights = _stored_weights(current.weights if current else None, profile)
+    if opportunity.features:
+        row = FeatureMatrix(capacity=1)
+        row.upsert([opportunity])
+        x = np.concatenate([row.data[0], row.proximity(today)[0]])
+        weights = update_weights(weights, x, liked)
+    if current is None:
+        session.add(UserWeights(user_id=user_id, weights=features.pack(weights), feedback_count=1))
+    else:
+        current.weights = features.pack(weights)
+        current.feedback_count += 1
+    session.commit()
+    return weights
@@ -8,12 +8,47 @@ DOWNLOAD_DELAY = 1
 AUTOTHROTTLE_ENABLED = True
 
 ITEM_PIPELINES = {
-    "komkom_scraper.pipelines.PostgresUpsertPipeline": 300,
+    "komkom_scraper.pipelines.ThreadedUpsertPipeline": 300,
 }
 
+# Batched upserts: flush after this many items or this many seconds
+UPSERT_BATCH_SIZE = 500
+UPSERT_FLUSH_INTERVAL = 5.0
+# Writes run on a worker pool; crawling pauses once this many batches are pending
+UPSERT_THREADS = 2
+UPSERT_MAX_PENDING = 4
+# A failed batch is retried this many times, RETRY_DELAY seconds apart (doubling)
+UPSERT_RETRIES = 2
+UPSERT_RETRY_DELAY = 1.0
+
+# Saved-search alerts (US008): match upserted items against saved searches
+ALERTS_ENABLED = False
+ALERTS_BATCH_SIZE = 200
+ALERTS_INDEX_REFRESH = 300
+
 DOWNLOADER_MIDDLEWARES = {
     "komkom_scraper.spiders.user_agent_rotation.UserAgentRotationMiddleware": 400,
 }
 
+# Per-source latency/throughput metrics: Prometheus textfile + JSON run summary
+METRICS_ENABLED = True
+METRICS_TEXTFILE = "metrics/%(spider)s.prom"
+METRICS_SUMMARY = "metrics/%(spider)s.json"
+METRICS_INTERVAL = 60
+EXTENSIONS = {
+    "komkom_scraper.metrics.CrawlMetrics": 500,
+    "komkom_scraper.alerts.AlertMatcher": 510,
+}
+SPIDER_MIDDLEWARES = {
+    # Above the built-ins (<= 900) so only the callback itself is timed
+    "komkom_scraper.metrics.ParseTimeMiddleware": 950,
+    # Innermost, so a sampled profile holds the callback and nothing else
+    "komkom_scraper.profiling.ProfilingMiddleware": 960,
+}
+# Sampling profiler (off in production); see profiling.py
+PROFILING_ENABLED = False
+PROFILING_SAMPLE_RATE = 0.05
+PROFILING_OUTPUT = "profiles/%(spider)s"
+
 ROBOTSTXT_OBEY = False
 FEED_EXPORT_ENCODING = "utf-8"
\ No newline at end of file
@@ -0,0 +1,118 @@
+"""
+Currency-aware amount extraction.
+
+``extract_amount("Enveloppe de 15 millions FCFA")`` returns
+``Amount(value=15000000.0, currency="XOF")``. The extractor understands:
+- thousand separators (spaces, non-breaking spaces, dots or commas)
+- decimal commas/points
+- "mille", "k", "millions", "milliards" (and "M"/"Mds" before a currency)
+- XOF/FCFA/CFA, EUR/€, USD/$ tokens on either side of the number
+
+When a text holds several numbers, one attached to a currency wins over one
+with only a multiplier, which wins over a bare number. A bare number is only
+returned when it is the sole number in the text, ends it (as in
+"Montant : 10 000") and does not look like a year, so "Programme 2024 pour
+50 startups" and "3 mois" yield nothing.
+"""
+
+import re
+from typing import NamedTuple, Optional
+
+
+class Amount(NamedTuple):
+    value: float
+    currency: Optional[str]
+
+
+CURRENCIES = [
+    (r"francs?\s+cfa|f\.?\s?cfa|fcfa|cfa|xof", "XOF"),
+    (r"euros?|eur|€", "EUR"),
+    (r"dollars?|usd|us\$|\$", "USD"),
+]
+MULTIPLIERS = [
+    (r"milliards?|mds|mrds?", 1_000_000_000),
+    (r"millions?", 1_000_000),
+    (r"mille|k", 1_000),
+    (r"m", 1_000_000),
+]
+
+_CURRENCY = "|".join(f"(?:{pattern})" for pattern, _ in CURRENCIES)
+_MULTIPLIER = "|".join(f"(?:{pattern})" for pattern, _ in MULTIPLIERS)
+_NUMBER = r"\d{1,3}(?:[ .,]\d{3})+(?:[.,]\d+)?|\d+(?:[.,]\d+)?"
+
+AMOUNT_RE = re.compile(
+    rf"(?:(?P<pre>{_CURRENCY})\s*)?"
+    rf"(?<![\d.,])(?P<number>{_NUMBER})(?![\d])"
+    rf"(?:\s*(?P<mult>{_MULTIPLIER})\b\.?)?"
+    rf"(?:\s*(?:de\s+|d')?(?P<post>{_CURRENCY})(?![a-z]))?",
+    re.IGNORECASE,
+)
+_CURRENCY_RES = [(re.compile(rf"^(?:{pattern})$", re.IGNORECASE), code) for pattern, code in CURRENCIES]
+_MULTIPLIER_RES = [(re.compile(rf"^(?:{pattern})$", re.IGNORECASE), factor) for pattern, factor in MULTIPLIERS]
+_YEAR_RE = re.compile(r"^(?:19|20)\d\d$")
+_WORD_RE = re.compile(r"[^\W\d_]")
+_SPACES = str.maketrans({"\xa0": " ", "\u202f": " ", "\u2009": " "})
+
+
+def _currency_code(token):
+    if not token:
+        return None
+    for pattern, code in _CURRENCY_RES:
+        if pattern.match(token.strip()):
+            return code
+    return None
+
+
+def _multiplier(token):
+    for pattern, factor in _MULTIPLIER_RES:
+        if pattern.match(token):
+            return factor
+    return 1
+
+
+def _to_float(number):
+    """Read ``number`` with the last '.'/',' as decimal mark unless it groups thousands."""
+    number = number.replace(" ", "")
+    separators = [ch for ch in number if ch in ".,"]
+    if not separators:
+        return float(number)
+    last = separators[-1]
+    integer, _, fraction = number.rpartition(last)
+    if separators.count(last) > 1 or (len(separators) == 1 and len(fraction) == 3):
+        # "15.000.000", "10,000" -> thousand separators only
+        return float(number.replace(".", "").replace(",", ""))
+    return float(integer.replace(".", "").replace(",", "") + "." + fraction)
+
+
+def extract_amount(text):
+    """Best amount mentioned in ``text`` as an ``Amount``, or None."""
+    if not text:
+        return None
+    candidates = []
+    text = text.translate(_SPACES)
+    for match in AMOUNT_RE.finditer(text):
+        number, mult = match.group("number"), match.group("mult")
+        currency = _currency_code(match.group("pre") or match.group("post"))
+        # Single-letter multipliers ("15M", "50k") only count next to a currency
+        if mult and mult.lower() in ("m", "k") and not currency:
+            mult = None
+        try:
+            value = _to_float(number) * (_multiplier(mult.lower()) if mult else 1)
+        except ValueError:
+            continue
+        rank = 2 if currency else 1 if mult else 0
+        trailing = text[match.end():]
+        candidates.append((rank, number, trailing, Amount(value, currency)))
+    if not candidates:
+        return None
+    rank, number, trailing, amount = max(candidates, key=lambda candidate: candidate[0])
+    if rank == 0 and (
+        len(candidates) > 1 or _YEAR_RE.match(number) or _WORD_RE.search(trailing)
+    ):
+        return None
+    return amount
+
+
+def extract_amounts(texts):
+    """Batch variant of ``extract_amount`` for bulk re-normalization."""
+    return [extract_amount(text) for text in texts]
@@ -0,0 +1,210 @@
+"""
+Layered date parsing for deadlines and publication dates.
+
+Stages, in order:
+1. ISO dates anywhere in the text ("2024-07-31", "2024-07-31T10:00")
+2. numeric day-first dates ("31/07/2024", "31.07.24")
+3. a compiled French/English month-name grammar ("18 avril 2024",
+   "avant le 30 juin", "1er août 2024", "2 mars 24", "April 18, 2024";
+   "juin 2024" is read as the 1st of the month)
+4. relative phrases ("aujourd'hui", "demain", "dans 2 semaines", "in 3 days",
+   "il y a 3 jours", "2 weeks ago"), only when no absolute date is present:
+   "jusqu'au 30 juin 2024, réponse dans 2 semaines" is the 30th of June
+5. ``dateutil.parser.parse(fuzzy=True)`` as the last resort, except for bare
+   durations ("12 mois"), which are not dates and parse as None
+
+A pattern that matches an impossible date ("31 sept 2024") fails the parse
+instead of falling through to a looser stage. Results are memoized per
+(raw string, today) in a bounded LRU cache, since year-less inputs and
+relative phrases depend on the reference date. Day-less or year-less inputs
+follow dateutil's convention and take the missing parts from ``today``.
+"""
+
+import datetime
+import re
+import unicodedata
+from functools import lru_cache
+
+from dateutil import parser as date_parser
+
+CACHE_SIZE = 8192
+
+MONTHS = {
+    # French
+    "janvier": 1, "janv": 1, "fevrier": 2, "fevr": 2, "fev": 2, "mars": 3,
+    "avril": 4, "avr": 4, "mai": 5, "juin": 6, "juillet": 7, "juil": 7,
+    "aout": 8, "septembre": 9, "octobre": 10, "novembre": 11, "decembre": 12,
+    # English
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3,
+    "april": 4, "apr": 4, "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7,
+    "august": 8, "aug": 8, "september": 9, "sept": 9, "sep": 9,
+    "october": 10, "oct": 10, "november": 11, "nov": 11, "december": 12, "dec": 12,
+}
+_MONTH_ALTERNATION = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+ISO_RE = re.compile(r"(?<!\d)(\d{4})-(\d{1,2})-(\d{1,2})(?!\d)")
+NUMERIC_RE = re.compile(r"(?<!\d)(\d{1,2})[/.-](\d{1,2})[/.-](\d{4}|\d{2})(?!\d)")
+# A two-digit year must not be the hour of "30 juin 10h" / "30 juin 10:00"
+_YEAR = r"(\d{4}|\d{2})(?!\d|\s*h\b|:)"
+DAY_MONTH_RE = re.compile(
+    r"\b(\d{1,2})(?:er|st|nd|rd|th)?\s+(?:de\s+)?(" + _MONTH_ALTERNATION + r")\b\.?"
+    r"(?:,?\s+" + _YEAR + r")?"
+)
+MONTH_DAY_RE = re.compile(
+    r"\b(" + _MONTH_ALTERNATION + r")\b\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s+" + _YEAR
+)
+MONTH_YEAR_RE = re.compile(r"\b(" + _MONTH_ALTERNATION + r")\b\.?\s+(\d{4})\b")
+_UNIT = r"jours?|days?|semaines?|weeks?|mois|months?"
+RELATIVE_RE = re.compile(
+    r"\b(?:(?P<today>aujourd'hui|today)|(?P<after_tomorrow>apres-demain)|(?P<tomorrow>demain|tomorrow)"
+    r"|(?P<before_yesterday>avant-hier)|(?P<yesterday>hier|yesterday)"
+    r"|(?:dans|in)\s+(?P<ahead>\d+)\s+(?P<ahead_unit>" + _UNIT + r")"
+    r"|il\s+y\s+a\s+(?P<ago>\d+)\s+(?P<ago_unit>" + _UNIT + r")"
+    r"|(?P<ago_en>\d+)\s+(?P<ago_en_unit>" + _UNIT + r")\s+ago)\b"
+)
+_RELATIVE_HINT = re.compile(
+    r"aujourd|today|demain|tomorrow|hier|yesterday|dans\s+\d|in\s+\d|il\s+y\s+a|ago", re.IGNORECASE
+)
+# A count of days/weeks/months with no anchor ("12 mois") is a duration, not a date
+DURATION_RE = re.compile(r"\b\d+\s+(?:" + _UNIT + r"|ans?|years?)\b")
+
+
+def _fold(text):
+    """Lowercase and strip accents so "Février" and "fevrier" match the same entry."""
+    text = unicodedata.normalize("NFKD", text.lower().replace("’", "'"))
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _make_date(year, month, day):
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _full_year(year):
+    return 2000 + year if year < 100 else year
+
+
+def _add_months(date, months):
+    month_index = date.month - 1 + months
+    year, month = date.year + month_index // 12, month_index % 12 + 1
+    for day in (date.day, 30, 29, 28):
+        result = _make_date(year, month, day)
+        if result:
+            return result
+
+
+def _offset(today, count, unit):
+    if unit.startswith(("jour", "day")):
+        return today + datetime.timedelta(days=count)
+    if unit.startswith(("semaine", "week")):
+        return today + datetime.timedelta(weeks=count)
+    return _add_months(today, count)
+
+
+def _parse_relative(text, today):
+    if not _RELATIVE_HINT.search(text):
+        return None
+    match = RELATIVE_RE.search(_fold(text))
+    if not match:
+        return None
+    groups = match.groupdict()
+    if groups["today"]:
+        return today
+    if groups["after_tomorrow"]:
+        return today + datetime.timedelta(days=2)
+    if groups["tomorrow"]:
+        return today + datetime.timedelta(days=1)
+    if groups["before_yesterday"]:
+        return today - datetime.timedelta(days=2)
+    if groups["yesterday"]:
+        return today - datetime.timedelta(days=1)
+    if groups["ahead"]:
+        return _offset(today, int(groups["ahead"]), groups["ahead_unit"])
+    if groups["ago"]:
+        return _offset(today, -int(groups["ago"]), groups["ago_unit"])
+    return _offset(today, -int(groups["ago_en"]), groups["ago_en_unit"])
+
+
+def _parse_absolute(text, today):
+    """Return ``(date, stage)`` from the ISO, numeric and grammar stages.
+
+    A stage whose pattern matches but names an impossible date ("31 sept
+    2024") fails the parse rather than handing the text to a looser stage.
+    ``(None, None)`` means no pattern matched.
+    """
+    match = ISO_RE.search(text)
+    if match:
+        return _make_date(*map(int, match.groups())), "iso"
+
+    match = NUMERIC_RE.search(text)
+    if match:
+        day, month, year = map(int, match.groups())
+        return _make_date(_full_year(year), month, day), "numeric"
+
+    folded = _fold(text)
+    match = DAY_MONTH_RE.search(folded)
+    if match:
+        day, month, year = match.groups()
+        year = _full_year(int(year)) if year else today.year
+        return _make_date(year, MONTHS[month], int(day)), "grammar"
+    match = MONTH_DAY_RE.search(folded)
+    if match:
+        month, day, year = match.groups()
+        return _make_date(_full_year(int(year)), MONTHS[month], int(day)), "grammar"
+    match = MONTH_YEAR_RE.search(folded)
+    if match:
+        month, year = match.groups()
+        return datetime.date(int(year), MONTHS[month], 1), "grammar"
+    return None, None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse(text, today):
+    """``parse_date_detailed`` for stripped, non-empty text; memoized per (text, today)."""
+    date, stage = _parse_absolute(text, today)
+    if stage:
+        return date, stage
+    date = _parse_relative(text, today)
+    if date:
+        return date, "relative"
+    if DURATION_RE.search(_fold(text)):
+        return None, "relative"
+    try:
+        default = datetime.datetime(today.year, today.month, today.day)
+        return date_parser.parse(text, fuzzy=True, default=default).date(), "fallback"
+    except (ValueError, OverflowError):
+        return None, "fallback"
+
+
+def parse_date_detailed(text, today=None):
+    """Parse ``text`` and report which stage produced the result.
+
+    Returns ``(date or None, stage)`` where stage is one of ``"iso"``,
+    ``"numeric"``, ``"grammar"``, ``"relative"``, ``"fallback"`` or ``None``
+    for empty input.
+    """
+    if not text or not text.strip():
+        return None, None
+    return _parse(text.strip(), today or datetime.date.today())
+
+
+def parse_date(text, today=None):
+    return parse_date_detailed(text, today)[0]
+
+
+def parse_dates(texts, today=None):
+    """Batch variant of ``parse_date``; repeated strings are parsed once."""
+    today = today or datetime.date.today()
+    seen = {}
+    results = []
+    for text in texts:
+        if text not in seen:
+            seen[text] = parse_date(text, today)
+        results.append(seen[text])
+    return results
+
+
+def cache_info():
+    return _parse.cache_info()
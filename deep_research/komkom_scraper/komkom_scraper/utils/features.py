@@ -0,0 +1,125 @@
+"""
+Fixed-length numeric feature vectors for relevance ranking.
+
+Each opportunity is encoded once, at upsert time, into ``DIM`` float32
+values stored packed in ``Opportunity.features``; ``ranking.py`` stacks
+them into a NumPy matrix. The layout does not depend on the data seen so
+far, so stored vectors stay valid as sectors and words come and go:
+
+- one-hot sector, type and stage, each hashed into a small block of slots
+- one-hot amount bucket (none, < 1M, < 10M, < 100M, more)
+- hashed text terms of title (counted twice), description and eligibility
+  criteria, log-scaled and L2-normalized
+
+Deadline proximity changes every day, so it is not stored: ranking derives
+it from ``deadline`` at scoring time (``PROXIMITY_DAYS``).
+
+Packed vectors (and the users' weights, which share the layout) start
+with the ``FEATURES_VERSION`` they were encoded with; ``payload`` rejects
+any other version. Changing any constant below changes the layout: bump
+``FEATURES_VERSION`` and run ``backfill features --all``.
+"""
+
+import math
+import re
+import struct
+import zlib
+from array import array
+
+from .taxonomy import fold
+
+FEATURES_VERSION = 1
+SECTOR_SLOTS = 32
+TYPE_SLOTS = 8
+STAGE_SLOTS = 8
+AMOUNT_EDGES = (1e6, 1e7, 1e8)
+TEXT_SLOTS = 256
+# Proximity columns appended at scoring time: no deadline, 0-7 days, 8-30 days, later (expired: none)
+PROXIMITY_DAYS = (7, 30)
+
+SECTOR_OFFSET = 0
+TYPE_OFFSET = SECTOR_OFFSET + SECTOR_SLOTS
+STAGE_OFFSET = TYPE_OFFSET + TYPE_SLOTS
+AMOUNT_OFFSET = STAGE_OFFSET + STAGE_SLOTS
+TEXT_OFFSET = AMOUNT_OFFSET + len(AMOUNT_EDGES) + 1
+DIM = TEXT_OFFSET + TEXT_SLOTS
+PROXIMITY_DIM = len(PROXIMITY_DAYS) + 2
+_TOKEN_RE = re.compile(r"\w{3,}")
+_HEADER = struct.Struct("<I")
+
+
+class StaleFeaturesError(ValueError):
+    """A stored vector was encoded with another ``FEATURES_VERSION``; run ``backfill features --all``."""
+
+
+def _slot(value, slots):
+    return zlib.crc32(fold(value).strip().encode()) % slots
+
+
+def sector_slot(sector):
+    return SECTOR_OFFSET + _slot(sector, SECTOR_SLOTS)
+
+
+def type_slot(opportunity_type):
+    return TYPE_OFFSET + _slot(getattr(opportunity_type, "value", opportunity_type), TYPE_SLOTS)
+
+
+def stage_slot(stage):
+    return STAGE_OFFSET + _slot(stage, STAGE_SLOTS)
+
+
+def amount_slot(amount):
+    if amount is None:
+        return AMOUNT_OFFSET
+    return AMOUNT_OFFSET + 1 + sum(1 for edge in AMOUNT_EDGES if float(amount) >= edge)
+
+
+def text_slots(text):
+    """Hashed term counts of ``text`` as {slot: count}."""
+    counts = {}
+    for word in _TOKEN_RE.findall(fold(text or "")):
+        slot = TEXT_OFFSET + zlib.crc32(word.encode()) % TEXT_SLOTS
+        counts[slot] = counts.get(slot, 0) + 1
+    return counts
+
+
+def encode(row):
+    """Feature vector of an opportunity row (dict with the ``Opportunity`` fields)."""
+    vector = [0.0] * DIM
+    for value, slot in ((row.get("sector"), sector_slot), (row.get("opportunity_type"), type_slot),
+                        (row.get("stage"), stage_slot)):
+        if value:
+            vector[slot(value)] = 1.0
+    vector[amount_slot(row.get("amount"))] = 1.0
+
+    counts = text_slots(row.get("title"))
+    for slot in counts:
+        counts[slot] *= 2
+    for field in ("description", "eligibility_criteria"):
+        for slot, count in text_slots(row.get(field)).items():
+            counts[slot] = counts.get(slot, 0) + count
+    weights = {slot: 1.0 + math.log(count) for slot, count in counts.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    for slot, weight in weights.items():
+        vector[slot] = weight / norm
+    return vector
+
+
+def pack(vector):
+    """``vector`` as float32 bytes after the ``FEATURES_VERSION`` header."""
+    return _HEADER.pack(FEATURES_VERSION) + array("f", vector).tobytes()
+
+
+def payload(blob):
+    """The float32 bytes of a packed vector; ``StaleFeaturesError`` unless it has the current version."""
+    if len(blob) < _HEADER.size or _HEADER.unpack_from(blob)[0] != FEATURES_VERSION:
+        raise StaleFeaturesError(
+            f"Vector not encoded with features version {FEATURES_VERSION}; run `backfill features --all`."
+        )
+    return memoryview(blob)[_HEADER.size:]
+
+
+def unpack(blob):
+    vector = array("f")
+    vector.frombytes(payload(blob))
+    return vector.tolist()
@@ -1,6 +1,9 @@
 import re
-import datetime
-from dateutil import parser as date_parser
+
+# Layered French/English date parsing lives in dates.py, amounts in amounts.py
+from .dates import parse_date, parse_dates  # noqa: F401
+from .amounts import Amount, extract_amount, extract_amounts  # noqa: F401
+from .taxonomy import get_tagger
 
 
 def clean_text(text):
@@ -9,39 +12,26 @@ def clean_text(text):
     return re.sub(r"\s+", " ", text).strip()
 
 
-def parse_date(text):
-    if not text:
-        return None
-    try:
-        return date_parser.parse(text, fuzzy=True).date()
-    except Exception:
-        return None
+def parse_amount(text):
+    # Value only; use extract_amount() to also get the currency
+    amount = extract_amount(text)
+    return amount.value if amount else None
 
 
-def parse_amount(text):
-    if not text:
-        return None
-    # Simple extraction of numbers (EUR/XOF amounts etc.)
-    match = re.search(r"([\d\.,]+)", text.replace('\xa0', ' '))
-    if match:
-        try:
-            amt = match.group(1).replace(",", ".").replace(" ", "")
-            return float(amt)
-        except Exception:
-            return None
-    return None
+def tag_sectors(title, description):
+    """Every matching sector with its hit count, e.g. {"agri": 2, "tech": 1}."""
+    return dict(get_tagger().tag(title, description)["sectors"])
 
 
 def derive_sector(title, description):
-    # Dummy sector tagging; to be improved with NLP
-    sectors = {
-        "agri": ["agriculture", "agro", "farm"],
-        "tech": ["tech", "numérique", "digital", "informatique"],
-        "health": ["santé", "health", "medical"],
-    }
-    text = (title or "") + " " + (description or "")
-    text = text.lower()
-    for sector, keywords in sectors.items():
-        if any(k in text for k in keywords):
-            return sector
-    return None
\ No newline at end of file
+    # Sector with the most keyword hits (see config/taxonomy.yaml)
+    return get_tagger().classify(title, description)[0]
+
+
+def derive_stage(title, description):
+    return get_tagger().classify(title, description)[1]
+
+
+def derive_sector_and_stage(title, description):
+    """Both labels from a single pass over the text."""
+    return get_tagger().classify(title, description)
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Single-pass sector and stage tagging with an Aho-Corasick automaton.
+
+All keywords of the taxonomy (``deep_research/config/taxonomy.yaml``) are
+compiled into one automaton, so tagging a text costs one scan of the text no
+matter how many keywords there are. Matching runs on a folded copy of the
+text (lowercase, accents removed) and only counts hits on word boundaries;
+a keyword ending in ``*`` matches as a word prefix.
+
+If the taxonomy file is not available (e.g. inside the scraper Docker image)
+the built-in ``DEFAULT_TAXONOMY`` is used.
+"""
+
+import os
+import unicodedata
+from collections import Counter, deque
+
+TAXONOMY_PATH = os.environ.get(
+    "KOMKOM_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "config", "taxonomy.yaml"),
+)
+
+DEFAULT_TAXONOMY = {
+    "sectors": {
+        "agri": ["agriculture", "agro*", "farm*"],
+        "tech": ["tech*", "numérique", "digital*", "informatique"],
+        "health": ["santé", "health*", "medical*"],
+    },
+    "stages": {},
+}
+
+
+def fold(text):
+    """Lowercase and strip accents ("Santé" -> "sante")."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over (keyword, label) pairs."""
+
+    def __init__(self, keywords):
+        # keywords: iterable of (keyword, label); trailing "*" = prefix match
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+        for keyword, label in keywords:
+            prefix = keyword.endswith("*")
+            pattern = fold(keyword.rstrip("*").strip())
+            if pattern:
+                self._add(pattern, (label, len(pattern), prefix))
+        self._link()
+
+    def _add(self, pattern, output):
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+            state = nxt
+        self.outputs[state].append(output)
+
+    def _link(self):
+        # Breadth-first so every failure target is final before it is used;
+        # depth-1 states keep the default failure link to the root.
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.outputs[nxt] = self.outputs[nxt] + self.outputs[self.fail[nxt]]
+
+    def count(self, text):
+        """Count word-boundary hits per label in ``text`` (a ``Counter``).
+
+        Overlapping keywords of one label ("agri*" and "agricole*") count a
+        given word once.
+        """
+        text = fold(text)
+        hits = Counter()
+        seen = set()
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        state = 0
+        length = len(text)
+        for end, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for label, size, prefix in outputs[state]:
+                start = end - size + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if not prefix and end + 1 < length and text[end + 1].isalnum():
+                    continue
+                if (label, start) not in seen:
+                    seen.add((label, start))
+                    hits[label] += 1
+        return hits
+
+
+class TaxonomyTagger:
+    """Tags texts with every matching sector and stage in one automaton pass."""
+
+    def __init__(self, taxonomy):
+        self.sectors = list(taxonomy.get("sectors") or {})
+        self.stages = list(taxonomy.get("stages") or {})
+        keywords = []
+        for kind in ("sectors", "stages"):
+            for label, words in (taxonomy.get(kind) or {}).items():
+                keywords.extend((word, (kind, label)) for word in words)
+        self.automaton = KeywordAutomaton(keywords)
+
+    @classmethod
+    def from_yaml(cls, path):
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(yaml.safe_load(f))
+
+    def tag(self, *texts):
+        """Return ``{"sectors": Counter, "stages": Counter}`` for the joined texts."""
+        hits = self.automaton.count(" ".join(text for text in texts if text))
+        result = {"sectors": Counter(), "stages": Counter()}
+        for (kind, label), count in hits.items():
+            result[kind][label] = count
+        return result
+
+    def _top(self, counts, order):
+        if not counts:
+            return None
+        # Most hits wins; ties go to the label listed first in the taxonomy
+        return max(counts, key=lambda label: (counts[label], -order.index(label)))
+
+    def classify(self, *texts):
+        """Best (sector, stage) pair for the texts; either may be None."""
+        tags = self.tag(*texts)
+        return self._top(tags["sectors"], self.sectors), self._top(tags["stages"], self.stages)
+
+
+_tagger = None
+
+
+def get_tagger():
+    """Process-wide tagger built from ``TAXONOMY_PATH`` (or the defaults)."""
+    global _tagger
+    if _tagger is None:
+        if os.path.exists(TAXONOMY_PATH):
+            _tagger = TaxonomyTagger.from_yaml(TAXONOMY_PATH)
+        else:
+            _tagger = TaxonomyTagger(DEFAULT_TAXONOMY)
+    return _tagger
@@ -0,0 +1,73 @@
+"""
+Canonical URLs and deterministic opportunity ids.
+
+Every ingestion path (both Scrapy pipelines and the Google scraper) derives
+the row id, the upsert key, from the canonical form of the URL with
+``opportunity_id``. The same page reached with tracking parameters, another
+scheme, a ``www.`` host or a trailing slash therefore maps to one row, while
+``source_url`` keeps the URL as fetched for display (the canonical form may
+not even resolve, e.g. on hosts that only answer with ``www.``).
+
+``canonicalize_url``:
+- uses https for http and https URLs
+- lowercases the host and drops ``www.``, default ports and a trailing dot
+- collapses duplicate slashes, resolves ``.``/``..`` segments and drops a
+  trailing slash (except on the root path)
+- drops tracking parameters (``utm_*``, ``fbclid``, ``gclid`` ...) and the
+  fragment, and sorts the remaining query parameters
+"""
+
+import posixpath
+import re
+import uuid
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "twclid",
+    "igshid", "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok",
+}
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+_SLASHES_RE = re.compile(r"/{2,}")
+# RFC 3986 reserved and unreserved characters, plus "%" so existing escapes survive
+_PATH_SAFE = "/:@!$&'()*+,;=-._~%"
+
+
+def _is_tracking(key):
+    key = key.lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url):
+    """Canonical form of ``url`` (see module docstring); non-HTTP URLs only lose surrounding spaces."""
+    url = url.strip()
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+
+    path = _SLASHES_RE.sub("/", parts.path or "/")
+    path = posixpath.normpath(path) if path != "/" else path
+    path = quote(path.lstrip("/"), safe=_PATH_SAFE)
+    path = "/" + ("" if path == "." else path)
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking(key)
+    )
+    return urlunsplit(("https", netloc, path, urlencode(query), ""))
+
+
+def opportunity_id(url):
+    """Deterministic UUID (fits ``Opportunity.id``) for the canonical form of ``url``."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, canonicalize_url(url)))
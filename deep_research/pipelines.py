@@ -1,21 +1,32 @@
-import hashlib
 import logging
 import datetime
+import time
 from sqlalchemy.orm import sessionmaker
-from deep_research.db import get_engine, create_tables, upsert_opportunity
+from twisted.internet import defer, threads
+from twisted.python.threadpool import ThreadPool
+from deep_research.db import (
+    get_engine, check_schema, upsert_opportunity,
+    bulk_upsert_opportunities, compute_content_hash,
+)
+from deep_research.utils.urls import opportunity_id
+from deep_research.komkom_scraper.komkom_scraper.alerts import opportunities_inserted
+from deep_research.komkom_scraper.komkom_scraper.metrics import upsert_timed
+from deep_research.komkom_scraper.komkom_scraper.profiling import profiled, profiler_for
 
 logger = logging.getLogger(__name__)
 
 
 class PostgresUpsertPipeline:
-    def __init__(self):
+    def __init__(self, profiler=None):
+        self.profiler = profiler
         self.engine = get_engine()
-        create_tables(self.engine)
+        # Cheap version check; the schema itself is managed by `make migrate`
+        check_schema(self.engine)
         self.Session = sessionmaker(bind=self.engine, future=True)
 
     @classmethod
     def from_crawler(cls, crawler):
-        return cls()
+        return cls(profiler=profiler_for(crawler))
 
     def open_spider(self, spider):
         self.session = self.Session()
@@ -24,13 +35,102 @@ class PostgresUpsertPipeline:
         self.session.close()
 
     def process_item(self, item, spider):
-        # Compute SHA256 of source_url
-        item['id'] = hashlib.sha256(item['source_url'].encode()).hexdigest()
+        # The id, derived from the canonical URL, is the upsert key; source_url stays as fetched
+        item['id'] = opportunity_id(item['source_url'])
         item['scraped_at'] = datetime.datetime.utcnow()
         item['updated_at'] = datetime.datetime.utcnow()
+        item['content_hash'] = compute_content_hash(item)
         try:
-            upsert_opportunity(self.session, item)
+            profiled(self.profiler, upsert_opportunity, self.session, item)
         except Exception as e:
             logger.error(f"DB upsert failed for {item['source_url']}: {e}")
             raise
-        return item
\ No newline at end of file
+        return item
+
+
+class ThreadedUpsertPipeline(PostgresUpsertPipeline):
+    """Per-item upserts run on a bounded thread pool instead of the reactor.
+
+    ``process_item`` returns a Deferred that fires with the item once its row
+    is committed (or fails with the write's error), so later pipelines such
+    as alert matching only see stored rows; at most ``UPSERT_MAX_PENDING``
+    writes are queued before new items wait for a free slot. ``close_spider`` waits
+    for every outstanding write before shutting the pool down. New, changed
+    and unchanged rows are counted in the crawler stats (``upsert/<status>``),
+    each write's latency is sent as the ``upsert_timed`` signal, and a row
+    it inserted as ``opportunities_inserted`` for alert matching.
+    """
+
+    def __init__(self, threads=4, max_pending=16, stats=None, signals=None, profiler=None):
+        super().__init__(profiler)
+        self.stats = stats
+        self.signals = signals
+        self.threadpool = ThreadPool(minthreads=1, maxthreads=threads, name="upsert")
+        self.semaphore = defer.DeferredSemaphore(max_pending)
+        self.pending = set()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            threads=crawler.settings.getint("UPSERT_THREADS", 4),
+            max_pending=crawler.settings.getint("UPSERT_MAX_PENDING", 16),
+            stats=crawler.stats,
+            signals=crawler.signals,
+            profiler=profiler_for(crawler),
+        )
+
+    def open_spider(self, spider):
+        self.spider = spider
+        self.threadpool.start()
+
+    def close_spider(self, spider):
+        d = defer.DeferredList(list(self.pending), consumeErrors=True)
+        d.addBoth(lambda _: self.threadpool.stop())
+        return d
+
+    def process_item(self, item, spider):
+        item['id'] = opportunity_id(item['source_url'])
+        item['scraped_at'] = datetime.datetime.utcnow()
+        item['updated_at'] = datetime.datetime.utcnow()
+        item['content_hash'] = compute_content_hash(item)
+        acquired = self.semaphore.acquire()
+        acquired.addCallback(self._dispatch, dict(item))
+        acquired.addCallback(lambda _: item)
+        return acquired
+
+    def _dispatch(self, _, row):
+        from twisted.internet import reactor
+
+        d = threads.deferToThreadPool(reactor, self.threadpool, self._write, row)
+        d.addCallback(self._record, row)
+
+        def failed(failure):
+            logger.error(f"DB upsert failed for {row['source_url']}: {failure.getErrorMessage()}")
+            return failure
+
+        def done(result):
+            self.pending.discard(d)
+            self.semaphore.release()
+            return result
+
+        d.addErrback(failed)
+        d.addBoth(done)
+        self.pending.add(d)
+        # The item waits for its write; a failure reaches Scrapy as an item error
+        return d
+
+    def _write(self, row):
+        started = time.perf_counter()
+        with self.Session() as session:
+            counts = profiled(self.profiler, bulk_upsert_opportunities, session, [row])
+        return counts, time.perf_counter() - started
+
+    def _record(self, result, row):
+        counts, seconds = result
+        if self.stats is not None:
+            for status, count in counts.items():
+                self.stats.inc_value(f"upsert/{status}", count)
+        if self.signals is not None:
+            self.signals.send_catch_log(upsert_timed, seconds=seconds, rows=1, spider=self.spider)
+            if counts.inserted:
+                self.signals.send_catch_log(opportunities_inserted, items=[row], spider=self.spider)
@@ -0,0 +1,148 @@
+"""
+A pool of reusable headless browsers working through (query, page) tasks.
+
+Each worker thread owns one driver, created on first use by
+``driver_factory`` and reused for every task it takes from the shared queue.
+``fetch(driver, task)`` loads and extracts one result page and runs on the
+worker thread. When it raises ``BlockedError`` (a CAPTCHA page) or any other
+exception, the worker quits its browser, starts a new one, and puts the task
+back in the queue (up to ``max_attempts`` tries in total).
+
+Pacing is per worker: a worker waits a random ``delay`` after each of its own
+page loads, so N workers issue about N times the requests of a single
+browser, never in lockstep.
+
+``BrowserPool.run`` yields ``(task, items)`` on the calling thread as pages
+complete, so the caller can feed one shared pipeline (and its DB session)
+without extra locking. When a page yields no results, the later pages of
+that query are skipped.
+"""
+
+import logging
+import queue
+import random
+import threading
+import time
+import urllib.parse
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+RESULTS_PER_PAGE = 10
+
+
+class SearchTask(NamedTuple):
+    query: str
+    page: int  # 0-based
+    locale: str = ""  # interface language ("fr", "en"), empty for the engine default
+    attempt: int = 1
+
+    @property
+    def url(self):
+        params = {"q": self.query}
+        if self.locale:
+            params["hl"] = self.locale
+        if self.page:
+            params["start"] = self.page * RESULTS_PER_PAGE
+        return "https://www.google.com/search?" + urllib.parse.urlencode(params)
+
+
+class BlockedError(Exception):
+    """Raised by ``fetch`` when the engine served a CAPTCHA or block page."""
+
+
+_DONE = object()
+
+
+class BrowserPool:
+    def __init__(self, driver_factory, fetch, workers=4, delay=(0.5, 1.0), max_attempts=3,
+                 sleep=time.sleep):
+        self.driver_factory = driver_factory
+        self.fetch = fetch
+        self.workers = workers
+        self.delay = delay
+        self.max_attempts = max_attempts
+        self.sleep = sleep
+        self.tasks = queue.Queue()
+        self.results = queue.Queue()
+        self.exhausted = set()
+        self.lock = threading.Lock()
+        self.restarts = 0
+        self.failed = []
+
+    @staticmethod
+    def plan(queries, pages, locale=""):
+        return [SearchTask(query, page, locale) for page in range(pages) for query in queries]
+
+    def run(self, tasks):
+        """Process ``tasks`` on the pool; yield ``(task, items)`` as pages complete."""
+        pending = 0
+        for task in tasks:
+            self.tasks.put(task)
+            pending += 1
+        threads = [
+            threading.Thread(target=self._work, name=f"browser-{index}", daemon=True)
+            for index in range(min(self.workers, pending))
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while pending:
+                task, items, final = self.results.get()
+                if not final:
+                    # Task went back to the queue for another attempt
+                    continue
+                pending -= 1
+                if items is not None:
+                    yield task, items
+        finally:
+            for _ in threads:
+                self.tasks.put(_DONE)
+            for thread in threads:
+                thread.join()
+
+    def _work(self):
+        driver = None
+        try:
+            while True:
+                task = self.tasks.get()
+                if task is _DONE:
+                    return
+                if task.query in self.exhausted:
+                    self.results.put((task, None, True))
+                    continue
+                try:
+                    if driver is None:
+                        driver = self.driver_factory()
+                    items = self.fetch(driver, task)
+                except Exception as e:
+                    logger.warning("%s page %d failed (attempt %d): %r",
+                                   task.query, task.page, task.attempt, e)
+                    driver = self._quit(driver)
+                    with self.lock:
+                        self.restarts += 1
+                    self._retry(task)
+                else:
+                    if not items:
+                        self.exhausted.add(task.query)
+                    self.results.put((task, items, True))
+                self.sleep(random.uniform(*self.delay))
+        finally:
+            self._quit(driver)
+
+    def _retry(self, task):
+        if task.attempt < self.max_attempts:
+            self.tasks.put(task._replace(attempt=task.attempt + 1))
+            self.results.put((task, None, False))
+        else:
+            self.failed.append(task)
+            self.results.put((task, None, True))
+
+    @staticmethod
+    def _quit(driver):
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception as e:
+                logger.debug("Error while quitting browser: %r", e)
+        return None
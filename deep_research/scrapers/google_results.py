@@ -0,0 +1,123 @@
+"""
+Browser-free extraction of Google result pages.
+
+``google_search_scraper.extract_results`` takes one ``driver.page_source``
+snapshot and hands it to ``parse_results``, so a page costs one WebDriver
+round trip instead of several per result block. The same parser works on
+saved pages such as the ``google_page_source_debug.html`` dumps:
+
+    python deep_research/scrapers/google_results.py google_page_source_debug.html
+
+Google changes its markup often. Each part of a result is looked up with an
+ordered list of selectors and the first one that matches wins, so a new
+layout only needs a new entry at the front of the right list.
+"""
+
+import argparse
+import json
+import time
+import urllib.parse
+
+from parsel import Selector
+
+# Result containers, most specific first
+BLOCK_SELECTORS = ["div.g", "div.MjjYud", "div.tF2Cxc"]
+TITLE_SELECTORS = ["h3 ::text", "div[role=heading] ::text"]
+LINK_XPATHS = ["./ancestor::a[1]/@href", ".//a[h3]/@href", ".//a[@href][1]/@href"]
+SNIPPET_SELECTORS = [
+    "div.IsZzjf span",
+    "div.VwiC3b span",
+    "span.aCOpRe",
+    "div.VwiC3b",
+    "div[data-sncf]",
+]
+
+
+def clean_text(text):
+    text = " ".join(text.split()) if text else ""
+    return text or None
+
+
+def _first_text(node, selectors):
+    for selector in selectors:
+        matches = node.css(selector)
+        if not matches:
+            continue
+        if selector.endswith("::text"):
+            text = clean_text(" ".join(matches.getall()))
+        else:
+            text = clean_text(" ".join(matches[0].css("*::text").getall()))
+        if text:
+            return text
+    return None
+
+
+def _unwrap(href):
+    """Resolve Google's ``/url?q=<target>`` redirect links to their target."""
+    if href and href.startswith("/url?"):
+        target = urllib.parse.parse_qs(urllib.parse.urlsplit(href).query).get("q")
+        return target[0] if target else None
+    return href
+
+
+def _link(block):
+    heading = block.css("h3")
+    for xpath in LINK_XPATHS:
+        node = heading[0] if heading and xpath.startswith("./ancestor") else block
+        href = _unwrap(node.xpath(xpath).get())
+        if href and href.startswith("http"):
+            return href
+    return None
+
+
+def find_blocks(selector):
+    for css in BLOCK_SELECTORS:
+        blocks = selector.css(css)
+        if blocks:
+            return blocks
+    return []
+
+
+def parse_results(html):
+    """Return ``[{"title", "source_url", "description"}]`` for one result page.
+
+    Blocks without a title or external URL (ads, "People also ask", links
+    back to google.com/search) are skipped, and nested result containers
+    are reported once.
+    """
+    results = []
+    seen = set()
+    for block in find_blocks(Selector(text=html)):
+        title = _first_text(block, TITLE_SELECTORS)
+        source_url = _link(block)
+        if not title or not source_url or "google.com/search?" in source_url:
+            continue
+        if source_url in seen:
+            continue
+        seen.add(source_url)
+        results.append({
+            "title": title,
+            "source_url": source_url,
+            "description": _first_text(block, SNIPPET_SELECTORS),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract results from saved Google result pages.")
+    parser.add_argument("paths", nargs="+", help="saved page_source HTML files")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+        started = time.perf_counter()
+        results = parse_results(html)
+        elapsed = (time.perf_counter() - started) * 1000
+        for result in results:
+            print(json.dumps(result, ensure_ascii=False))
+        print(f"{path}: {len(results)} results in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
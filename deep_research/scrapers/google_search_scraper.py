@@ -1,8 +1,8 @@
-import random
+import argparse
+import functools
+import itertools
 import time
-import uuid
 from datetime import datetime, timezone
-import urllib.parse
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -13,15 +13,25 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
+import os
 import sys
 sys.path.append('/app/scraper')  # Ensures komkom_scraper package is resolvable when script is executed via mounted volume.
 
+from komkom_scraper.metrics import MetricsRegistry
 from komkom_scraper.pipelines import PostgresUpsertPipeline
+from komkom_scraper.utils.urls import opportunity_id
 
-SEARCH_QUERIES = ["opportunité entrepreneuriale Sénégal"]
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))  # Sibling modules when run as a script.
+from browser_pool import BlockedError, BrowserPool, SearchTask
+from google_results import parse_results
+from search_cache import SearchCache
 
-def clean_text(text):
-    return text.strip() if text else None
+SEARCH_QUERIES = ["opportunité entrepreneuriale Sénégal"]
+# Next to this script, i.e. in the mounted volume, so the cache outlives the container
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".search_cache.sqlite")
+# Metric labels, as for the Scrapy spiders (see komkom_scraper/metrics.py)
+METRICS_LABELS = {"spider": "google_search", "source": "google_search"}
+DEFAULT_METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics")
 
 def setup_driver() -> webdriver.Chrome:
     chrome_options = Options()
@@ -35,8 +45,42 @@ def setup_driver() -> webdriver.Chrome:
     driver = webdriver.Chrome(service=service, options=chrome_options)
     return driver
 
-def extract_results(driver):
-    results = []
+def dump_debug(driver):
+    try:
+        with open("google_page_source_debug.html", "w", encoding="utf-8") as f:
+            f.write(driver.page_source)
+    except Exception as e:
+        print(f"ERROR: Failed to write page source debug file: {e}")
+    try:
+        driver.save_screenshot("google_screenshot_debug.png")
+    except Exception as e:
+        print(f"ERROR: Could not save screenshot: {e}")
+
+def build_item(result):
+    now = datetime.now(timezone.utc)
+    # Same id as the Scrapy pipelines (from the canonical URL), so a page found both ways is one row
+    source_url = result["source_url"].strip()
+    item_id = opportunity_id(source_url)
+    return {
+        "id": item_id,
+        "source_id": f"Google Search_{item_id.replace('-', '')}",
+        "title": result["title"],
+        "description": result["description"],
+        "deadline": None,
+        "opportunity_type": "Opportunité Entrepreneuriale",
+        "sector": None,
+        "stage": None,
+        "amount": None,
+        "source_url": source_url,
+        "scraped_at": now,
+        "updated_at": now,
+        "eligibility_criteria": None,
+        "publication_date": None,
+        "source": "Google Search"
+    }
+
+def read_page(driver, metrics=None):
+    """Wait for the results and return ``(results, html)``; html is None on timeout."""
     # Use explicit wait for Google results container.
     try:
         # Google often uses 'div.g' as the primary result container, but this selector may change at any time.
@@ -45,179 +89,127 @@ def extract_results(driver):
         )
     except TimeoutException:
         print("WARNING: Timeout waiting for Google results container. Dumping page source.")
-        try:
-            with open("google_page_source_debug.html", "w", encoding="utf-8") as f:
-                f.write(driver.page_source)
-        except Exception as e:
-            print(f"ERROR: Failed to write page source debug file: {e}")
-        try:
-            driver.save_screenshot("google_screenshot_debug.png")
-        except Exception as e:
-            print(f"ERROR: Could not save screenshot: {e}")
-        return []
-
-    search_results = driver.find_elements(By.CSS_SELECTOR, 'div.g')  # Google may change this selector.
-    print(f"DEBUG: Found {len(search_results)} potential search results on this page.")
-
-    if len(search_results) == 0:
-        print("WARNING: Found 0 potential search results. Dumping page source for debugging.")
-        try:
-            with open("google_page_source_debug.html", "w", encoding="utf-8") as f:
-                f.write(driver.page_source)
-        except Exception as e:
-            print(f"ERROR: Failed to write page source debug file: {e}")
-        try:
-            driver.save_screenshot("google_screenshot_debug.png")
-        except Exception as e:
-            print(f"ERROR: Could not save screenshot: {e}")
-
-    for idx, result in enumerate(search_results):
-        try:
-            # Extract title
-            try:
-                title_elem = result.find_element(By.CSS_SELECTOR, 'h3')
-                title = clean_text(title_elem.text)
-            except Exception as e:
-                print(f"DEBUG: [{idx}] No title found in result block: {e}")
-                title_elem = None
-                title = None
-
-            # Extract URL
-            source_url = None
-            try:
-                if title_elem:
-                    parent_links = title_elem.find_elements(By.XPATH, "./ancestor::a[1]")
-                    if parent_links:
-                        source_url = parent_links[0].get_attribute("href")
-            except Exception as e:
-                print(f"DEBUG: [{idx}] Failed to extract parent link for URL: {e}")
-
-            # Extract description/snippet
-            description = None
-            # Try multiple selectors in order, each with its own try/except:
-            try:
-                snippet_elem = result.find_element(By.CSS_SELECTOR, 'div.IsZzjf span')
-                description = clean_text(snippet_elem.text)
-            except Exception:
-                try:
-                    snippet_elem = result.find_element(By.CSS_SELECTOR, 'div.VwiC3b span')
-                    description = clean_text(snippet_elem.text)
-                except Exception:
-                    try:
-                        snippet_elem = result.find_element(By.CSS_SELECTOR, 'span.aCOpRe')
-                        description = clean_text(snippet_elem.text)
-                    except Exception:
-                        pass  # No description found
-
-            # Double-check for Google internal links and missing data
-            if title and source_url and "google.com/search?" not in source_url:
-                now = datetime.now(timezone.utc)
-                item = {
-                    "id": str(uuid.uuid4()),
-                    "source_id": f"Google Search_{uuid.uuid4().hex}",
-                    "title": title,
-                    "description": description,
-                    "deadline": None,
-                    "opportunity_type": "Opportunité Entrepreneuriale",
-                    "sector": None,
-                    "stage": None,
-                    "amount": None,
-                    "source_url": source_url,
-                    "scraped_at": now,
-                    "updated_at": now,
-                    "eligibility_criteria": None,
-                    "publication_date": None,
-                    "source": "Google Search"
-                }
-                results.append(item)
-                print(f"DEBUG: Successfully processed item ({idx}): Title='{item['title']}' URL='{item['source_url']}'")
-            else:
-                print(f"DEBUG: Skipping result ({idx}) (no title/URL or internal Google link): {title} - {source_url}")
-        except Exception as e:
-            print(f"ERROR: Failed to extract data from a search result block [{idx}]: {e}")
-            # For deep debug, uncomment to dump block HTML:
-            # try: print(result.get_attribute('outerHTML')) except: pass
-    return results
+        if metrics is not None:
+            metrics.inc("errors_total", kind="timeout", **METRICS_LABELS)
+        dump_debug(driver)
+        return [], None
+
+    # One page_source snapshot, parsed locally (see google_results.py for the selector fallbacks)
+    html = driver.page_source
+    started, cpu_started = time.perf_counter(), time.thread_time()
+    results = parse_results(html)
+    if metrics is not None:
+        metrics.observe("parse_cpu_seconds", time.thread_time() - cpu_started, **METRICS_LABELS)
+        metrics.inc("response_bytes_total", len(html.encode()), **METRICS_LABELS)
+    print(f"DEBUG: Extracted {len(results)} results in {(time.perf_counter() - started) * 1000:.1f} ms.")
+
+    if not results:
+        print("WARNING: Found 0 search results. Dumping page source for debugging.")
+        dump_debug(driver)
+    return results, html
+
+def build_items(results):
+    items = [build_item(result) for result in results]
+    for idx, item in enumerate(items):
+        print(f"DEBUG: Successfully processed item ({idx}): Title='{item['title']}' URL='{item['source_url']}'")
+    return items
+
+def extract_results(driver):
+    return build_items(read_page(driver)[0])
+
+def is_blocked(driver):
+    return "captcha" in driver.current_url or "/sorry/" in driver.current_url
+
+def fetch_page(driver, task, cache=None, metrics=None):
+    """Load one (query, page) task in ``driver`` and return its items (runs on a pool worker)."""
+    print(f"DEBUG: Navigating to Google Search: {task.url}")
+    started = time.perf_counter()
+    driver.get(task.url)
+    if metrics is not None:
+        metrics.observe("request_latency_seconds", time.perf_counter() - started, **METRICS_LABELS)
+    # CAPTCHA/Blocker check: the pool restarts this worker's browser and retries the task
+    if is_blocked(driver):
+        if metrics is not None:
+            metrics.inc("errors_total", kind="blocked", **METRICS_LABELS)
+        raise BlockedError(f"CAPTCHA or blocking page for '{task.query}' page {task.page + 1}")
+    results, html = read_page(driver, metrics)
+    if cache is not None and html is not None:
+        cache.put(task.query, task.page, task.locale, results, html)
+    return build_items(results)
+
+def plan_tasks(args, cache, pool):
+    """Tasks that need a browser; fresh cached pages are yielded as ``(task, items)`` instead."""
+    if args.refresh_stale:
+        return [SearchTask(query, page, locale) for query, page, locale in cache.stale_keys(args.locale)], []
+    tasks, cached = [], []
+    for task in BrowserPool.plan(load_queries(args), args.pages, args.locale):
+        entry = cache.get(task.query, task.page, task.locale) if cache else None
+        if entry is None or not entry.fresh:
+            tasks.append(task)
+            continue
+        if not entry.results:
+            pool.exhausted.add(task.query)
+        cached.append((task, build_items(entry.results)))
+    return tasks, cached
+
+def load_queries(args):
+    if not args.queries_file:
+        return SEARCH_QUERIES
+    with open(args.queries_file, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape Google result pages into the opportunities table.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("GOOGLE_SCRAPER_WORKERS", "2")),
+                        help="number of headless browsers")
+    parser.add_argument("--pages", type=int, default=3, help="result pages per query")
+    parser.add_argument("--queries-file", help="file with one query per line (default: SEARCH_QUERIES)")
+    parser.add_argument("--locale", default=os.getenv("GOOGLE_SEARCH_LOCALE", "fr"), help="Google hl= parameter")
+    parser.add_argument("--cache-path", default=os.getenv("GOOGLE_SEARCH_CACHE_PATH", DEFAULT_CACHE_PATH))
+    parser.add_argument("--cache-ttl", type=float, default=float(os.getenv("GOOGLE_SEARCH_CACHE_TTL", "24")),
+                        help="hours before a cached page is re-queried")
+    parser.add_argument("--no-cache", action="store_true", help="always query the engine")
+    parser.add_argument("--refresh-stale", action="store_true",
+                        help="only re-query cached pages whose TTL has expired")
+    parser.add_argument("--metrics-dir", default=os.getenv("GOOGLE_SCRAPER_METRICS_DIR", DEFAULT_METRICS_DIR),
+                        help="where to write google_search.prom and google_search.json")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else SearchCache(args.cache_path, ttl=args.cache_ttl * 3600)
+    if args.refresh_stale and cache is None:
+        parser.error("--refresh-stale needs the cache")
+
+    metrics = MetricsRegistry()
     pipeline = PostgresUpsertPipeline()
     pipeline.open_spider(None)
-    driver = setup_driver()
+    pool = BrowserPool(setup_driver, functools.partial(fetch_page, cache=cache, metrics=metrics),
+                       workers=args.workers)
     try:
-        for query in SEARCH_QUERIES:
-            # Use urllib.parse.quote to encode the query safely
-            search_url = f"https://www.google.com/search?q={urllib.parse.quote(query)}"
-            print(f"DEBUG: Navigating to Google Search: {search_url}")
-            driver.get(search_url)
-            pages_scraped = 0
-
-            while pages_scraped < 3:
-                # Explicit wait after page load and before scraping
-                try:
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, 'div.g'))
-                    )
-                except TimeoutException:
-                    print("WARNING: Timeout waiting for Google results container (pagination). Dumping page source.")
-                    try:
-                        with open("google_page_source_debug.html", "w", encoding="utf-8") as f:
-                            f.write(driver.page_source)
-                    except Exception as e:
-                        print(f"ERROR: Failed to write page source debug file: {e}")
-                    try:
-                        driver.save_screenshot("google_screenshot_debug.png")
-                    except Exception as e:
-                        print(f"ERROR: Could not save screenshot: {e}")
-                    break
-
-                # Add a very small randomized sleep to avoid appearing too robotic.
-                time.sleep(random.uniform(0.5, 1.0))
-
-                # CAPTCHA/Blocker check
-                if "captcha" in driver.current_url or "Sorry..." in driver.page_source:
-                    print("WARNING: Google CAPTCHA or blocking page detected. Stopping.")
-                    break
-
-                print(f"DEBUG: Scraping page {pages_scraped+1} for query '{query}'")
-                items = extract_results(driver)
-                for item in items:
-                    pipeline.process_item(item, None)
-                pages_scraped += 1
-
-                # Pagination
-                try:
-                    next_btns = driver.find_elements(By.CSS_SELECTOR, "a#pnnext")
-                    if not next_btns:
-                        print("DEBUG: No 'Next' button found. Ending pagination.")
-                        break
-                    print("DEBUG: Clicking 'Next' button to go to next results page.")
-                    next_btns[0].click()
-                    # Wait for results container to appear again after pagination
-                    try:
-                        WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, 'div.g'))
-                        )
-                    except TimeoutException:
-                        print("WARNING: Timeout after clicking 'Next'. Dumping page source.")
-                        try:
-                            with open("google_page_source_debug.html", "w", encoding="utf-8") as f:
-                                f.write(driver.page_source)
-                        except Exception as e:
-                            print(f"ERROR: Failed to write page source debug file: {e}")
-                        try:
-                            driver.save_screenshot("google_screenshot_debug.png")
-                        except Exception as e:
-                            print(f"ERROR: Could not save screenshot: {e}")
-                        break
-                    time.sleep(random.uniform(0.5, 1.0))
-                except Exception as e:
-                    print(f"ERROR: Failed to click 'Next' button: {e}")
-                    break
+        tasks, cached = plan_tasks(args, cache, pool)
+        metrics.inc("cache_hits_total", len(cached), **METRICS_LABELS)
+        print(f"DEBUG: {len(cached)} pages served from cache, {len(tasks)} to query.")
+        # Items arrive on this thread, so the pipeline's single session is never shared
+        for task, items in itertools.chain(cached, pool.run(tasks)):
+            print(f"DEBUG: Scraped page {task.page + 1} for query '{task.query}': {len(items)} items")
+            metrics.inc("items_total", len(items), **METRICS_LABELS)
+            for item in items:
+                started = time.perf_counter()
+                pipeline.process_item(item, None)
+                metrics.observe("upsert_latency_seconds", time.perf_counter() - started,
+                                spider=METRICS_LABELS["spider"])
+                metrics.inc("upsert_rows_total", spider=METRICS_LABELS["spider"])
     except Exception as e:
+        metrics.inc("errors_total", kind="run", **METRICS_LABELS)
         print(f"ERROR: Error navigating or processing pages: {e}")
     finally:
-        driver.quit()
         pipeline.close_spider(None)
+        if cache is not None:
+            cache.close()
+        metrics.inc("errors_total", len(pool.failed), kind="failed_page", **METRICS_LABELS)
+        metrics.inc("browser_restarts_total", pool.restarts, **METRICS_LABELS)
+        metrics.write(os.path.join(args.metrics_dir, "google_search.prom"),
+                      os.path.join(args.metrics_dir, "google_search.json"))
+        print(f"DEBUG: Browser restarts: {pool.restarts}, failed pages: {len(pool.failed)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,86 @@
+"""
+On-disk cache of search result pages for ``google_search_scraper.py``.
+
+Entries are keyed by (query, page, locale) and hold the extracted results
+(the ``google_results.parse_results`` dicts) plus the raw HTML, zlib
+compressed so a page can be re-parsed offline after a selector change. An
+entry is fresh for ``ttl`` seconds after it was fetched; fresh pages are
+served without opening a browser, and ``stale_keys`` lists the expired ones
+for a "refresh stale only" run.
+
+The SQLite connection is shared by the pool's worker threads, so every
+access goes through one lock.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import NamedTuple
+
+
+class CacheEntry(NamedTuple):
+    results: list
+    fetched_at: float
+    fresh: bool
+
+
+class SearchCache:
+    def __init__(self, path, ttl=7 * 24 * 3600, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " query TEXT, page INTEGER, locale TEXT, fetched_at REAL,"
+            " results TEXT, html BLOB, PRIMARY KEY (query, page, locale))"
+        )
+        self.db.commit()
+
+    def get(self, query, page, locale=""):
+        """The cached entry for a key (fresh or not), or None."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT results, fetched_at FROM search_cache"
+                " WHERE query = ? AND page = ? AND locale = ?",
+                (query, page, locale or ""),
+            ).fetchone()
+        if row is None:
+            return None
+        results, fetched_at = row
+        return CacheEntry(json.loads(results), fetched_at, self.clock() - fetched_at < self.ttl)
+
+    def html(self, query, page, locale=""):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT html FROM search_cache WHERE query = ? AND page = ? AND locale = ?",
+                (query, page, locale or ""),
+            ).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row and row[0] else None
+
+    def put(self, query, page, locale, results, html=None):
+        compressed = zlib.compress(html.encode("utf-8")) if html else None
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO search_cache"
+                " (query, page, locale, fetched_at, results, html) VALUES (?, ?, ?, ?, ?, ?)",
+                (query, page, locale or "", self.clock(), json.dumps(results, ensure_ascii=False), compressed),
+            )
+            self.db.commit()
+
+    def stale_keys(self, locale=None):
+        """(query, page, locale) of every expired entry, oldest first."""
+        sql = "SELECT query, page, locale FROM search_cache WHERE fetched_at <= ?"
+        params = [self.clock() - self.ttl]
+        if locale is not None:
+            sql += " AND locale = ?"
+            params.append(locale)
+        with self.lock:
+            return self.db.execute(sql + " ORDER BY fetched_at", params).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -6,15 +6,60 @@ NEWSPIDER_MODULE = "deep_research.spiders"
 # Core defaults so we don't have to duplicate them inside each spider:
 RETRY_ENABLED = True
 DOWNLOAD_DELAY = 1
-AUTOTHROTTLE_ENABLED = True
+# Per-domain AIMD rates (AdaptiveConcurrencyMiddleware) replace AutoThrottle,
+# which would otherwise fight over each slot's delay.
+AUTOTHROTTLE_ENABLED = False
+ADAPTIVE_CONCURRENCY_ENABLED = True
+ADAPTIVE_CONCURRENCY_START = 2
+ADAPTIVE_CONCURRENCY_MAX = 16
+CONCURRENT_REQUESTS_PER_DOMAIN = 16
 
 ITEM_PIPELINES = {
-    "deep_research.pipelines.PostgresUpsertPipeline": 300,
+    "deep_research.pipelines.ThreadedUpsertPipeline": 300,
 }
 
+# DB writes run on a worker pool; crawling pauses once this many are pending
+UPSERT_THREADS = 4
+UPSERT_MAX_PENDING = 16
+
+# Saved-search alerts (US008): match upserted items against saved searches
+ALERTS_ENABLED = False
+ALERTS_BATCH_SIZE = 200
+ALERTS_INDEX_REFRESH = 300
+
 DOWNLOADER_MIDDLEWARES = {
     "deep_research.spiders.user_agent_rotation.UserAgentRotationMiddleware": 400,
+    "deep_research.spiders.conditional_cache.ConditionalRequestMiddleware": 450,
+    # Above RetryMiddleware (550) so 429/5xx are seen before being retried
+    "deep_research.spiders.adaptive_concurrency.AdaptiveConcurrencyMiddleware": 560,
+}
+
+# Remember ETag/Last-Modified/body hash of listing pages between crawls
+CONDITIONAL_CACHE_ENABLED = True
+CONDITIONAL_CACHE_PATH = "conditional_cache.sqlite"
+
+# Per-source latency/throughput metrics: Prometheus textfile + JSON run summary
+METRICS_ENABLED = True
+METRICS_TEXTFILE = "metrics/%(spider)s.prom"
+METRICS_SUMMARY = "metrics/%(spider)s.json"
+METRICS_INTERVAL = 60
+EXTENSIONS = {
+    "deep_research.komkom_scraper.komkom_scraper.metrics.CrawlMetrics": 500,
+    "deep_research.komkom_scraper.komkom_scraper.alerts.AlertMatcher": 510,
+}
+SPIDER_MIDDLEWARES = {
+    # Above the built-ins (<= 900) so only the callback itself is timed
+    "deep_research.komkom_scraper.komkom_scraper.metrics.ParseTimeMiddleware": 950,
+    # Innermost, so a sampled profile holds the callback and nothing else
+    "deep_research.komkom_scraper.komkom_scraper.profiling.ProfilingMiddleware": 960,
+    # Same instance as the downloader entry; outermost, so a listing's validators
+    # are kept only after every other middleware has handled its callback output
+    "deep_research.spiders.conditional_cache.ConditionalRequestMiddleware": 50,
 }
+# Sampling profiler (off in production); see profiling.py
+PROFILING_ENABLED = False
+PROFILING_SAMPLE_RATE = 0.05
+PROFILING_OUTPUT = "profiles/%(spider)s"
 
 ROBOTSTXT_OBEY = False
 FEED_EXPORT_ENCODING = "utf-8"
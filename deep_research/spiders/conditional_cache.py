@@ -0,0 +1,146 @@
+"""
+Middleware that turns listing-page fetches into conditional requests.
+
+For requests flagged with ``meta["conditional_cache"] = True`` the middleware
+remembers the ETag, Last-Modified and a SHA-1 of the body per URL in a small
+SQLite file that persists across crawls. The next run sends
+``If-None-Match``/``If-Modified-Since``; a 304, or a 200 whose body hashes the
+same as last time, is dropped with ``IgnoreRequest`` so the listing is not
+re-parsed and none of its detail or pagination requests are scheduled.
+
+A listing's new validators ride in its request meta and are only kept once
+its callback output has been fully processed (the middleware is also a
+spider middleware, and both entries share one instance). They are written
+at a clean ``spider_closed`` (reason ``finished``): after a callback error
+or an interrupted crawl, the listing is parsed again next time instead of
+being skipped with its detail pages never fetched.
+
+Settings:
+- CONDITIONAL_CACHE_ENABLED (default False; the deep_research project turns it on
+  in settings.py, where the middleware is listed in both DOWNLOADER_MIDDLEWARES
+  and SPIDER_MIDDLEWARES)
+- CONDITIONAL_CACHE_PATH (default "conditional_cache.sqlite", inside the project's .scrapy dir)
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+import weakref
+
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.utils.project import data_path
+
+VALIDATORS_META = "conditional_cache_validators"
+_middlewares = weakref.WeakKeyDictionary()  # crawler -> ConditionalRequestMiddleware
+
+
+class ConditionalRequestMiddleware:
+    """Send conditional requests for listing pages and skip unchanged ones."""
+
+    def __init__(self, path, stats=None):
+        self.path = path
+        self.stats = stats
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS validators ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,"
+            " body_hash TEXT, fetched_at REAL)"
+        )
+        self.db.commit()
+        self.processed = {}  # url -> validators row of listings whose callback output was consumed
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("CONDITIONAL_CACHE_ENABLED"):
+            raise NotConfigured
+        middleware = _middlewares.get(crawler)
+        if middleware is None:
+            path = data_path(crawler.settings.get("CONDITIONAL_CACHE_PATH", "conditional_cache.sqlite"))
+            # data_path(createdir=True) would create the file's own path as a directory
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            middleware = _middlewares[crawler] = cls(path, stats=crawler.stats)
+            crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def lookup(self, url):
+        return self.db.execute(
+            "SELECT etag, last_modified, body_hash FROM validators WHERE url = ?", (url,)
+        ).fetchone()
+
+    def process_request(self, request, spider):
+        """Attach validators from the previous crawl to flagged requests."""
+        if not request.meta.get("conditional_cache"):
+            return None
+        entry = self.lookup(request.url)
+        if entry:
+            etag, last_modified, _ = entry
+            if etag:
+                request.headers.setdefault("If-None-Match", etag)
+            if last_modified:
+                request.headers.setdefault("If-Modified-Since", last_modified)
+        return None
+
+    def process_response(self, request, response, spider):
+        """Drop 304s and identical bodies; attach new validators to the rest."""
+        if not request.meta.get("conditional_cache"):
+            return response
+        if response.status == 304:
+            self._inc("conditional_cache/not_modified")
+            raise IgnoreRequest(f"Listing not modified (304): {request.url}")
+        if response.status != 200:
+            return response
+
+        body_hash = hashlib.sha1(response.body).hexdigest()
+        entry = self.lookup(request.url)
+        validators = (
+            request.url,
+            self._header(response, "ETag"),
+            self._header(response, "Last-Modified"),
+            body_hash,
+            time.time(),
+        )
+        if entry and entry[2] == body_hash:
+            # Nothing to parse, so nothing left to wait for
+            self.processed[request.url] = validators
+            self._inc("conditional_cache/unchanged_body")
+            raise IgnoreRequest(f"Listing body unchanged: {request.url}")
+        request.meta[VALIDATORS_META] = validators
+        self._inc("conditional_cache/changed")
+        return response
+
+    def process_spider_output(self, response, result, spider):
+        """Keep the listing's validators once everything its callback yielded went through."""
+        yield from result
+        self._processed(response)
+
+    async def process_spider_output_async(self, response, result, spider):
+        async for value in result:
+            yield value
+        self._processed(response)
+
+    def _processed(self, response):
+        validators = response.meta.get(VALIDATORS_META)
+        if validators is not None:
+            self.processed[validators[0]] = validators
+
+    def spider_closed(self, spider, reason):
+        try:
+            if reason == "finished" and self.processed:
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO validators VALUES (?, ?, ?, ?, ?)",
+                    list(self.processed.values()),
+                )
+                self.db.commit()
+        finally:
+            self.db.close()
+
+    @staticmethod
+    def _header(response, name):
+        value = response.headers.get(name)
+        return value.decode("latin-1") if value else None
+
+    def _inc(self, key):
+        if self.stats is not None:
+            self.stats.inc_value(key)
@@ -2,12 +2,9 @@ import scrapy
 import yaml
 import logging
 from deep_research.items import OpportunityItem
-from deep_research.utils.parsers import (
-    clean_text, parse_date, parse_amount, derive_sector
-)
+from deep_research.utils.parsers import extract_amount, derive_sector_and_stage
+from deep_research.utils.selector_plan import compile_sources
 import os
-from urllib.parse import urljoin
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -17,28 +14,38 @@ class GenericOpportunitySpider(scrapy.Spider):
     custom_settings = {
         "RETRY_ENABLED": True,
         "DOWNLOAD_DELAY": 1,
-        "AUTOTHROTTLE_ENABLED": True,
+        "AUTOTHROTTLE_ENABLED": False,
         "ITEM_PIPELINES": {
-            "deep_research.pipelines.PostgresUpsertPipeline": 300,
+            "deep_research.pipelines.ThreadedUpsertPipeline": 300,
         },
         "DOWNLOADER_MIDDLEWARES": {
             "deep_research.spiders.user_agent_rotation.UserAgentRotationMiddleware": 400,
+            "deep_research.spiders.conditional_cache.ConditionalRequestMiddleware": 450,
+            "deep_research.spiders.adaptive_concurrency.AdaptiveConcurrencyMiddleware": 560,
         }
     }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, sources_path=None, **kwargs):
         super().__init__(*args, **kwargs)
-        sources_path = os.path.join(
+        # ``-a sources_path=...`` points the crawl at another config (e.g. benchmark fixtures)
+        sources_path = sources_path or os.path.join(
             os.path.dirname(__file__), "..", "config", "sources.yaml"
         )
         with open(sources_path, "r", encoding="utf-8") as f:
             self.sources = yaml.safe_load(f)
+        # Validate and precompile every source's selectors once; bad config fails here
+        self.plans = compile_sources(self.sources)
         self.ban_counts = {}
 
+    async def start(self):
+        # Scrapy >= 2.13 calls start() and no longer falls back to start_requests()
+        for request in self.start_requests():
+            yield request
+
     def start_requests(self):
         for source in self.sources:
             for url in source["start_urls"]:
-                meta = {"source": source}
+                meta = {"source": source, "conditional_cache": True}
                 yield scrapy.Request(
                     url=url,
                     meta=meta,
@@ -48,25 +55,22 @@ class GenericOpportunitySpider(scrapy.Spider):
 
     def parse_list(self, response):
         source = response.meta["source"]
-        list_selector = source["list_selector"]
-        for elem in response.css(list_selector):
+        plan = self.plans[source["id"]]
+        for card in plan.cards(response):
+            fields = plan.extract(card, response.url)
             item = OpportunityItem()
-            item["source_id"] = source["id"]
-            item["opportunity_type"] = source["type"]
-            item["title"] = clean_text(
-                "".join(elem.css(source["title_selector"]).getall())
-            )
-            item["description"] = clean_text(
-                "".join(elem.css(source["description_selector"]).getall())
-            )
-            raw_link = elem.css(source["link_selector"]).get()
-            item["source_url"] = urljoin(response.url, raw_link) if raw_link else response.url
-            item["deadline"] = parse_date(
-                "".join(elem.css(source["date_selector"]).getall())
+            item["source_id"] = plan.source_id
+            item["opportunity_type"] = plan.opportunity_type
+            item["title"] = fields["title"]
+            item["description"] = fields["description"]
+            item["source_url"] = fields["link"]
+            item["deadline"] = fields["deadline"]
+            item["sector"], item["stage"] = derive_sector_and_stage(
+                item["title"], item["description"]
             )
-            item["sector"] = derive_sector(item["title"], item["description"])
-            item["stage"] = None  # Derivation to be implemented later
-            item["amount"] = parse_amount(item["description"])
+            amount = extract_amount(item["description"])
+            item["amount"] = amount.value if amount else None
+            item["currency"] = amount.currency if amount else None
             yield item
 
     def handle_error(self, failure):
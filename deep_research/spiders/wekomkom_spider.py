@@ -11,11 +11,37 @@ Assumptions:
 - Publication date: span.pub-date::text (may be missing)
 - Pagination: a.next::attr(href)
 - On detail page, eligibility: div.eligibility or h3:-sibling lists, fallback to list
+
+Incremental mode (``scrapy crawl wekomkom -a incremental=1`` or INCREMENTAL_CRAWL=True):
+- Known cards are loaded from the opportunities table once, as 64-bit fingerprints
+  of (id, title, deadline, publication_date); the id is derived from the
+  canonical URL, so tracking parameters or a www. host do not hide a known card.
+- Cards whose fingerprint is known are not followed to their detail page.
+- Pagination stops on the first listing page where every card is known.
 """
 
+import hashlib
+
 import scrapy
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 from deep_research.items import OpportunityItem
-from deep_research.utils.parsers import clean_text, parse_date, parse_amount
+from deep_research.utils.parsers import clean_text, parse_date, extract_amount
+from deep_research.utils.urls import opportunity_id
+
+
+def card_fingerprint(row_id, title, deadline, publication_date):
+    """64-bit fingerprint of the listing-card fields that are also stored in the DB."""
+    key = "\x1f".join(
+        str(value) if value is not None else "" for value in (
+            row_id,
+            title,
+            deadline.isoformat() if deadline else None,
+            publication_date.isoformat() if publication_date else None,
+        )
+    )
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
 
 class WekomkomSpider(scrapy.Spider):
     name = "wekomkom"
@@ -26,8 +52,53 @@ class WekomkomSpider(scrapy.Spider):
         # Use the same pipeline, UA rotation, delays as generic spider (assume settings are global/default)
     }
 
+    def __init__(self, *args, incremental=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.incremental = str(incremental).lower() in ("1", "true", "yes")
+        self.known_cards = None
+        self.skipped_cards = 0
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.incremental = spider.incremental or crawler.settings.getbool("INCREMENTAL_CRAWL")
+        return spider
+
+    def load_known_cards(self, session):
+        """Stream the fingerprints of every stored Wekomkom opportunity into a set."""
+        from deep_research.db import Opportunity
+
+        rows = session.execute(
+            select(
+                Opportunity.id,
+                Opportunity.title,
+                Opportunity.deadline,
+                Opportunity.publication_date,
+            ).where(Opportunity.source_url.like("%wekomkom.com%")),
+            execution_options={"yield_per": 10000},
+        )
+        return {card_fingerprint(*row) for row in rows}
+
+    async def start(self):
+        # Scrapy >= 2.13 calls start() and no longer falls back to start_requests()
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        if self.incremental and self.known_cards is None:
+            from deep_research.db import get_engine
+
+            with Session(get_engine()) as session:
+                self.known_cards = self.load_known_cards(session)
+            self.logger.info(f"Incremental mode: {len(self.known_cards)} known cards loaded")
+        # Listing pages go through ConditionalRequestMiddleware: unchanged ones are skipped
+        for url in self.start_urls:
+            yield scrapy.Request(url, callback=self.parse, meta={"conditional_cache": True})
+
     def parse(self, response):
-        for card in response.css("article.opportunity-card"):
+        cards = response.css("article.opportunity-card")
+        known_on_page = 0
+        for card in cards:
             link = card.css("h2 a::attr(href)").get()
             title = card.css("h2 a::text").get()
             short_desc = card.css("p.summary::text").get()
@@ -46,6 +117,13 @@ class WekomkomSpider(scrapy.Spider):
                 "publication_date": parse_date(pub_date_raw) if pub_date_raw else None,
             }
 
+            if self.known_cards is not None and url and card_fingerprint(
+                opportunity_id(url), meta["title"], meta["deadline"], meta["publication_date"]
+            ) in self.known_cards:
+                known_on_page += 1
+                self.skipped_cards += 1
+                continue
+
             if link:
                 yield response.follow(
                     url,
@@ -72,10 +150,22 @@ class WekomkomSpider(scrapy.Spider):
                 )
                 yield item
 
+        if cards and known_on_page == len(cards):
+            self.logger.info(f"Every card on {response.url} is already known; stopping pagination")
+            return
+
         # pagination
         next_url = response.css("a.next::attr(href)").get()
         if next_url:
-            yield response.follow(response.urljoin(next_url), callback=self.parse)
+            yield response.follow(
+                response.urljoin(next_url),
+                callback=self.parse,
+                meta={"conditional_cache": True},
+            )
+
+    def closed(self, reason):
+        if self.incremental:
+            self.logger.info(f"Incremental mode: skipped {self.skipped_cards} known cards")
 
     def parse_opportunity(self, response):
         # Use meta from list page
@@ -104,7 +194,7 @@ class WekomkomSpider(scrapy.Spider):
 
         # Amount: try to extract from detail page if available
         amount_raw = response.css("span.amount::text, .grant-amount::text").get()
-        amount = parse_amount(amount_raw) if amount_raw else None
+        amount = extract_amount(amount_raw) if amount_raw else None
 
         item = OpportunityItem(
             id=None,
@@ -115,7 +205,8 @@ class WekomkomSpider(scrapy.Spider):
             opportunity_type="accompagnement",
             sector=None,
             stage=None,
-            amount=amount,
+            amount=amount.value if amount else None,
+            currency=amount.currency if amount else None,
             source_url=meta["source_url"],
             scraped_at=None,
             updated_at=None,
@@ -0,0 +1 @@
+# This file makes 'utils' a Python package.
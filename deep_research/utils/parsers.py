@@ -0,0 +1,14 @@
+# Parsers live inside the Scrapy package; re-export them for deep_research
+from deep_research.komkom_scraper.komkom_scraper.utils.parsers import (  # noqa: F401
+    clean_text,
+    parse_date,
+    parse_dates,
+    parse_amount,
+    Amount,
+    extract_amount,
+    extract_amounts,
+    derive_sector,
+    derive_stage,
+    derive_sector_and_stage,
+    tag_sectors,
+)
@@ -0,0 +1,120 @@
+"""
+Precompiled extraction plans for sources.yaml entries.
+
+Each source's CSS selectors are translated to XPath once (with the same
+translator parsel uses for ``Selector.css``) and compiled with lxml, so
+``parse_list`` no longer re-translates five selector strings for every card.
+Configuration problems raise ``SourceConfigError`` when the plan is built,
+i.e. at spider start-up, instead of surfacing per response.
+"""
+
+from urllib.parse import urljoin
+
+from cssselect import SelectorError
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+
+from deep_research.utils.parsers import clean_text, parse_date
+
+REQUIRED_KEYS = (
+    "id", "name", "start_urls", "list_selector", "title_selector",
+    "description_selector", "link_selector", "date_selector", "type",
+)
+OPPORTUNITY_TYPES = ("financement", "accompagnement")
+
+# field name -> (config key, how multiple matches are combined, post-processor)
+FIELDS = {
+    "title": ("title_selector", "join", clean_text),
+    "description": ("description_selector", "join", clean_text),
+    "link": ("link_selector", "first", None),
+    "deadline": ("date_selector", "join", parse_date),
+}
+
+_translator = HTMLTranslator()
+
+
+def _as_text(match):
+    # ::text / ::attr() yield plain strings; bare element selectors serialize like parsel
+    if isinstance(match, str):
+        return match
+    return etree.tostring(match, encoding="unicode", method="html", with_tail=False)
+
+
+class SourceConfigError(ValueError):
+    """Raised when a sources.yaml entry cannot be turned into an extraction plan."""
+
+
+def _compile(source_id, key, css):
+    if not isinstance(css, str) or not css.strip():
+        raise SourceConfigError(f"source {source_id!r}: {key} must be a non-empty string")
+    try:
+        return etree.XPath(_translator.css_to_xpath(css), smart_strings=False)
+    except (SelectorError, etree.XPathError) as exc:
+        raise SourceConfigError(f"source {source_id!r}: invalid {key} {css!r}: {exc}") from exc
+
+
+class ExtractionPlan:
+    """Validated, precompiled extraction rules for one source."""
+
+    def __init__(self, source):
+        missing = [key for key in REQUIRED_KEYS if key not in source]
+        source_id = source.get("id", "<unknown>")
+        if missing:
+            raise SourceConfigError(f"source {source_id!r}: missing keys {', '.join(missing)}")
+        if source["type"] not in OPPORTUNITY_TYPES:
+            raise SourceConfigError(
+                f"source {source_id!r}: type must be one of {', '.join(OPPORTUNITY_TYPES)}"
+            )
+        urls = source["start_urls"]
+        if not isinstance(urls, list) or not urls or not all(
+            isinstance(url, str) and url.startswith(("http://", "https://")) for url in urls
+        ):
+            raise SourceConfigError(f"source {source_id!r}: start_urls must be a list of http(s) URLs")
+
+        self.source = source
+        self.source_id = source_id
+        self.opportunity_type = source["type"]
+        self.list_xpath = _compile(source_id, "list_selector", source["list_selector"])
+        self.fields = [
+            (name, _compile(source_id, key, source[key]), combine, postprocess)
+            for name, (key, combine, postprocess) in FIELDS.items()
+        ]
+
+    def cards(self, response):
+        """Card elements of a listing response (lxml nodes)."""
+        return self.list_xpath(response.selector.root)
+
+    def extract_raw(self, card):
+        """Every field of ``card`` in one pass, before post-processing."""
+        values = {}
+        for name, xpath, combine, _ in self.fields:
+            matches = xpath(card)
+            if combine == "join":
+                values[name] = "".join(_as_text(match) for match in matches)
+            else:
+                values[name] = _as_text(matches[0]) if matches else None
+        return values
+
+    def extract(self, card, base_url):
+        """Every field of ``card``, post-processed; ``link`` is made absolute."""
+        values = self.extract_raw(card)
+        for name, _, _, postprocess in self.fields:
+            if postprocess is not None:
+                values[name] = postprocess(values[name])
+        values["link"] = urljoin(base_url, values["link"]) if values["link"] else base_url
+        return values
+
+
+def compile_sources(sources):
+    """Build one plan per source, failing fast on invalid or duplicate entries."""
+    if not isinstance(sources, list):
+        raise SourceConfigError("sources.yaml must contain a list of sources")
+    plans = {}
+    for source in sources:
+        if not isinstance(source, dict):
+            raise SourceConfigError(f"source entries must be mappings, got {source!r}")
+        plan = ExtractionPlan(source)
+        if plan.source_id in plans:
+            raise SourceConfigError(f"duplicate source id {plan.source_id!r}")
+        plans[plan.source_id] = plan
+    return plans
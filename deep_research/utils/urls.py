@@ -0,0 +1,5 @@
+# URL helpers live inside the Scrapy package; re-export them for deep_research
+from deep_research.komkom_scraper.komkom_scraper.utils.urls import (  # noqa: F401
+    canonicalize_url,
+    opportunity_id,
+)
@@ -0,0 +1,78 @@
+"""Benchmark near-duplicate clustering: upsert cost per row as the table grows.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_clusters.py [--rows N] [--batch N] [--dup-rate R]
+
+Synthetic opportunities are upserted in batches into a temporary SQLite file;
+a share of them (``--dup-rate``) are reworded copies of earlier rows. If the
+LSH lookup is sublinear, ms/row stays flat as the table grows.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from deep_research.komkom_scraper.komkom_scraper.db.db import (
+    Opportunity, bulk_upsert_opportunities, create_tables,
+)
+
+WORDS = ("appel candidatures financement jeunes entrepreneurs agricole sénégal dossier plateforme "
+         "incubateur startups numérique subvention femmes programme accompagnement pme export dakar "
+         "thiès formation innovation prix concours bourse recherche santé énergie solaire").split()
+
+
+def make_text(rng, words=60):
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + f" réf {rng.randrange(10 ** 9)}"
+
+
+def reword(rng, text):
+    words = text.split()
+    for _ in range(3):
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--dup-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    path = os.path.join(tempfile.mkdtemp(), "bench_clusters.sqlite")
+    engine = create_engine(f"sqlite:///{path}", future=True)
+    create_tables(engine)
+    texts = []
+    with Session(engine) as session:
+        for start in range(0, args.rows, args.batch):
+            batch = []
+            for n in range(start, min(start + args.batch, args.rows)):
+                if texts and rng.random() < args.dup_rate:
+                    text = reword(rng, rng.choice(texts))
+                else:
+                    text = make_text(rng)
+                    texts.append(text)
+                batch.append({
+                    "source_id": "bench", "title": text[:40], "description": text,
+                    "opportunity_type": "financement", "source_url": f"https://bench.sn/{n}",
+                })
+            started = time.perf_counter()
+            bulk_upsert_opportunities(session, batch)
+            elapsed = time.perf_counter() - started
+            done = start + len(batch)
+            if done % (args.batch * 10) == 0 or done == args.rows:
+                print(f"{done:>8} rows  {elapsed / len(batch) * 1000:6.2f} ms/row (last batch)")
+        total, clusters = session.execute(
+            select(func.count(), func.count(Opportunity.cluster_id.distinct()))
+        ).one()
+    print(f"{total} rows in {clusters} clusters ({total - clusters} merged as near-duplicates)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Benchmark whole crawls offline: real spiders and pipelines against local fixtures.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_crawl.py [--spiders generic_opportunity wekomkom komkom_wekomkom]
+        [--pages N] [--cards N] [--latency S] [--jitter S] [--error-rate F] [--error-status 503]
+        [--recorded DIR] [--database-url URL] [--set KEY=VALUE ...] [--json results.json]
+
+Starts ``scripts/fixture_server.py`` on a free local port, then runs each
+spider with its project's settings, middlewares and pipelines, in a fresh
+process (a Twisted reactor cannot be restarted, and peak RSS stays per run).
+Items are stored in a new SQLite file unless ``--database-url`` names a
+local Postgres (migrated first). Politeness settings are zeroed
+(DOWNLOAD_DELAY=0, AutoThrottle off) so the numbers measure our code;
+``--set`` overrides any setting, as ``scrapy crawl -s`` does.
+
+Reported per spider: items, items/sec over the crawl, p50/p95 item latency
+(from scheduling the request whose response produced the item until the item
+leaves the pipelines), peak RSS, requests, retries, error log lines and rows
+stored. ``--json`` saves them with the parameters of the run.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import warnings
+
+import yaml
+
+from scripts.fixture_server import KOMKOM_TAGS, FixtureServer, fixture_sources
+
+KOMKOM_PATH = os.path.join(os.path.dirname(__file__), "..", "deep_research", "komkom_scraper")
+
+# name -> (settings module, spider class)
+SPIDERS = {
+    "generic_opportunity": ("deep_research.settings",
+                            "deep_research.spiders.generic_opportunity_spider.GenericOpportunitySpider"),
+    "wekomkom": ("deep_research.settings", "deep_research.spiders.wekomkom_spider.WekomkomSpider"),
+    "komkom_wekomkom": ("komkom_scraper.settings", "komkom_scraper.spiders.wekomkom_spider.WekomkomSpider"),
+}
+BENCH_SETTINGS = {
+    "DOWNLOAD_DELAY": 0,
+    "AUTOTHROTTLE_ENABLED": False,
+    "ROBOTSTXT_OBEY": False,
+    "TELNETCONSOLE_ENABLED": False,
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def spider_kwargs(name, base_url, workdir, pages):
+    if name == "generic_opportunity":
+        path = os.path.join(workdir, "sources.yaml")
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(fixture_sources(base_url, pages), f, allow_unicode=True)
+        return {"sources_path": path}
+    if name == "wekomkom":
+        return {"start_urls": [f"{base_url}/wekomkom/accompagnement"], "allowed_domains": ["127.0.0.1"]}
+    return {
+        "start_urls": [f"{base_url}/komkom/accompagnement?tag={tag}" for tag in KOMKOM_TAGS],
+        "allowed_domains": ["127.0.0.1"],
+    }
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def peak_rss_mib():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # bytes on macOS, KiB elsewhere
+
+
+class ItemLatency:
+    """Time from scheduling a request to each item of its response leaving the pipelines."""
+
+    def __init__(self, crawler):
+        from scrapy import signals
+
+        self.seconds = []
+        crawler.signals.connect(self.request_scheduled, signal=signals.request_scheduled)
+        crawler.signals.connect(self.item_scraped, signal=signals.item_scraped)
+
+    def request_scheduled(self, request, spider):
+        # Retries copy the meta, so their wait counts towards the item
+        request.meta.setdefault("bench_scheduled_at", time.perf_counter())
+
+    def item_scraped(self, item, response, spider):
+        started = response.meta.get("bench_scheduled_at") if response is not None else None
+        if started is not None:
+            self.seconds.append(time.perf_counter() - started)
+
+
+def run_crawl(name, kwargs, database_url, overrides, workdir, conn):
+    """Child process: crawl with ``name`` and send its report through ``conn``."""
+    os.environ["DATABASE_URL"] = database_url
+    settings_module, spider_path = SPIDERS[name]
+    if settings_module.startswith("komkom_scraper"):
+        sys.path.insert(0, KOMKOM_PATH)
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.exceptions import ScrapyDeprecationWarning
+    from scrapy.settings import Settings
+    from scrapy.utils.misc import load_object
+
+    warnings.filterwarnings("ignore", category=ScrapyDeprecationWarning)
+
+    settings = Settings()
+    settings.setmodule(settings_module, priority="project")
+    paths = {
+        "CONDITIONAL_CACHE_PATH": os.path.join(workdir, f"{name}.conditional_cache.sqlite"),
+        "ADAPTIVE_CONCURRENCY_STATE_PATH": os.path.join(workdir, f"{name}.adaptive_concurrency.json"),
+        "METRICS_TEXTFILE": os.path.join(workdir, "%(spider)s.prom"),
+        "METRICS_SUMMARY": os.path.join(workdir, "%(spider)s.json"),
+        "PROFILING_OUTPUT": os.path.join(workdir, "%(spider)s"),
+    }
+    for key, value in {**BENCH_SETTINGS, **paths, **overrides}.items():
+        settings.set(key, value, priority="cmdline")
+
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(load_object(spider_path))
+    latency = ItemLatency(crawler)
+    process.crawl(crawler, **kwargs)
+    process.start()
+
+    stats = crawler.stats.get_stats()
+    elapsed = stats.get("elapsed_time_seconds") or 0.0
+    items = stats.get("item_scraped_count", 0)
+    conn.send({
+        "spider": name,
+        "items": items,
+        "seconds": round(elapsed, 3),
+        "items_per_sec": round(items / elapsed, 1) if elapsed else None,
+        "p50_item_ms": round(percentile(latency.seconds, 0.5) * 1000, 1) if latency.seconds else None,
+        "p95_item_ms": round(percentile(latency.seconds, 0.95) * 1000, 1) if latency.seconds else None,
+        "peak_rss_mib": round(peak_rss_mib(), 1),
+        "requests": stats.get("downloader/request_count", 0),
+        "retries": stats.get("retry/count", 0),
+        "errors": stats.get("log_count/ERROR", 0),
+        "finish_reason": stats.get("finish_reason"),
+    })
+    conn.close()
+
+
+def stored_rows(database_url, base_url):
+    from sqlalchemy import create_engine, func, select
+
+    from deep_research.db import Opportunity
+
+    engine = create_engine(database_url, future=True)
+    host = base_url.split("//", 1)[1]
+    with engine.connect() as connection:
+        count = connection.execute(
+            select(func.count()).select_from(Opportunity).where(Opportunity.source_url.like(f"%{host}%"))
+        ).scalar()
+    engine.dispose()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spiders", nargs="+", choices=list(SPIDERS), default=list(SPIDERS))
+    parser.add_argument("--pages", type=int, default=5, help="listing pages per source")
+    parser.add_argument("--cards", type=int, default=20, help="cards per listing page")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many more seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--recorded", help="directory of saved pages served before generated ones")
+    parser.add_argument("--database-url", help="SQLAlchemy URL (default: a new SQLite file)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Scrapy setting")
+    parser.add_argument("--json", help="write the results here")
+    args = parser.parse_args()
+
+    from deep_research.db import create_tables
+    from sqlalchemy import create_engine
+
+    workdir = tempfile.mkdtemp(prefix="bench_crawl_")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.sqlite')}"
+    engine = create_engine(database_url, future=True)
+    create_tables(engine)
+    engine.dispose()
+    overrides = dict(setting.split("=", 1) for setting in args.set)
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with FixtureServer(
+        pages=args.pages, cards=args.cards, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, error_status=args.error_status, seed=args.seed, recorded=args.recorded,
+    ) as server:
+        print(f"Fixtures on {server.base_url}, work files in {workdir}")
+        print(f"{'spider':<20} {'items':>6} {'items/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'RSS MiB':>8} "
+              f"{'requests':>8} {'retries':>7} {'errors':>6} {'stored':>6}  finish")
+        for name in args.spiders:
+            before = stored_rows(database_url, server.base_url)
+            receiver, sender = context.Pipe(duplex=False)
+            child = context.Process(target=run_crawl, args=(
+                name, spider_kwargs(name, server.base_url, workdir, args.pages),
+                database_url, overrides, workdir, sender,
+            ))
+            child.start()
+            sender.close()
+            try:
+                result = receiver.recv()
+            except EOFError:
+                result = {"spider": name, "failed": True}
+            child.join()
+            result["stored"] = stored_rows(database_url, server.base_url) - before
+            results.append(result)
+            if result.get("failed"):
+                print(f"{name:<20} crawl process failed (exit code {child.exitcode})")
+                continue
+            print(f"{name:<20} {result['items']:>6} {result['items_per_sec'] or 0:>8.1f} "
+                  f"{result['p50_item_ms'] or 0:>8.1f} {result['p95_item_ms'] or 0:>8.1f} "
+                  f"{result['peak_rss_mib']:>8.1f} {result['requests']:>8} {result['retries']:>7} "
+                  f"{result['errors']:>6} {result['stored']:>6}  {result['finish_reason']}")
+        served = dict(sorted(server.statuses.items()))
+    print(f"Responses served by status: {served}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parameters": vars(args), "served": served, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark the layered date parser against plain fuzzy dateutil (parses/sec).
+
+Usage:
+    PYTHONPATH=. python scripts/bench_dates.py [--size N]
+
+The corpus mixes the deadline/publication formats seen on the sources
+(ISO, numeric day-first, French and English month names, relative phrases,
+noise). It is repeated up to ``--size`` strings with a share of unique
+variants, so both the cold and the warm LRU cache are exercised.
+"""
+
+import argparse
+import collections
+import datetime
+import random
+import time
+
+from dateutil import parser as date_parser
+
+from deep_research.komkom_scraper.komkom_scraper.utils import dates
+
+TEMPLATES = [
+    "{y}-{m:02d}-{d:02d}",
+    "Publié le {y}-{m:02d}-{d:02d}T09:00:00",
+    "{d:02d}/{m:02d}/{y}",
+    "Date limite : {d:02d}.{m:02d}.{y}",
+    "{d} {fr} {y}",
+    "Clôture le {d} {fr} {y} à minuit",
+    "avant le {d} {fr}",
+    "1er {fr} {y}",
+    "{en} {d}, {y}",
+    "Deadline: {d}th {en} {y}",
+    "{fr} {y}",
+    "dans {d} jours",
+    "demain",
+    "Candidatures ouvertes en continu",
+    "",
+]
+FR = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet",
+      "août", "septembre", "octobre", "novembre", "décembre"]
+EN = ["January", "February", "March", "April", "May", "June", "July",
+      "August", "September", "October", "November", "December"]
+
+
+def build_corpus(size, unique, seed=7):
+    rng = random.Random(seed)
+    variants = []
+    for _ in range(unique):
+        month = rng.randint(1, 12)
+        variants.append(rng.choice(TEMPLATES).format(
+            y=rng.randint(2023, 2026), m=month, d=rng.randint(1, 28),
+            fr=FR[month - 1], en=EN[month - 1],
+        ))
+    return [rng.choice(variants) for _ in range(size)]
+
+
+def legacy_parse(text):
+    if not text:
+        return None
+    try:
+        return date_parser.parse(text, fuzzy=True).date()
+    except Exception:
+        return None
+
+
+def timed(label, corpus, fn):
+    started = time.perf_counter()
+    for text in corpus:
+        fn(text)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24} {len(corpus):>8} strings  {elapsed:7.3f}s  {len(corpus) / elapsed:12.0f} parses/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--unique", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.size, args.unique)
+    timed("dateutil fuzzy", corpus, legacy_parse)
+    dates._parse.cache_clear()
+    timed("layered (cold cache)", corpus, dates.parse_date)
+    timed("layered (warm cache)", corpus, dates.parse_date)
+
+    started = time.perf_counter()
+    dates.parse_dates(corpus)
+    elapsed = time.perf_counter() - started
+    print(f"{'parse_dates batch':<24} {len(corpus):>8} strings  {elapsed:7.3f}s  {len(corpus) / elapsed:12.0f} parses/sec")
+
+    today = datetime.date.today()
+    stages = collections.Counter(dates.parse_date_detailed(text, today)[1] for text in set(corpus))
+    total = sum(count for stage, count in stages.items() if stage)
+    print("stages over unique strings:", dict(stages))
+    print(f"fallback rate: {stages['fallback'] / total:.1%}")
+
+
+if __name__ == "__main__":
+    main()
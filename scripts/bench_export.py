@@ -0,0 +1,64 @@
+"""Benchmark streaming export: time and peak Python memory against table size.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_export.py [--rows N ...] [--format ndjson|csv|parquet]
+
+Each size is inserted into a temporary SQLite file and exported to a temporary
+file. With streaming, peak memory (tracemalloc) stays flat as rows grow; the
+ORM baseline (``session.query(Opportunity).all()``) grows with the table.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from deep_research.komkom_scraper.komkom_scraper.db.db import Opportunity, create_tables
+from deep_research.komkom_scraper.komkom_scraper.db.export import export_opportunities
+
+DESCRIPTION = "Appel à candidatures pour les jeunes entrepreneurs du Sénégal. " * 8
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 80000, 200000])
+    parser.add_argument("--format", default="ndjson", choices=["ndjson", "csv", "parquet"])
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    for rows in args.rows:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, f'bench_export_{rows}.sqlite')}", future=True)
+        create_tables(engine)
+        with Session(engine) as session:
+            for start in range(0, rows, 10000):
+                session.execute(insert(Opportunity), [{
+                    "id": f"{n:036d}", "source_id": "bench", "title": f"Opportunité {n}",
+                    "description": DESCRIPTION, "opportunity_type": "financement",
+                    "source_url": f"https://bench.sn/{n}",
+                } for n in range(start, min(start + 10000, rows))])
+            session.commit()
+
+            out = os.path.join(tmp, f"export_{rows}.{args.format}")
+            written, elapsed, peak = measure(lambda: export_opportunities(session, out, args.format))
+            print(f"{written:>8} rows  export {elapsed:6.2f} s  peak {peak:7.1f} MiB")
+            session.expunge_all()
+            _, elapsed, peak = measure(lambda: len(session.query(Opportunity).all()))
+            print(f"{'':>8}       ORM .all() {elapsed:6.2f} s  peak {peak:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
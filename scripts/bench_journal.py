@@ -0,0 +1,70 @@
+"""Benchmark the weekly journal build for many users.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_journal.py [--users N] [--opportunities N] [--workers N]
+
+Synthetic opportunities are inserted into a temporary SQLite file, loaded
+once as the week's candidates, then journals are built for ``--users``
+random profiles. Reports load time, build time and journals per second.
+"""
+
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from deep_research.komkom_scraper.komkom_scraper.db.db import Opportunity, create_tables
+from deep_research.komkom_scraper.komkom_scraper.journal import Candidates, build_journals, week_start
+
+SECTORS = ("agritech", "fintech", "santé", "énergie", "éducation", "e-commerce", "transport", "tourisme")
+STAGES = ("idée", "prototype", "lancement", "croissance", "expansion")
+TYPES = ("financement", "accompagnement")
+WORDS = ("appel candidatures financement jeunes entrepreneurs agricole sénégal dossier plateforme "
+         "incubateur startups numérique subvention femmes programme accompagnement pme export").split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--opportunities", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    week = week_start()
+    tmp = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench_journal.sqlite')}", future=True)
+    create_tables(engine)
+    rows = [{
+        "id": f"{n:036d}", "source_id": "bench", "title": " ".join(rng.choices(WORDS, k=8)),
+        "description": " ".join(rng.choices(WORDS, k=120)),
+        "deadline": week + datetime.timedelta(days=rng.randrange(-30, 120)) if rng.random() < 0.8 else None,
+        "opportunity_type": rng.choice(TYPES), "sector": rng.choice(SECTORS), "stage": rng.choice(STAGES),
+        "eligibility_criteria": " ".join(rng.choices(WORDS, k=20)), "source_url": f"https://bench.sn/{n}",
+    } for n in range(args.opportunities)]
+    with Session(engine) as session:
+        session.execute(insert(Opportunity), rows)
+        session.commit()
+
+        started = time.perf_counter()
+        candidates = Candidates.load(session, week)
+        loaded = time.perf_counter() - started
+
+    profiles = [{
+        "user_id": f"user-{n}", "sectors": rng.sample(SECTORS, rng.randint(1, 2)),
+        "opportunity_types": rng.sample(TYPES, rng.randint(1, 2)), "stage": rng.choice(STAGES),
+    } for n in range(args.users)]
+    started = time.perf_counter()
+    written = build_journals(candidates, profiles, os.path.join(tmp, "journals"), args.workers)
+    built = time.perf_counter() - started
+    print(f"{len(candidates)} candidates loaded in {loaded:.2f} s")
+    print(f"{written} journals built in {built:.2f} s ({written / built:.0f} journals/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark vectorized ranking: top-k opportunities for a batch of users.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_ranking.py [--opportunities N] [--users N] [--k K]
+
+Synthetic opportunities are encoded with ``utils.features`` into a
+``FeatureMatrix`` (no database), users get profile weights, and
+``top_k`` scores every candidate for every user. Compare with a per-row
+Python loop over a sample of users to see the gap.
+"""
+
+import argparse
+import datetime
+import random
+import time
+
+import numpy as np
+
+from deep_research.komkom_scraper.komkom_scraper.ranking import FeatureMatrix, profile_weights
+from deep_research.komkom_scraper.komkom_scraper.utils import features
+
+SECTORS = ("agritech", "fintech", "santé", "énergie", "éducation", "e-commerce", "transport", "tourisme")
+STAGES = ("idée", "prototype", "lancement", "croissance", "expansion")
+TYPES = ("financement", "accompagnement")
+WORDS = ("appel candidatures financement jeunes entrepreneurs agricole sénégal dossier plateforme "
+         "incubateur startups numérique subvention femmes programme accompagnement pme export").split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--opportunities", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--k", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    today = datetime.date.today()
+    started = time.perf_counter()
+    matrix = FeatureMatrix(capacity=args.opportunities)
+    matrix.upsert(
+        (f"o{n}", features.pack(features.encode({
+            "title": " ".join(rng.choices(WORDS, k=8)), "description": " ".join(rng.choices(WORDS, k=120)),
+            "sector": rng.choice(SECTORS), "opportunity_type": rng.choice(TYPES), "stage": rng.choice(STAGES),
+            "amount": rng.choice([None, 10 ** rng.randint(5, 9)]),
+        })), today + datetime.timedelta(days=rng.randrange(0, 120)) if rng.random() < 0.8 else None)
+        for n in range(args.opportunities)
+    )
+    print(f"encoded {len(matrix)} opportunities in {time.perf_counter() - started:.2f} s")
+
+    weights = np.stack([profile_weights({
+        "sectors": rng.sample(SECTORS, 2), "opportunity_types": rng.sample(TYPES, 1), "stage": rng.choice(STAGES),
+    }) for _ in range(args.users)])
+    started = time.perf_counter()
+    indices, _ = matrix.top_k(weights, k=args.k, today=today)
+    elapsed = time.perf_counter() - started
+    print(f"top-{args.k} for {len(indices)} users x {len(matrix)} candidates in {elapsed:.2f} s "
+          f"({len(indices) / elapsed:.0f} users/s)")
+
+    sample = weights[:20]
+    rows = [np.concatenate([matrix.data[i], row]) for i, row in enumerate(matrix.proximity(today))]
+    started = time.perf_counter()
+    for user in sample:
+        sorted(range(len(rows)), key=lambda i: -float(user @ rows[i]))[:args.k]
+    per_user = (time.perf_counter() - started) / len(sample)
+    print(f"per-row Python loop: {per_user * 1000:.0f} ms/user (~{per_user * args.users:.0f} s for all users)")
+
+
+if __name__ == "__main__":
+    main()
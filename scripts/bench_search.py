@@ -0,0 +1,118 @@
+"""Benchmark search_opportunities latency (p50/p95) on a generated corpus.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_search.py [--rows 500000] [--queries 200] [--database-url URL]
+
+Without ``--database-url`` the corpus goes to a temporary SQLite file (FTS5
+backend). Pass a PostgreSQL URL of a scratch database to measure the
+tsvector/GIN backend; the generated rows are inserted into its
+``opportunities`` table, so never point it at production.
+"""
+
+import argparse
+import datetime
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from deep_research.komkom_scraper.komkom_scraper.db.db import Opportunity, create_tables
+from deep_research.komkom_scraper.komkom_scraper.db.search import search_opportunities
+
+WORDS = ("appel candidatures financement jeunes entrepreneurs agricole sénégal dossier plateforme "
+         "incubateur startups numérique subvention femmes programme accompagnement pme export dakar "
+         "thiès formation innovation prix concours bourse recherche santé énergie solaire élevage "
+         "pêche artisanat tourisme transformation digitale fonds garantie prêt crédit").split()
+SECTORS = ["agri", "tech", "health", "energy", "education", "environment", "culture", None]
+KEYWORDS = ["financement", "startups numérique", "subvention agricole", "bourse", "femmes entrepreneurs",
+            "énergie solaire", "incubateur dakar", "prêt pme", "concours innovation", "export"]
+
+
+FILLER = [f"mot{n}" for n in range(20000)]
+
+
+def words(rng, count, topical=0.1):
+    # Mostly filler vocabulary, so keywords are as selective as in real listings
+    return " ".join(rng.choice(WORDS) if rng.random() < topical else rng.choice(FILLER) for _ in range(count))
+
+
+def generate(rng, n):
+    today = datetime.date(2025, 1, 1)
+    for i in range(n):
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "source_id": "bench",
+            "title": words(rng, 8, topical=0.3),
+            "description": words(rng, 80),
+            "opportunity_type": rng.choice(["financement", "accompagnement"]),
+            "sector": rng.choice(SECTORS),
+            "amount": rng.choice([None, rng.randrange(1, 500) * 1_000_000]),
+            "deadline": rng.choice([None, today + datetime.timedelta(days=rng.randrange(365))]),
+            "source_url": f"https://bench.sn/op/{i}",
+        }
+
+
+def load(engine, rows, rng, chunk=10000):
+    with Session(engine) as session:
+        existing = session.execute(select(func.count()).select_from(Opportunity)).scalar_one()
+        if existing >= rows:
+            return
+        batch = []
+        for row in generate(rng, rows - existing):
+            batch.append(row)
+            if len(batch) == chunk:
+                session.execute(Opportunity.__table__.insert(), batch)
+                session.commit()
+                batch = []
+        if batch:
+            session.execute(Opportunity.__table__.insert(), batch)
+            session.commit()
+
+
+def random_search(rng):
+    kwargs = {"keywords": rng.choice(KEYWORDS)}
+    if rng.random() < 0.5:
+        kwargs["sector"] = rng.choice(SECTORS[:-1])
+    if rng.random() < 0.3:
+        kwargs["min_amount"] = 50_000_000
+    if rng.random() < 0.3:
+        kwargs["deadline_from"] = datetime.date(2025, 6, 1)
+    kwargs["page"] = rng.choice([1, 1, 1, 2, 5])
+    return kwargs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    url = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_search.sqlite")
+    engine = create_engine(url, future=True)
+    create_tables(engine)
+    rng = random.Random(7)
+    started = time.perf_counter()
+    load(engine, args.rows, rng)
+    print(f"corpus: {args.rows} rows ready in {time.perf_counter() - started:.1f}s ({engine.dialect.name})")
+
+    latencies = []
+    with Session(engine) as session:
+        for _ in range(args.queries):
+            kwargs = random_search(rng)
+            started = time.perf_counter()
+            search_opportunities(session, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{args.queries} searches: p50 {statistics.median(latencies):.1f} ms, "
+          f"p95 {p95:.1f} ms, max {latencies[-1]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Micro-benchmark: per-card parsel CSS vs precompiled extraction plans (cards/sec).
+
+Usage:
+    python scripts/bench_selector_plan.py [--cards N] [--repeat R]
+
+Builds a synthetic listing page for the first sources.yaml entry and times
+raw field extraction (no date/amount parsing) with both approaches.
+"""
+
+import argparse
+import os
+import time
+
+import yaml
+from scrapy.http import HtmlResponse
+
+from deep_research.utils.selector_plan import ExtractionPlan
+
+SOURCES = os.path.join(os.path.dirname(__file__), "..", "deep_research", "config", "sources.yaml")
+
+CARD = """
+<div class="card-opportunity">
+  <h3>Financement PME n°{n}</h3>
+  <div class="body">Appui financier pour PME agro et numérique, lot {n}.</div>
+  <a href="/financement/{n}">Voir</a>
+  <div class="date">{day:02d}/06/2024</div>
+</div>
+"""
+
+
+def build_page(source, cards):
+    body = "".join(CARD.format(n=n, day=n % 28 + 1) for n in range(cards))
+    return HtmlResponse(
+        url=source["start_urls"][0],
+        body=f"<html><body>{body}</body></html>",
+        encoding="utf-8",
+    )
+
+
+def legacy(source, response):
+    rows = []
+    for elem in response.css(source["list_selector"]):
+        rows.append({
+            "title": "".join(elem.css(source["title_selector"]).getall()),
+            "description": "".join(elem.css(source["description_selector"]).getall()),
+            "link": elem.css(source["link_selector"]).get(),
+            "deadline": "".join(elem.css(source["date_selector"]).getall()),
+        })
+    return rows
+
+
+def planned(plan, response):
+    return [plan.extract_raw(card) for card in plan.cards(response)]
+
+
+def bench(label, cards, repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = fn()
+        best = min(best, time.perf_counter() - started)
+    assert len(rows) == cards
+    print(f"{label:<10} {cards:>7} cards  {best:7.3f}s  {cards / best:12.0f} cards/sec")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cards", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(SOURCES, encoding="utf-8") as f:
+        source = yaml.safe_load(f)[0]
+    response = build_page(source, args.cards)
+    response.selector  # parse the document once, outside the timings
+    plan = ExtractionPlan(source)
+
+    old = bench("parsel css", args.cards, args.repeat, lambda: legacy(source, response))
+    new = bench("plan", args.cards, args.repeat, lambda: planned(plan, response))
+    assert old == new, "extraction plan output differs from parsel"
+
+
+if __name__ == "__main__":
+    main()
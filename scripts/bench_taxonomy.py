@@ -0,0 +1,80 @@
+"""Benchmark sector tagging: one Aho-Corasick pass vs. per-keyword substring scans.
+
+Usage:
+    PYTHONPATH=. python scripts/bench_taxonomy.py [--texts N] [--keywords N]
+
+The taxonomy in ``deep_research/config/taxonomy.yaml`` is padded with
+synthetic keywords up to ``--keywords`` so the growth of both approaches with
+the taxonomy size is visible.
+"""
+
+import argparse
+import random
+import time
+
+import yaml
+
+from deep_research.komkom_scraper.komkom_scraper.utils.taxonomy import (
+    TAXONOMY_PATH,
+    TaxonomyTagger,
+    fold,
+)
+
+WORDS = ["programme", "appel", "projets", "startups", "financement", "pme", "afrique",
+         "dakar", "accompagnement", "subvention", "incubation", "jeunes", "femmes"]
+
+
+def load_taxonomy(size, rng):
+    with open(TAXONOMY_PATH, "r", encoding="utf-8") as f:
+        taxonomy = yaml.safe_load(f)
+    labels = list(taxonomy["sectors"])
+    count = sum(len(words) for words in taxonomy["sectors"].values())
+    while count < size:
+        label = rng.choice(labels)
+        taxonomy["sectors"][label].append("kw%05d" % count)
+        count += 1
+    return taxonomy
+
+
+def build_texts(taxonomy, size, rng):
+    keywords = [word.rstrip("*") for words in taxonomy["sectors"].values() for word in words]
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(60)) + " " + rng.choice(keywords)
+        for _ in range(size)
+    ]
+
+
+def naive_tag(taxonomy, text):
+    text = fold(text)
+    hits = {}
+    for label, words in taxonomy["sectors"].items():
+        count = sum(1 for word in words if fold(word.rstrip("*")) in text)
+        if count:
+            hits[label] = count
+    return hits
+
+
+def timed(label, texts, fn):
+    started = time.perf_counter()
+    for text in texts:
+        fn(text)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<20} {len(texts):>7} texts  {elapsed:7.3f}s  {len(texts) / elapsed:10.0f} texts/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--keywords", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    taxonomy = load_taxonomy(args.keywords, rng)
+    texts = build_texts(taxonomy, args.texts, rng)
+    tagger = TaxonomyTagger(taxonomy)
+    timed("substring scans", texts, lambda text: naive_tag(taxonomy, text))
+    timed("aho-corasick", texts, tagger.tag)
+
+
+if __name__ == "__main__":
+    main()
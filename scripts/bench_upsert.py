@@ -0,0 +1,87 @@
+"""Compare per-item and batched opportunity upserts (rows/sec).
+
+Usage:
+    PYTHONPATH=deep_research/komkom_scraper python scripts/bench_upsert.py [--rows N] [--postgres]
+
+Without ``--postgres`` the benchmark runs against a temporary SQLite file;
+with it, the DB_* environment variables are used (the table is written to,
+so point them at a scratch database).
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+from komkom_scraper.db.db import (
+    Opportunity, get_engine, create_tables, upsert_opportunity, bulk_upsert_opportunities,
+)
+
+
+def make_items(count, run):
+    return [
+        {
+            "id": f"bench-{n}",
+            "source_id": "bench",
+            "title": f"Opportunity {n} ({run})",
+            "description": "Programme d'accompagnement pour startups agro.",
+            "deadline": None,
+            "opportunity_type": "financement",
+            "sector": "agri",
+            "stage": None,
+            "amount": 1000 + n,
+            "source_url": f"https://bench.example.com/op/{n}",
+        }
+        for n in range(count)
+    ]
+
+
+def timed(label, count, fn):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {count:>7} rows  {elapsed:7.2f}s  {count / elapsed:10.1f} rows/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--postgres", action="store_true")
+    args = parser.parse_args()
+
+    if args.postgres:
+        engine = get_engine()
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "bench.sqlite")
+        engine = create_engine(f"sqlite:///{path}", future=True)
+    create_tables(engine)
+    Session = sessionmaker(bind=engine, future=True)
+
+    with Session() as session:
+        def reset():
+            session.execute(delete(Opportunity).where(Opportunity.source_id == "bench"))
+            session.commit()
+
+        def per_item(items):
+            for item in items:
+                upsert_opportunity(session, item)
+
+        def batched(items):
+            for start in range(0, len(items), args.batch_size):
+                bulk_upsert_opportunities(session, items[start:start + args.batch_size])
+
+        inserts, updates = make_items(args.rows, "insert"), make_items(args.rows, "update")
+        for label, write in (("per-item", per_item), (f"batched x{args.batch_size}", batched)):
+            reset()
+            timed(f"{label} insert", args.rows, lambda: write(inserts))
+            timed(f"{label} update", args.rows, lambda: write(updates))
+            timed(f"{label} unchanged", args.rows, lambda: write(updates))
+        reset()
+
+
+if __name__ == "__main__":
+    main()
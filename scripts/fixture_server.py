@@ -0,0 +1,405 @@
+"""Local HTTP server with listing and detail pages for offline crawls.
+
+Usage:
+    PYTHONPATH=. python scripts/fixture_server.py [--port 8000] [--pages N] [--cards N]
+        [--latency S] [--jitter S] [--error-rate F] [--error-status 503] [--recorded DIR]
+
+Pages are generated deterministically (same URL, same HTML) for:
+
+- every ``sources.yaml`` source: ``/src/<id>/list/<page>`` with cards built
+  from the source's own CSS selectors (``fixture_sources`` rewrites the
+  config to point there), for ``generic_opportunity``;
+- ``/wekomkom/accompagnement?page=N`` and ``/wekomkom/opportunite/<n>``,
+  in the markup ``deep_research/spiders/wekomkom_spider.py`` expects;
+- ``/komkom/accompagnement?tag=<tag>&page=N`` and
+  ``/komkom/opportunite/<tag>-<n>``, for the ``komkom_scraper`` project's
+  wekomkom spider.
+
+With ``--recorded DIR``, a saved page is served instead when one exists at
+``DIR/<path>[?query][.html]`` (the layout of ``wget -r -nH -E``).
+
+Each response waits ``latency`` seconds plus up to ``jitter``, and a
+``error_rate`` fraction answers ``error_status``. Both are drawn from a hash
+of (seed, URL, attempt number), so a retried URL may succeed and two runs
+inject the same errors.
+"""
+
+import argparse
+import datetime
+import hashlib
+import html
+import os
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import yaml
+
+SOURCES_PATH = os.path.join(os.path.dirname(__file__), "..", "deep_research", "config", "sources.yaml")
+KOMKOM_TAGS = ("accompagnement", "opportunite")
+
+SECTORS = [
+    "l'agriculture durable", "le numérique", "l'énergie solaire", "la santé",
+    "l'éducation", "la pêche artisanale", "le tourisme", "la transformation agroalimentaire",
+]
+STAGES = ["en phase d'amorçage", "en croissance", "au stade de l'idée", "déjà rentables"]
+KINDS = ["Appel à projets", "Programme d'accélération", "Subvention", "Concours", "Fonds d'appui"]
+MONTHS = [
+    "janvier", "février", "mars", "avril", "mai", "juin",
+    "juillet", "août", "septembre", "octobre", "novembre", "décembre",
+]
+FIRST_DEADLINE = datetime.date(2030, 1, 1)
+
+
+def _unit(*parts):
+    """Deterministic float in [0, 1) for ``parts``."""
+    digest = hashlib.blake2b(":".join(map(str, parts)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+def _date_text(date, n):
+    # Rotate formats so the layered date parser does real work
+    style = n % 3
+    if style == 0:
+        return date.strftime("%d/%m/%Y")
+    if style == 1:
+        return f"{date.day} {MONTHS[date.month - 1]} {date.year}"
+    return date.isoformat()
+
+
+def opportunity(site, n):
+    """Deterministic fake opportunity ``n`` of ``site``."""
+    sector = SECTORS[n % len(SECTORS)]
+    stage = STAGES[n // len(SECTORS) % len(STAGES)]
+    kind = KINDS[n % len(KINDS)]
+    amount = (1 + n % 50) * 500_000
+    deadline = FIRST_DEADLINE + datetime.timedelta(days=n % 365)
+    return {
+        "title": f"{kind} {n} pour {sector}",
+        "summary": f"Financement jusqu'à {amount:,} FCFA pour les startups {stage} dans {sector}.".replace(",", " "),
+        "paragraphs": [
+            f"{site.capitalize()} lance {kind.lower()} n°{n} destiné aux entrepreneurs sénégalais {stage}.",
+            f"Les lauréats reçoivent un appui de {amount:,} FCFA, un mentorat de six mois".replace(",", " ")
+            + f" et un accès au réseau de partenaires dans {sector}.",
+            "Le dossier comprend un plan d'affaires, les statuts de l'entreprise et un budget prévisionnel. " * 3,
+        ],
+        "eligibility": [
+            "Entreprise immatriculée au Sénégal",
+            f"Activité dans {sector}",
+            "Porteur de projet âgé de 18 à 35 ans",
+        ],
+        "amount": f"{amount:,} FCFA".replace(",", " "),
+        "deadline": _date_text(deadline, n),
+        "published": _date_text(deadline - datetime.timedelta(days=60), n + 1),
+    }
+
+
+# Markup generated from sources.yaml selectors ----------------------------------
+
+_STEP = re.compile(r"^([a-zA-Z][\w-]*)?((?:\.[\w-]+)*)$")
+
+
+def _parse_css(css):
+    """``"h2.title a::attr(href)"`` -> ([("h2", ("title",)), ("a", ())], "attr(href)")."""
+    selector, _, pseudo = css.partition("::")
+    steps = []
+    for part in selector.split():
+        match = _STEP.match(part)
+        if not match:
+            raise ValueError(f"Cannot generate markup for selector {css!r}; serve recorded pages instead")
+        steps.append((match.group(1) or "div", tuple(c for c in match.group(2).split(".") if c)))
+    return steps, pseudo
+
+
+class _Node:
+    def __init__(self, tag, classes=()):
+        self.tag = tag
+        self.classes = classes
+        self.attrs = {}
+        self.text = ""
+        self.children = []
+
+    def child(self, step):
+        for node in self.children:
+            if (node.tag, node.classes) == step:
+                return node
+        node = _Node(*step)
+        self.children.append(node)
+        return node
+
+    def render(self):
+        attrs = dict(self.attrs)
+        if self.classes:
+            attrs["class"] = " ".join(self.classes)
+        opening = "".join(f' {key}="{html.escape(value)}"' for key, value in attrs.items())
+        inner = html.escape(self.text) + "".join(node.render() for node in self.children)
+        return f"<{self.tag}{opening}>{inner}</{self.tag}>"
+
+
+def _page(title, body):
+    return (
+        f'<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+        f"</head><body>{body}</body></html>"
+    )
+
+
+def source_listing(source, base_url, page, cards):
+    """Listing page ``page`` of a sources.yaml ``source``, laid out after its selectors."""
+    wrappers, _ = _parse_css(source["list_selector"])
+    root = outer = _Node("main")
+    for step in wrappers[:-1]:
+        outer = outer.child(step)
+    for n in range((page - 1) * cards, page * cards):
+        data = opportunity(source["id"], n)
+        card = _Node(*wrappers[-1])
+        for key, value in (
+            ("title_selector", data["title"]),
+            ("description_selector", data["summary"]),
+            ("link_selector", f"{base_url}/src/{source['id']}/detail/{n}"),
+            ("date_selector", data["deadline"]),
+        ):
+            steps, pseudo = _parse_css(source[key])
+            node = card
+            for step in steps:
+                node = node.child(step)
+            if pseudo.startswith("attr("):
+                node.attrs[pseudo[5:-1]] = value
+            else:
+                node.text = value
+        outer.children.append(card)
+    return _page(source["name"], root.render())
+
+
+def source_detail(source, n):
+    data = opportunity(source["id"], n)
+    paragraphs = "".join(f"<p>{html.escape(p)}</p>" for p in data["paragraphs"])
+    return _page(data["title"], f"<h1>{html.escape(data['title'])}</h1>{paragraphs}")
+
+
+def fixture_sources(base_url, pages, sources_path=SOURCES_PATH):
+    """sources.yaml entries with their start URLs moved to the fixture server."""
+    with open(sources_path, "r", encoding="utf-8") as f:
+        sources = yaml.safe_load(f)
+    return [
+        {**source, "start_urls": [f"{base_url}/src/{source['id']}/list/{page}" for page in range(1, pages + 1)]}
+        for source in sources
+    ]
+
+
+# Wekomkom markup ----------------------------------------------------------------
+
+def wekomkom_listing(base_url, page, pages, cards):
+    items = []
+    for n in range((page - 1) * cards, page * cards):
+        data = opportunity("wekomkom", n)
+        items.append(
+            '<article class="opportunity-card">'
+            f'<h2><a href="/wekomkom/opportunite/{n}">{html.escape(data["title"])}</a></h2>'
+            f'<p class="summary">{html.escape(data["summary"])}</p>'
+            f'<span class="deadline">{data["deadline"]}</span>'
+            f'<span class="pub-date">{data["published"]}</span>'
+            "</article>"
+        )
+    if page < pages:
+        items.append(f'<a class="next" href="/wekomkom/accompagnement?page={page + 1}">Suivant</a>')
+    return _page("Accompagnement", "".join(items))
+
+
+def wekomkom_detail(n):
+    data = opportunity("wekomkom", n)
+    paragraphs = "".join(f"<p>{html.escape(p)}</p>" for p in data["paragraphs"])
+    criteria = "".join(f"<li>{html.escape(c)}</li>" for c in data["eligibility"])
+    return _page(data["title"], (
+        f"<h1>{html.escape(data['title'])}</h1>"
+        f'<div class="description">{paragraphs}</div>'
+        f'<div class="eligibility"><ul>{criteria}</ul></div>'
+        f'<span class="amount">{data["amount"]}</span>'
+    ))
+
+
+KOMKOM_GRID = "grid grid-cols-1 sm:grid-cols-2 md:grid-cols-2 xl:grid-cols-3 gap-4"
+KOMKOM_CARD = "flex flex-col border border-th-gray-dfe bg-white rounded-[20px]"
+KOMKOM_TITLE = "text-th-gray-22 font-bold text-base mb-4 md:my-1 line-clamp-3"
+
+
+def komkom_listing(base_url, tag, page, pages, cards):
+    items = []
+    for n in range((page - 1) * cards, page * cards):
+        data = opportunity(f"komkom-{tag}", n)
+        items.append(
+            f'<div class="{KOMKOM_CARD}" data-url="{base_url}/komkom/opportunite/{tag}-{n}">'
+            f'<h3 class="{KOMKOM_TITLE}">{html.escape(data["title"])}</h3></div>'
+        )
+    body = f'<div class="{KOMKOM_GRID}">{"".join(items)}</div>'
+    if page < pages:
+        body += f'<a class="next-page" href="/komkom/accompagnement?tag={tag}&amp;page={page + 1}">Suivant</a>'
+    return _page("Accompagnement", body)
+
+
+def komkom_detail(tag, n):
+    data = opportunity(f"komkom-{tag}", n)
+    paragraphs = "".join(f"<p>{html.escape(p)}</p>" for p in data["paragraphs"])
+    return _page(data["title"], (
+        f'<h1 class="opportunity-title">{html.escape(data["title"])}</h1>'
+        f'<div class="opportunity-description">{paragraphs}</div>'
+        f'<span class="publication-date">{data["published"]}</span>'
+        f'<span class="application-deadline">{data["deadline"]}</span>'
+        f'<div class="eligibility-criteria">{html.escape(", ".join(data["eligibility"]))}</div>'
+    ))
+
+
+# Server -------------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.fixture.handle(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """Threaded HTTP server for the fixture pages (see module docstring).
+
+        with FixtureServer(pages=5, cards=20, latency=0.05) as server:
+            server.base_url  # http://127.0.0.1:<free port>
+    """
+
+    def __init__(self, pages=5, cards=20, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 seed=0, recorded=None, sources_path=SOURCES_PATH, host="127.0.0.1", port=0):
+        self.pages = pages
+        self.cards = cards
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.seed = seed
+        self.recorded = recorded
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.fixture = self
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.sources = {source["id"]: source for source in fixture_sources(self.base_url, pages, sources_path)}
+        self.lock = threading.Lock()
+        self.attempts = Counter()  # URL -> requests seen
+        self.statuses = Counter()  # status -> responses sent
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fixture-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, request):
+        with self.lock:
+            self.attempts[request.path] += 1
+            attempt = self.attempts[request.path]
+        delay = self.latency + self.jitter * _unit(self.seed, "latency", request.path, attempt)
+        if delay:
+            time.sleep(delay)
+        if self.error_rate and _unit(self.seed, "error", request.path, attempt) < self.error_rate:
+            status, body = self.error_status, _page("Erreur", "<h1>Service indisponible</h1>")
+        else:
+            body = self.recorded_page(request.path) or self.render(request.path)
+            status = 200 if body is not None else 404
+            body = body if body is not None else _page("Introuvable", "<h1>Page introuvable</h1>")
+        payload = body.encode("utf-8")
+        with self.lock:
+            self.statuses[status] += 1
+        request.send_response(status)
+        request.send_header("Content-Type", "text/html; charset=utf-8")
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def recorded_page(self, url):
+        if not self.recorded:
+            return None
+        name = os.path.normpath(url.lstrip("/")) or "index"
+        if name.startswith(".."):
+            return None
+        for candidate in (name, f"{name}.html"):
+            path = os.path.join(self.recorded, candidate)
+            if os.path.isfile(path):
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    return f.read()
+        return None
+
+    def render(self, url):
+        """Generated HTML for ``url`` (path and query), or None for a 404."""
+        parts = urlsplit(url)
+        query = parse_qs(parts.query)
+        segments = [segment for segment in parts.path.split("/") if segment]
+        try:
+            page = int(query.get("page", ["1"])[0])
+        except ValueError:
+            return None
+        if not 1 <= page <= self.pages:
+            return None
+
+        if len(segments) == 4 and segments[0] == "src" and segments[1] in self.sources:
+            source, kind, number = self.sources[segments[1]], segments[2], segments[3]
+            if kind == "list" and number.isdigit() and 1 <= int(number) <= self.pages:
+                return source_listing(source, self.base_url, int(number), self.cards)
+            if kind == "detail" and number.isdigit():
+                return source_detail(source, int(number))
+        elif segments == ["wekomkom", "accompagnement"]:
+            return wekomkom_listing(self.base_url, page, self.pages, self.cards)
+        elif segments[:2] == ["wekomkom", "opportunite"] and len(segments) == 3 and segments[2].isdigit():
+            return wekomkom_detail(int(segments[2]))
+        elif segments == ["komkom", "accompagnement"]:
+            tag = query.get("tag", ["accompagnement"])[0]
+            if tag in KOMKOM_TAGS:
+                return komkom_listing(self.base_url, tag, page, self.pages, self.cards)
+        elif segments[:2] == ["komkom", "opportunite"] and len(segments) == 3:
+            tag, _, number = segments[2].rpartition("-")
+            if tag in KOMKOM_TAGS and number.isdigit():
+                return komkom_detail(tag, int(number))
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--pages", type=int, default=5, help="listing pages per source")
+    parser.add_argument("--cards", type=int, default=20, help="cards per listing page")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many more seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--recorded", help="directory of saved pages served before generated ones")
+    args = parser.parse_args()
+
+    server = FixtureServer(
+        pages=args.pages, cards=args.cards, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, error_status=args.error_status, seed=args.seed,
+        recorded=args.recorded, host=args.host, port=args.port,
+    )
+    print(f"Serving fixtures on {server.base_url} (Ctrl-C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,8 @@ set -euo pipefail
 : "${DB_NAME:=komkom_news_db}"
 # LOCAL_STATIC_DIR: Dossier pour les fichiers générés localement (peut être ajusté plus tard pour les MP3, etc.)
 : "${LOCAL_STATIC_DIR:=./local_static}"
+# PROFILES_PATH: Profils utilisateurs (JSON lines, un entrepreneur par ligne) pour le journal hebdomadaire.
+: "${PROFILES_PATH:=./users.jsonl}"
 
 
 echo "Creating tables..."
@@ -39,10 +41,18 @@ docker run --rm --network host \
 
 echo "Google Search Scraper run completed."
 
-# --- PROCHAINES ÉTAPES (à ajouter lorsque les modules Episode Builder, API, Frontend seront implémentés) ---
-# echo "Building episode..."
-# # Logic for Episode Builder goes here
-# echo "Episode built."
+echo "Building episode..."
+# Journaux hebdomadaires personnalisés (US003); reprend là où un build interrompu s'est arrêté.
+if [ -f "${PROFILES_PATH}" ]; then
+  python -m deep_research.komkom_scraper.komkom_scraper.journal \
+    --profiles "${PROFILES_PATH}" \
+    --out "${LOCAL_STATIC_DIR}/journals"
+  echo "Episode built."
+else
+  echo "No user profiles at ${PROFILES_PATH}; skipping episode build."
+fi
+
+# --- PROCHAINES ÉTAPES (à ajouter lorsque les modules API, Frontend seront implémentés) ---
 
 # echo "Starting API Backend..."
 # # Logic for FastAPI Backend goes here
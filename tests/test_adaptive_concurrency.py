@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.test import get_crawler
+
+from deep_research.spiders.adaptive_concurrency import (
+    AIMDController, AdaptiveConcurrencyMiddleware, load_state, save_state,
+)
+
+
+def test_additive_increase_per_window_and_multiplicative_decrease():
+    controller = AIMDController(start=2, maximum=8, start_delay=1.0)
+    for _ in range(2):
+        controller.on_success("a.org")
+    assert controller.concurrency("a.org") == 3
+    assert controller.get("a.org")["delay"] == 0.5
+
+    controller.on_backoff("a.org")
+    assert controller.concurrency("a.org") == 1
+    assert controller.get("a.org")["delay"] == 1.0
+    assert controller.concurrency("b.org") == 2, "domains are tracked independently"
+
+
+def test_concurrency_is_capped():
+    controller = AIMDController(start=1, maximum=3)
+    for _ in range(50):
+        controller.on_success("a.org")
+    assert controller.concurrency("a.org") == 3
+
+
+def test_state_round_trips(tmp_path):
+    path = str(tmp_path / "state.json")
+    save_state(path, {"a.org": {"concurrency": 5.0, "delay": 0.25}})
+    assert load_state(path) == {"a.org": {"concurrency": 5.0, "delay": 0.25}}
+    assert load_state(str(tmp_path / "missing.json")) == {}
+
+
+def test_middleware_backs_off_on_ban_signals():
+    slot = SimpleNamespace(concurrency=4, delay=0.0)
+    downloader = SimpleNamespace(
+        slots={"a.org": slot}, get_slot_key=lambda request: "a.org"
+    )
+    crawler = SimpleNamespace(engine=SimpleNamespace(downloader=downloader))
+    controller = AIMDController(start=4, maximum=8)
+    middleware = AdaptiveConcurrencyMiddleware(crawler, controller, None, ["unusual traffic"])
+    spider = SimpleNamespace(logger=SimpleNamespace(warning=lambda msg: None))
+    request = Request("https://a.org/list")
+
+    ok = HtmlResponse(url=request.url, body=b"<p>ok</p>", request=request)
+    middleware.process_response(request, ok, spider)
+    assert slot.concurrency == 4
+
+    for status, body in ((429, b""), (200, b"Our systems detected Unusual Traffic")):
+        response = HtmlResponse(url=request.url, status=status, body=body, request=request)
+        assert middleware.process_response(request, response, spider) is response
+    assert slot.concurrency == 1
+    assert slot.delay >= 1.0
+
+
+def test_from_crawler_opens_the_real_state_path(tmp_path):
+    path = tmp_path / "state" / "adaptive.json"
+    settings = {"ADAPTIVE_CONCURRENCY_ENABLED": True, "ADAPTIVE_CONCURRENCY_STATE_PATH": str(path)}
+    middleware = AdaptiveConcurrencyMiddleware.from_crawler(get_crawler(settings_dict=settings))
+    assert path.parent.is_dir() and not path.exists()
+
+    save_state(middleware.state_path, {"a.org": {"concurrency": 5.0, "delay": 0.25}})
+    reloaded = AdaptiveConcurrencyMiddleware.from_crawler(get_crawler(settings_dict=settings))
+    assert reloaded.controller.get("a.org") == {"concurrency": 5.0, "delay": 0.25}
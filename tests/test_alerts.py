@@ -0,0 +1,147 @@
+import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from komkom_scraper.alerts import AlertIndex, IntervalIndex, enqueue_matches, mark_delivered, pending_alerts
+from komkom_scraper.db.db import AlertFrequency, OpportunityType, SavedSearch, create_tables, get_engine
+
+TODAY = datetime.date(2024, 5, 1)
+
+
+def search(id, **criteria):
+    return SavedSearch(id=id, user_id="u1", frequency=criteria.pop("frequency", AlertFrequency.immediate),
+                       active=True, **criteria)
+
+
+def item(id="o1", **fields):
+    return {"id": id, "title": "Financement des startups agricoles", "description": "Subvention jeunes.",
+            "sector": "agri", "opportunity_type": "financement", **fields}
+
+
+def test_interval_index_stab():
+    index = IntervalIndex()
+    index.add("a", 0, 10)
+    index.add("b", 5, 20)
+    index.add("c", 30, 40)
+    assert sorted(index.stab(7)) == ["a", "b"]
+    assert index.stab(20) == ["b"]
+    assert index.stab(25) == []
+
+
+def test_interval_index_matches_a_scan():
+    import math
+    import random
+
+    rng = random.Random(3)
+    intervals = []
+    index = IntervalIndex()
+    for n in range(300):
+        low = rng.choice([-math.inf, rng.randrange(100)])
+        high = rng.choice([math.inf, low + rng.randrange(30)]) if low != -math.inf else rng.randrange(100)
+        intervals.append((n, low, high))
+        index.add(n, low, high)
+    for point in range(-5, 140):
+        assert sorted(index.stab(point)) == [n for n, low, high in intervals if low <= point <= high]
+    index.add("late", 200, 210)
+    assert set(index.stab(205)) == {n for n, low, high in intervals if low <= 205 <= high} | {"late"}
+
+
+def test_keywords_must_all_match_folded_and_singularized():
+    index = AlertIndex([
+        search("s1", keywords="startup AGRICOLE"),
+        search("s2", keywords="startups santé"),
+        search("s3", keywords="Financement", sector="tech,agri"),
+        search("s4", keywords="financement", sector="tech"),
+    ])
+    assert sorted(index.match(item(), TODAY)) == ["s1", "s3"]
+
+
+def test_filter_only_searches_use_sector_type_and_amount():
+    index = AlertIndex([
+        search("any"),
+        search("agri", sector="agri"),
+        search("type", opportunity_type=OpportunityType.accompagnement),
+        search("small", min_amount=0, max_amount=1000000),
+        search("big", sector="agri", min_amount=1000000),
+    ])
+    assert sorted(index.match(item(amount=5000000), TODAY)) == ["agri", "any", "big"]
+    assert sorted(index.match(item(amount=500), TODAY)) == ["agri", "any", "small"]
+    # Without an amount, only searches with no amount range can match
+    assert sorted(index.match(item(), TODAY)) == ["agri", "any"]
+
+
+def test_deadline_window():
+    index = AlertIndex([search("soon", deadline_within_days=7)])
+    assert index.match(item(deadline=datetime.date(2024, 5, 5)), TODAY) == ["soon"]
+    assert index.match(item(deadline=datetime.date(2024, 6, 1)), TODAY) == []
+    assert index.match(item(deadline=datetime.date(2024, 4, 1)), TODAY) == []
+    assert index.match(item(), TODAY) == []
+
+
+def test_enqueue_is_idempotent_and_grouped_by_frequency():
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    session = sessionmaker(bind=engine, future=True)()
+    session.add_all([
+        search("s1", keywords="startup"),
+        search("s2", sector="agri", frequency=AlertFrequency.daily),
+        search("off", sector="agri"),
+    ])
+    session.query(SavedSearch).filter_by(id="off").update({"active": False})
+    session.commit()
+    index = AlertIndex.load(session)
+    assert sorted(index.searches) == ["s1", "s2"]
+
+    assert enqueue_matches(session, index, [item("o1"), item("o2")], TODAY) == 4
+    assert enqueue_matches(session, index, [item("o1")], TODAY) == 0
+
+    daily = pending_alerts(session, "daily")
+    assert [m.opportunity_id for m in daily["s2"]] == ["o1", "o2"]
+    assert list(pending_alerts(session, AlertFrequency.immediate)) == ["s1"]
+
+    mark_delivered(session, [m.id for m in daily["s2"]])
+    assert pending_alerts(session, "daily") == {}
+
+
+def test_matcher_matches_only_rows_the_upsert_inserted(tmp_path, monkeypatch):
+    from scrapy import Spider
+    from scrapy.utils.test import get_crawler
+    from sqlalchemy import create_engine
+
+    import komkom_scraper.alerts as alerts
+    import komkom_scraper.pipelines as pipelines
+    from komkom_scraper.db.db import AlertMatch
+    from komkom_scraper.utils.urls import opportunity_id
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.sqlite'}", future=True)
+    create_tables(engine)
+    monkeypatch.setattr(alerts, "get_engine", lambda: engine)
+    monkeypatch.setattr(pipelines, "get_engine", lambda: engine)
+    session = sessionmaker(bind=engine, future=True)()
+    session.add(search("s1", keywords="startup"))
+    session.commit()
+
+    crawler = get_crawler(Spider, settings_dict={"ALERTS_ENABLED": True, "ALERTS_BATCH_SIZE": 1})
+    spider = Spider(name="test")
+    matcher = alerts.AlertMatcher.from_crawler(crawler)
+    upsert = pipelines.BatchedUpsertPipeline(batch_size=1, flush_interval=0, signals=crawler.signals)
+    upsert.open_spider(spider)
+
+    def scrape(n, **fields):
+        upsert.process_item({"source_id": "t", "title": "Financement des startups", "description": "Subvention.",
+                             "opportunity_type": "financement", "source_url": f"https://example.sn/{n}",
+                             **fields}, spider)
+
+    scrape(1)
+    scrape(1)  # unchanged re-scrape
+    scrape(2, description="Subvention révisée.")
+    # A search created after o2 was stored must not fire on its updates
+    session.add(search("s2", keywords="financement"))
+    session.commit()
+    matcher.index = None
+    scrape(2, description="Subvention révisée deux fois.")
+    upsert.close_spider(spider)
+    matcher.spider_closed(spider)
+
+    pairs = {(m.saved_search_id, m.opportunity_id) for m in session.query(AlertMatch)}
+    assert pairs == {("s1", opportunity_id("https://example.sn/1")), ("s1", opportunity_id("https://example.sn/2"))}
@@ -0,0 +1,138 @@
+import datetime
+
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+
+from komkom_scraper.db.db import (
+    AlertFrequency, AlertMatch, ChangeOp, Opportunity, OpportunityBucket, OpportunityChange, OpportunityFeedback,
+    bulk_upsert_opportunities, compute_content_hash, create_tables, get_engine,
+)
+from komkom_scraper.db.backfill import backfill_amounts, backfill_features
+from komkom_scraper.utils import features
+
+OLD = datetime.datetime(2024, 1, 1)
+
+
+def logged(session, op=ChangeOp.upsert):
+    return [c.opportunity_id for c in session.query(OpportunityChange).filter_by(op=op).order_by(OpportunityChange.seq)]
+
+
+def test_backfill_amounts_updates_only_changed_rows():
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    session = sessionmaker(bind=engine, future=True)()
+    descriptions = [
+        "Subvention de 15 millions FCFA pour PME",  # legacy parser stored 15
+        "Aucun montant précisé",
+        "Prêt de 10 000 EUR",
+    ]
+    bulk_upsert_opportunities(session, [
+        {
+            "id": f"id{n}",
+            "source_id": "source1",
+            "title": f"Opportunity {n}",
+            "description": description,
+            "opportunity_type": "financement",
+            "amount": 15 if n == 0 else 500 if n == 1 else 10000,
+            "currency": "EUR" if n == 2 else None,
+            "source_url": f"http://example.com/op/{n}",
+        }
+        for n, description in enumerate(descriptions)
+    ])
+    session.execute(update(Opportunity).values(updated_at=OLD))
+    session.commit()
+
+    assert backfill_amounts(session, chunk_size=2) == 1
+
+    rows = {row.id: row for row in session.query(Opportunity)}
+    assert (rows["id0"].amount, rows["id0"].currency) == (15000000, "XOF")
+    assert rows["id1"].amount == 500, "amounts are never cleared"
+    assert rows["id0"].content_hash == compute_content_hash({
+        field: getattr(rows["id0"], field) for field in (
+            "title", "description", "deadline", "opportunity_type", "sector", "stage",
+            "amount", "currency", "eligibility_criteria", "publication_date",
+        )
+    })
+    # The ranking vector's amount bucket follows the new amount
+    assert features.unpack(rows["id0"].features)[features.amount_slot(15000000)] == 1.0
+    assert features.unpack(rows["id0"].features)[features.amount_slot(15)] == 0.0
+    # Only the rewritten row moves and reaches offline clients
+    assert [row_id for row_id, row in sorted(rows.items()) if row.updated_at > OLD] == ["id0"]
+    assert logged(session) == ["id0", "id1", "id2", "id0"]
+
+
+def test_backfill_features_leaves_updated_at_and_the_change_log_alone():
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    session = sessionmaker(bind=engine, future=True)()
+    bulk_upsert_opportunities(session, [
+        {
+            "id": f"id{n}",
+            "source_id": "source1",
+            "title": f"Opportunity {n}",
+            "description": "Description",
+            "opportunity_type": "financement",
+            "source_url": f"http://example.com/op/{n}",
+        }
+        for n in range(3)
+    ])
+    session.execute(update(Opportunity).where(Opportunity.id != "id1").values(features=None, updated_at=OLD))
+    session.commit()
+
+    assert backfill_features(session) == 2
+    assert all(row.features is not None for row in session.query(Opportunity))
+    assert all(row.updated_at == OLD for row in session.query(Opportunity) if row.id != "id1")
+    assert logged(session) == ["id0", "id1", "id2"]
+
+
+def test_backfill_urls_moves_rows_to_canonical_ids_and_merges_duplicates():
+    from komkom_scraper.db.backfill import backfill_urls
+    from komkom_scraper.utils.urls import opportunity_id
+
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    session = sessionmaker(bind=engine, future=True)()
+    urls = [
+        "https://example.com/op/1",  # already canonical, old-style id
+        "http://www.example.com/op/1/?utm_source=newsletter",  # duplicate of the first
+        "HTTP://Example.com/op/2#apply",
+    ]
+    bulk_upsert_opportunities(session, [
+        {
+            "id": f"id{n}",
+            "source_id": "source1",
+            "title": f"Opportunity {n}",
+            "description": "Description",
+            "opportunity_type": "financement",
+            "source_url": url,
+        }
+        for n, url in enumerate(urls)
+    ])
+    session.add_all([
+        AlertMatch(saved_search_id="s1", opportunity_id="id0", frequency=AlertFrequency.daily),
+        AlertMatch(saved_search_id="s1", opportunity_id="id1", frequency=AlertFrequency.daily),
+        AlertMatch(saved_search_id="s2", opportunity_id="id1", frequency=AlertFrequency.daily),
+        OpportunityFeedback(user_id="u1", opportunity_id="id1", liked=True),
+        OpportunityFeedback(user_id="u2", opportunity_id="id2", liked=False),
+    ])
+    session.commit()
+
+    assert backfill_urls(session, chunk_size=2) == (2, 1)
+
+    # Ids follow the canonical URL; source_url stays as fetched
+    rows = {row.id: row for row in session.query(Opportunity)}
+    assert set(rows) == {opportunity_id("https://example.com/op/1"), opportunity_id("https://example.com/op/2")}
+    assert rows[opportunity_id("https://example.com/op/1")].title == "Opportunity 0"
+    assert rows[opportunity_id("https://example.com/op/2")].source_url == "HTTP://Example.com/op/2#apply"
+
+    # References follow the rows; the duplicate's match already held by the kept row is dropped
+    first, second = opportunity_id("https://example.com/op/1"), opportunity_id("https://example.com/op/2")
+    assert sorted((m.saved_search_id, m.opportunity_id) for m in session.query(AlertMatch)) == [
+        ("s1", first), ("s2", first),
+    ]
+    assert sorted((f.user_id, f.opportunity_id) for f in session.query(OpportunityFeedback)) == [
+        ("u1", first), ("u2", second),
+    ]
+    assert {row.cluster_id for row in rows.values()} <= set(rows)
+    assert {b.opportunity_id for b in session.query(OpportunityBucket)} == set(rows)
+    assert backfill_urls(session) == (0, 0)
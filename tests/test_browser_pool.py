@@ -0,0 +1,72 @@
+import threading
+
+from deep_research.scrapers.browser_pool import BlockedError, BrowserPool, SearchTask
+
+
+class FakeDriver:
+    created = 0
+
+    def __init__(self):
+        FakeDriver.created += 1
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+def make_pool(fetch, workers=3):
+    FakeDriver.created = 0
+    return BrowserPool(FakeDriver, fetch, workers=workers, delay=(0, 0), sleep=lambda _: None)
+
+
+def test_search_task_url():
+    assert SearchTask("bourse Sénégal", 0).url == "https://www.google.com/search?q=bourse+S%C3%A9n%C3%A9gal"
+    assert SearchTask("bourse", 2).url.endswith("q=bourse&start=20")
+
+
+def test_pool_streams_results_from_all_tasks():
+    threads = set()
+
+    def fetch(driver, task):
+        threads.add(threading.current_thread().name)
+        return [f"{task.query}-{task.page}"]
+
+    pool = make_pool(fetch)
+    results = dict(pool.run(BrowserPool.plan(["a", "b", "c", "d"], pages=2)))
+    assert sorted(items[0] for items in results.values()) == [
+        "a-0", "a-1", "b-0", "b-1", "c-0", "c-1", "d-0", "d-1",
+    ]
+    assert FakeDriver.created <= 3
+    assert threads <= {"browser-0", "browser-1", "browser-2"}
+
+
+def test_pool_restarts_browser_after_block_and_retries():
+    seen = []
+
+    def fetch(driver, task):
+        seen.append((driver, task.attempt))
+        if task.attempt == 1:
+            raise BlockedError("captcha")
+        return ["ok"]
+
+    pool = make_pool(fetch, workers=1)
+    assert list(pool.run([SearchTask("q", 0)])) == [(SearchTask("q", 0, attempt=2), ["ok"])]
+    assert pool.restarts == 1
+    assert seen[0][0].quit_called and seen[0][0] is not seen[1][0]
+
+
+def test_pool_gives_up_and_skips_exhausted_queries():
+    calls = []
+
+    def fetch(driver, task):
+        calls.append((task.query, task.page))
+        if task.query == "down":
+            raise RuntimeError("chrome crashed")
+        return []
+
+    pool = make_pool(fetch, workers=1)
+    assert list(pool.run(BrowserPool.plan(["empty", "down"], pages=3))) == [
+        (SearchTask("empty", 0), []),
+    ]
+    assert [task.query for task in pool.failed] == ["down"] * 3
+    assert calls.count(("empty", 1)) == 0
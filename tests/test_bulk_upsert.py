@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+from komkom_scraper.db.db import (
+    get_engine, create_tables, bulk_upsert_opportunities, compute_content_hash, Opportunity
+)
+
+
+@pytest.fixture
+def session():
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    Session = sessionmaker(bind=engine, future=True)
+    sess = Session()
+    yield sess
+    sess.close()
+
+
+def make_item(n, **overrides):
+    item = {
+        "id": f"id{n}",
+        "source_id": "source1",
+        "title": f"Opportunity {n}",
+        "description": "Desc",
+        "deadline": None,
+        "opportunity_type": "financement",
+        "sector": "agri",
+        "stage": None,
+        "amount": 1000,
+        "source_url": f"http://example.com/op/{n}",
+    }
+    item.update(overrides)
+    return item
+
+
+def test_bulk_upsert_inserts_and_updates(session):
+    counts = bulk_upsert_opportunities(session, [make_item(n) for n in range(3)])
+    assert counts == {"new": 3, "changed": 0, "unchanged": 0}
+    assert session.query(Opportunity).count() == 3
+
+    counts = bulk_upsert_opportunities(
+        session, [make_item(1, title="Updated Title"), make_item(2)]
+    )
+    assert counts == {"new": 0, "changed": 1, "unchanged": 1}
+    assert session.query(Opportunity).count() == 3
+    row = session.query(Opportunity).filter_by(source_url="http://example.com/op/1").one()
+    assert row.title == "Updated Title"
+
+
+def test_bulk_upsert_skips_unchanged_rows(session):
+    bulk_upsert_opportunities(session, [make_item(1)])
+    before = session.query(Opportunity).one().updated_at
+
+    # Whitespace and numeric representation do not count as changes
+    counts = bulk_upsert_opportunities(session, [make_item(1, description=" Desc ", amount=1000.0)])
+    assert counts["unchanged"] == 1
+    session.expire_all()
+    assert session.query(Opportunity).one().updated_at == before
+
+
+def test_content_hash_is_stored(session):
+    item = make_item(1)
+    bulk_upsert_opportunities(session, [item])
+    assert session.query(Opportunity).one().content_hash == compute_content_hash(item)
+
+
+def test_bulk_upsert_collapses_duplicate_urls(session):
+    items = [make_item(1), make_item(1, title="Last wins")]
+    assert bulk_upsert_opportunities(session, items)["new"] == 1
+    assert session.query(Opportunity).one().title == "Last wins"
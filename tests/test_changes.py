@@ -0,0 +1,112 @@
+import datetime
+import gzip
+import json
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from komkom_scraper.db.backfill import backfill_urls
+from komkom_scraper.db.changes import (
+    InvalidCursorError, changes_since, compact_change_log, decode_cursor, encode_changes,
+)
+from komkom_scraper.db.db import (
+    OpportunityChange, bulk_upsert_opportunities, compute_content_hash, create_tables, get_engine,
+)
+from komkom_scraper.utils.urls import opportunity_id
+
+MONDAY = datetime.date(2024, 5, 6)
+
+
+def oid(n):
+    return opportunity_id(f"https://example.sn/{n}")
+
+
+def item(n, title=None, **fields):
+    return {
+        "id": oid(n),
+        "source_id": "test",
+        "title": title or f"Opportunité {n}",
+        "description": "Appel à candidatures",
+        "opportunity_type": "financement",
+        "source_url": f"https://example.sn/{n}",
+        **fields,
+    }
+
+
+def make_session():
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    return sessionmaker(bind=engine, future=True)()
+
+
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+def test_first_sync_pages_through_everything():
+    session = make_session()
+    bulk_upsert_opportunities(session, [item(n) for n in range(5)])
+    page = changes_since(session, limit=3, today=MONDAY)
+    assert (ids(page.upserted), page.removed, page.has_more) == ([oid(0), oid(1), oid(2)], [], True)
+    page = changes_since(session, page.cursor, limit=3, today=MONDAY)
+    assert (ids(page.upserted), page.has_more) == ([oid(3), oid(4)], False)
+    assert changes_since(session, page.cursor, today=MONDAY).upserted == []
+
+
+def test_delta_has_changes_deletions_and_expirations():
+    session = make_session()
+    bulk_upsert_opportunities(session, [
+        item(1), item(2), item(3, deadline=datetime.date(2024, 5, 8)), item(4),
+        {**item(5), "id": "legacy-5", "source_url": "https://www.example.sn/5/?utm_source=x"},
+    ])
+    cursor = changes_since(session, today=MONDAY).cursor
+
+    bulk_upsert_opportunities(session, [item(1), item(2, "Nouveau titre"), item(6)])
+    bulk_upsert_opportunities(session, [item(2, "Titre final")])
+    backfill_urls(session)  # legacy-5 moves to its canonical URL and id
+    page = changes_since(session, cursor, today=datetime.date(2024, 5, 9))
+    titles = {row["id"]: row["title"] for row in page.upserted}
+    assert titles == {oid(2): "Titre final", oid(6): "Opportunité 6", oid(5): "Opportunité 5"}
+    # legacy-5 was renamed to its canonical id; id3 expired on Wednesday
+    assert sorted(page.removed) == sorted([oid(3), "legacy-5"])
+    assert decode_cursor(page.cursor)[1] == datetime.date(2024, 5, 9)
+
+    payload = json.loads(gzip.decompress(encode_changes(page)))
+    assert payload["fields"][0] == "id" and len(payload["upserted"]) == 3
+    with pytest.raises(InvalidCursorError):
+        changes_since(session, "not-a-cursor")
+
+
+def test_compaction_keeps_the_latest_state():
+    session = make_session()
+    bulk_upsert_opportunities(session, [item(1), item(2)])
+    cursor = changes_since(session, today=MONDAY).cursor
+    for title in ("a", "b", "c"):
+        bulk_upsert_opportunities(session, [item(1, title)])
+    assert compact_change_log(session) == 3
+    assert session.execute(select(func.count()).select_from(OpportunityChange)).scalar() == 2
+    page = changes_since(session, cursor, today=MONDAY)
+    assert [(row["id"], row["title"]) for row in page.upserted] == [(oid(1), "c")]
+
+
+def test_only_rows_actually_written_are_logged():
+    session = make_session()
+    bulk_upsert_opportunities(session, [item(1), item(2)])
+    cursor = changes_since(session, today=MONDAY).cursor
+    changed = [item(1, "Nouveau titre"), item(2, "Autre titre")]
+
+    # Another writer stores the same new content of item 1 between our lookup and our write
+    def concurrent_write(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO opportunities "):
+            cursor.execute("UPDATE opportunities SET content_hash = ? WHERE id = ?",
+                           (compute_content_hash(changed[0]), oid(1)))
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", concurrent_write)
+    try:
+        counts = bulk_upsert_opportunities(session, changed)
+    finally:
+        event.remove(engine, "before_cursor_execute", concurrent_write)
+    assert (counts["changed"], counts["unchanged"], counts.updated) == (1, 1, [oid(2)])
+    assert [row["id"] for row in changes_since(session, cursor, today=MONDAY).upserted] == [oid(2)]
@@ -0,0 +1,122 @@
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from komkom_scraper.db.db import (
+    get_engine, create_tables, bulk_upsert_opportunities, Opportunity, OpportunityBucket
+)
+from komkom_scraper.utils import minhash
+
+CALL = (
+    "La DER/FJ lance un appel à candidatures pour le financement des jeunes entrepreneurs "
+    "du secteur agricole au Sénégal. Les dossiers sont à déposer avant le 30 juin 2024 "
+    "sur la plateforme en ligne, avec un business plan et les pièces administratives."
+)
+
+
+def item(url, title, description):
+    return {
+        "source_id": url,
+        "title": title,
+        "description": description,
+        "opportunity_type": "financement",
+        "source_url": url,
+    }
+
+
+def make_session():
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    return sessionmaker(bind=engine, future=True)()
+
+
+def clusters(session):
+    return {row.source_url: row.cluster_id for row in session.query(Opportunity)}
+
+
+def test_minhash_similarity_tracks_jaccard():
+    a = minhash.signature(CALL)
+    b = minhash.signature(CALL.replace("30 juin", "15 juillet"))
+    c = minhash.signature("Incubateur numérique pour startups fintech à Dakar, promotion 2025.")
+    assert minhash.similarity(a, b) > 0.6
+    assert minhash.similarity(a, c) < 0.2
+    assert minhash.unpack(minhash.pack(a)) == a
+    assert len(set(minhash.band_keys(a)) & set(minhash.band_keys(b))) > 0
+    assert minhash.signature("") is None
+
+
+def test_minhash_signature_matches_the_stored_formula():
+    # Signatures are persisted: the numpy path must give the exact modular values
+    hashes = minhash.shingles(CALL)
+    expected = tuple(
+        min((a * h + b) % minhash._PRIME for h in hashes) & minhash._MAX_HASH
+        for a, b in minhash.PERMUTATIONS
+    )
+    assert minhash.signature(CALL) == expected
+
+
+def test_near_duplicates_share_a_cluster_across_batches():
+    session = make_session()
+    bulk_upsert_opportunities(session, [
+        item("https://wekomkom.com/op/der", "Appel à candidatures DER/FJ", CALL),
+        item("https://incubateur.sn/fintech", "Incubateur fintech",
+             "Incubateur numérique pour startups fintech à Dakar, promotion 2025."),
+    ])
+    bulk_upsert_opportunities(session, [
+        item("https://der.sn/appel", "Appel à candidatures DER FJ",
+             CALL.replace("30 juin 2024", "30/06/2024") + " Contact : info@der.sn"),
+    ])
+    found = clusters(session)
+    assert found["https://der.sn/appel"] == found["https://wekomkom.com/op/der"]
+    assert found["https://incubateur.sn/fintech"] != found["https://wekomkom.com/op/der"]
+    assert session.query(OpportunityBucket).count() == 3 * minhash.BANDS
+
+
+def test_changed_row_keeps_cluster_and_reindexes_buckets():
+    session = make_session()
+    rows = [item("https://a.sn/1", "Appel DER", CALL), item("https://b.sn/1", "Appel DER/FJ", CALL)]
+    bulk_upsert_opportunities(session, rows)
+    before = clusters(session)
+    assert before["https://a.sn/1"] == before["https://b.sn/1"]
+
+    bulk_upsert_opportunities(session, [item("https://b.sn/1", "Appel DER/FJ", CALL + " Mise à jour.")])
+    assert clusters(session) == before
+    assert session.query(OpportunityBucket).count() == 2 * minhash.BANDS
+
+
+def test_backfill_clusters_indexes_legacy_rows():
+    from komkom_scraper.db.backfill import backfill_clusters
+
+    session = make_session()
+    for n, description in enumerate([CALL, CALL + " Dernier rappel.", "Bourse de recherche en santé publique."]):
+        session.add(Opportunity(id=f"id{n}", source_id="legacy", title="Appel", description=description,
+                                opportunity_type="financement", source_url=f"https://legacy.sn/{n}"))
+    session.commit()
+
+    assert backfill_clusters(session, chunk_size=2) == 3
+    found = clusters(session)
+    assert found["https://legacy.sn/0"] == found["https://legacy.sn/1"] == "id0"
+    assert found["https://legacy.sn/2"] == "id2"
+    assert backfill_clusters(session) == 0
+
+
+def test_buckets_written_concurrently_for_the_same_id_do_not_collide():
+    session = make_session()
+    row = item("https://wekomkom.com/op/der", "Appel à candidatures DER/FJ", CALL)
+    bulk_upsert_opportunities(session, [row])
+    stored = [(b.bucket, b.opportunity_id) for b in session.query(OpportunityBucket)]
+
+    # Another writer indexes the same row between our delete and our insert
+    engine = session.get_bind()
+
+    def reinsert(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("DELETE FROM opportunity_lsh_buckets"):
+            cursor.executemany("INSERT INTO opportunity_lsh_buckets (bucket, opportunity_id) VALUES (?, ?)",
+                               stored)
+
+    event.listen(engine, "after_cursor_execute", reinsert)
+    try:
+        counts = bulk_upsert_opportunities(session, [dict(row, description=CALL + " Date limite prolongée.")])
+    finally:
+        event.remove(engine, "after_cursor_execute", reinsert)
+    assert counts["changed"] == 1
+    assert session.query(OpportunityBucket).count() >= minhash.BANDS
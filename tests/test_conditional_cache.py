@@ -0,0 +1,108 @@
+import pytest
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse, Request
+from scrapy.utils.test import get_crawler
+
+from deep_research.spiders.conditional_cache import ConditionalRequestMiddleware
+
+URL = "https://example.com/opportunities"
+
+
+@pytest.fixture
+def middleware(tmp_path):
+    mw = ConditionalRequestMiddleware(str(tmp_path / "cache.sqlite"))
+    yield mw
+    mw.db.close()
+
+
+def listing_request():
+    return Request(URL, meta={"conditional_cache": True})
+
+
+def listing_response(request, body="<html>v1</html>", status=200, headers=None):
+    return HtmlResponse(
+        url=URL, body=body, encoding="utf-8", status=status,
+        headers=headers or {}, request=request,
+    )
+
+
+def finish_crawl(middleware, *responses, reason="finished"):
+    """Consume each response's callback output, then close the crawl."""
+    for response in responses:
+        list(middleware.process_spider_output(response, iter([{"item": 1}]), None))
+    middleware.spider_closed(None, reason)
+    return ConditionalRequestMiddleware(middleware.path)
+
+
+def test_first_fetch_passes_through_and_records_validators(middleware):
+    request = listing_request()
+    assert middleware.process_request(request, None) is None
+    assert b"If-None-Match" not in request.headers
+
+    response = listing_response(request, headers={"ETag": '"abc"'})
+    assert middleware.process_response(request, response, None) is response
+    assert middleware.lookup(URL) is None, "nothing is stored before the callback output is processed"
+
+    next_crawl = finish_crawl(middleware, response)
+    second = listing_request()
+    next_crawl.process_request(second, None)
+    assert second.headers["If-None-Match"] == b'"abc"'
+    next_crawl.db.close()
+
+
+def test_not_modified_and_identical_bodies_are_ignored(middleware):
+    request = listing_request()
+    middleware.process_response(request, listing_response(request), None)
+    middleware = finish_crawl(middleware, listing_response(request))
+
+    with pytest.raises(IgnoreRequest):
+        middleware.process_response(request, listing_response(request, status=304, body=""), None)
+    with pytest.raises(IgnoreRequest):
+        middleware.process_response(request, listing_response(request), None)
+
+    changed = listing_response(request, body="<html>v2</html>")
+    assert middleware.process_response(request, changed, None) is changed
+    middleware.db.close()
+
+
+def test_validators_are_dropped_when_the_callback_or_the_crawl_fails(middleware):
+    request = listing_request()
+    response = listing_response(request, headers={"ETag": '"abc"'})
+    middleware.process_response(request, response, None)
+
+    def failing_callback():
+        yield {"item": 1}
+        raise ValueError("selector changed")
+
+    with pytest.raises(ValueError):
+        list(middleware.process_spider_output(response, failing_callback(), None))
+    middleware = finish_crawl(middleware)
+    assert middleware.lookup(URL) is None
+
+    middleware.process_response(request, response, None)
+    middleware = finish_crawl(middleware, response, reason="shutdown")
+    assert middleware.lookup(URL) is None
+    middleware.db.close()
+
+
+def test_unflagged_requests_are_untouched(middleware):
+    request = Request(URL)
+    response = listing_response(request)
+    assert middleware.process_response(request, response, None) is response
+    assert middleware.process_response(request, response, None) is response
+
+
+def test_from_crawler_creates_the_parent_directory_only(tmp_path):
+    path = tmp_path / "cache" / "conditional.sqlite"
+    crawler = get_crawler(settings_dict={"CONDITIONAL_CACHE_ENABLED": True, "CONDITIONAL_CACHE_PATH": str(path)})
+    mw = ConditionalRequestMiddleware.from_crawler(crawler)
+    mw.db.close()
+    assert path.is_file()
+
+
+def test_from_crawler_shares_one_instance_between_downloader_and_spider_roles(tmp_path):
+    path = tmp_path / "conditional.sqlite"
+    crawler = get_crawler(settings_dict={"CONDITIONAL_CACHE_ENABLED": True, "CONDITIONAL_CACHE_PATH": str(path)})
+    downloader = ConditionalRequestMiddleware.from_crawler(crawler)
+    assert ConditionalRequestMiddleware.from_crawler(crawler) is downloader
+    downloader.db.close()
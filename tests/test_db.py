@@ -35,4 +35,22 @@ def test_upsert_insert_and_update(session):
     upsert_opportunity(session, item2)
     assert session.query(Opportunity).count() == 1
     row = session.query(Opportunity).filter_by(source_url="http://example.com/op/1").first()
-    assert row.title == "Updated Title"
\ No newline at end of file
+    assert row.title == "Updated Title"
+
+def test_upsert_returns_the_id_of_the_row(session):
+    item = {
+        "source_id": "source1",
+        "title": "No id",
+        "description": "Desc",
+        "opportunity_type": "financement",
+        "source_url": "http://example.com/op/2",
+    }
+    new_id = upsert_opportunity(session, item)
+    assert new_id is not None
+    assert session.query(Opportunity).one().id == new_id
+
+    # A variant of the URL is the same row, and keeps the fetched URL for display
+    variant = dict(item, title="Changed", source_url="https://www.example.com/op/2?utm_source=x")
+    assert upsert_opportunity(session, variant) == new_id
+    row = session.query(Opportunity).one()
+    assert (row.title, row.source_url) == ("Changed", "https://www.example.com/op/2?utm_source=x")
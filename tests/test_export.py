@@ -0,0 +1,72 @@
+import csv
+import datetime
+import gzip
+import json
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from komkom_scraper.db.db import bulk_upsert_opportunities, create_tables, get_engine
+from komkom_scraper.db.export import EXPORT_COLUMNS, export_opportunities, export_query, iter_chunks
+
+
+def make_session():
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    session = sessionmaker(bind=engine, future=True)()
+    bulk_upsert_opportunities(session, [
+        {
+            "id": f"id{n}",
+            "source_id": "test",
+            "title": f"Opportunité {n}",
+            "description": "Appel à candidatures",
+            "opportunity_type": "financement" if n % 2 else "accompagnement",
+            "amount": 1500000 if n == 1 else None,
+            "deadline": datetime.date(2024, 5, n + 1),
+            "source_url": f"https://example.sn/{n}",
+        }
+        for n in range(5)
+    ])
+    return session
+
+
+def test_chunks_are_bounded():
+    session = make_session()
+    chunks = list(iter_chunks(session, export_query(), chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+
+
+def test_ndjson_export_with_filters(tmp_path):
+    session = make_session()
+    path = str(tmp_path / "out.ndjson.gz")
+    written = export_opportunities(session, path, "ndjson", chunk_size=1, opportunity_type="financement",
+                                   deadline_from=datetime.date(2024, 5, 2))
+    assert written == 2
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["id"] for row in rows] == ["id1", "id3"]
+    assert rows[0]["amount"] == 1500000
+    assert rows[0]["deadline"] == "2024-05-02"
+    assert rows[0]["opportunity_type"] == "financement"
+    assert list(rows[0]) == EXPORT_COLUMNS
+
+
+def test_csv_export(tmp_path):
+    session = make_session()
+    path = tmp_path / "out.csv"
+    assert export_opportunities(session, str(path), "csv", deadline_to=datetime.date(2024, 5, 2)) == 2
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["title"] for row in rows] == ["Opportunité 0", "Opportunité 1"]
+
+
+def test_parquet_export(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    session = make_session()
+    path = str(tmp_path / "out.parquet")
+    assert export_opportunities(session, path, "parquet", chunk_size=2) == 5
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.column("amount").to_pylist()[1] == 1500000.0
+    assert table.column("deadline").to_pylist()[0] == datetime.date(2024, 5, 1)
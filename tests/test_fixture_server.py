@@ -0,0 +1,58 @@
+import urllib.error
+import urllib.request
+
+from scrapy.http import HtmlResponse, Request
+
+from deep_research.spiders.wekomkom_spider import WekomkomSpider
+from deep_research.utils.selector_plan import compile_sources
+from scripts.fixture_server import FixtureServer, fixture_sources, source_listing, wekomkom_detail, wekomkom_listing
+
+BASE = "http://127.0.0.1:8000"
+
+
+def response(url, body):
+    return HtmlResponse(url, body=body, encoding="utf-8", request=Request(url))
+
+
+def test_source_pages_follow_each_sources_selectors():
+    sources = fixture_sources(BASE, pages=2)
+    for source, plan in zip(sources, compile_sources(sources).values()):
+        page = response(source["start_urls"][1], source_listing(source, BASE, 2, cards=4))
+        fields = [plan.extract(card, page.url) for card in plan.cards(page)]
+        assert len(fields) == 4
+        assert fields[0]["link"] == f"{BASE}/src/{source['id']}/detail/4"
+        assert all(f["title"] and f["description"] and f["deadline"] for f in fields)
+
+
+def test_wekomkom_pages_parse_with_the_spider():
+    spider = WekomkomSpider()
+    listing = response(f"{BASE}/wekomkom/accompagnement?page=1", wekomkom_listing(BASE, 1, pages=2, cards=3))
+    requests = list(spider.parse(listing))
+    assert [r.url for r in requests] == [
+        f"{BASE}/wekomkom/opportunite/0", f"{BASE}/wekomkom/opportunite/1",
+        f"{BASE}/wekomkom/opportunite/2", f"{BASE}/wekomkom/accompagnement?page=2",
+    ]
+    detail = requests[1]
+    page = HtmlResponse(detail.url, body=wekomkom_detail(1), encoding="utf-8", request=detail)
+    item = next(spider.parse_opportunity(page))
+    assert item["deadline"] and item["publication_date"]
+    assert item["amount"] == 1_000_000 and "Sénégal" in item["eligibility_criteria"]
+
+
+def fetch(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as reply:
+            return reply.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+
+
+def test_server_injects_the_same_errors_every_run():
+    def statuses():
+        with FixtureServer(pages=2, cards=2, error_rate=0.5, seed=3) as server:
+            return [fetch(f"{server.base_url}/wekomkom/opportunite/{n}") for n in range(12)]
+
+    first = statuses()
+    assert first == statuses() and {200, 503} == set(first)
+    with FixtureServer(pages=2, cards=2) as server:
+        assert fetch(f"{server.base_url}/wekomkom/accompagnement?page=3") == 404
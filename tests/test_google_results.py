@@ -0,0 +1,43 @@
+from deep_research.scrapers.google_results import parse_results
+
+PAGE = """
+<html><body><div id="search">
+  <div class="g">
+    <div class="g">
+      <a href="https://www.der.sn/appel-a-projets"><h3>Appel à projets DER/FJ</h3></a>
+      <div class="VwiC3b"><span>Financement des jeunes entrepreneurs.</span></div>
+    </div>
+  </div>
+  <div class="g">
+    <a href="/url?q=https://www.adepme.sn/programme&amp;sa=U"><h3><span>Programme</span> ADEPME</h3></a>
+    <span class="aCOpRe">Accompagnement des PME.</span>
+  </div>
+  <div class="g">
+    <a href="https://www.google.com/search?q=related"><h3>Recherches associées</h3></a>
+  </div>
+  <div class="g"><div>Autres questions posées</div></div>
+</div></body></html>
+"""
+
+
+def test_parse_results_with_selector_fallbacks():
+    assert parse_results(PAGE) == [
+        {
+            "title": "Appel à projets DER/FJ",
+            "source_url": "https://www.der.sn/appel-a-projets",
+            "description": "Financement des jeunes entrepreneurs.",
+        },
+        {
+            "title": "Programme ADEPME",
+            "source_url": "https://www.adepme.sn/programme",
+            "description": "Accompagnement des PME.",
+        },
+    ]
+
+
+def test_parse_results_alternate_container():
+    page = '<div class="MjjYud"><a href="https://example.sn/x"><h3>Titre</h3></a></div>'
+    assert parse_results(page) == [
+        {"title": "Titre", "source_url": "https://example.sn/x", "description": None},
+    ]
+    assert parse_results("<html><body>Sorry...</body></html>") == []
@@ -0,0 +1,67 @@
+import datetime
+
+from scrapy.http import HtmlResponse, Request
+from sqlalchemy.orm import sessionmaker
+
+from deep_research.db import get_engine, create_tables, bulk_upsert_opportunities
+from deep_research.spiders.wekomkom_spider import WekomkomSpider, card_fingerprint
+from deep_research.utils.urls import opportunity_id
+
+CARD = """
+<article class="opportunity-card">
+  <h2><a href="/accompagnement/opp-{n}">Accompagnement {n}</a></h2>
+  <p class="summary">Pour startups early-stage.</p>
+  <span class="deadline">2024-07-31</span>
+</article>
+"""
+
+
+def listing(*numbers):
+    cards = "".join(CARD.format(n=n) for n in numbers)
+    body = f'<html><body>{cards}<a class="next" href="/accompagnement?page=2">Suivant</a></body></html>'
+    url = "https://wekomkom.com/accompagnement"
+    return HtmlResponse(url=url, body=body, encoding="utf-8", request=Request(url))
+
+
+def known(*numbers):
+    return {
+        card_fingerprint(
+            opportunity_id(f"https://wekomkom.com/accompagnement/opp-{n}"),
+            f"Accompagnement {n}",
+            datetime.date(2024, 7, 31),
+            None,
+        )
+        for n in numbers
+    }
+
+
+def test_known_cards_are_not_followed():
+    spider = WekomkomSpider(incremental="1")
+    spider.known_cards = known(1)
+    requests = list(spider.parse(listing(1, 2)))
+    urls = [r.url for r in requests]
+    assert "https://wekomkom.com/accompagnement/opp-1" not in urls
+    assert "https://wekomkom.com/accompagnement/opp-2" in urls
+    assert "https://wekomkom.com/accompagnement?page=2" in urls
+
+
+def test_pagination_stops_when_whole_page_is_known():
+    spider = WekomkomSpider(incremental="1")
+    spider.known_cards = known(1, 2)
+    assert list(spider.parse(listing(1, 2))) == []
+
+
+def test_load_known_cards_matches_stored_rows():
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    session = sessionmaker(bind=engine, future=True)()
+    bulk_upsert_opportunities(session, [{
+        "source_id": "wekomkom",
+        "title": "Accompagnement 1",
+        "description": "Desc",
+        "deadline": datetime.date(2024, 7, 31),
+        "opportunity_type": "accompagnement",
+        # Stored as fetched: the fingerprint still matches the canonical card URL
+        "source_url": "https://www.wekomkom.com/accompagnement/opp-1?utm_medium=email",
+    }])
+    assert WekomkomSpider().load_known_cards(session) == known(1)
@@ -0,0 +1,82 @@
+import datetime
+import json
+
+from sqlalchemy.orm import sessionmaker
+
+from komkom_scraper.db.db import Opportunity, bulk_upsert_opportunities, create_tables, get_engine
+from komkom_scraper.journal import Candidates, build_journals, completed_users, select_for, week_start
+
+WEEK = datetime.date(2024, 5, 6)
+
+
+def item(n, sector, opportunity_type="financement", deadline=None, **fields):
+    return {
+        "source_id": "test",
+        "title": f"Opportunité {n}",
+        "description": f"Programme {n} pour les entrepreneurs {sector}.",
+        "opportunity_type": opportunity_type,
+        "sector": sector,
+        "deadline": deadline,
+        "source_url": f"https://example.sn/{n}",
+        **fields,
+    }
+
+
+def load_candidates():
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    session = sessionmaker(bind=engine, future=True)()
+    bulk_upsert_opportunities(session, [
+        item(1, "agritech", deadline=datetime.date(2024, 5, 10), stage="lancement"),
+        item(2, "agritech", "accompagnement"),
+        item(3, "fintech", deadline=datetime.date(2024, 5, 8)),
+        item(4, "fintech", deadline=datetime.date(2024, 4, 1)),  # closed
+        item(5, "santé", "accompagnement", deadline=datetime.date(2024, 7, 1)),
+        item(6, "énergie"),
+        item(7, "énergie", "accompagnement"),
+    ])
+    return Candidates.load(session, WEEK)
+
+
+def titles(candidates, picked):
+    return [candidates.titles[i] for i in picked]
+
+
+def test_week_start_is_monday():
+    assert week_start(datetime.date(2024, 5, 9)) == WEEK
+    assert week_start(WEEK) == WEEK
+
+
+def test_candidates_skip_closed_opportunities():
+    candidates = load_candidates()
+    assert len(candidates) == 6
+    assert "Opportunité 4" not in candidates.titles
+
+
+def test_selection_ranks_profile_matches_and_fills_to_minimum():
+    candidates = load_candidates()
+    picked = select_for(candidates, {"user_id": "u1", "sectors": ["Agritech"],
+                                     "opportunity_types": ["financement"], "stage": "lancement"})
+    assert titles(candidates, picked)[:2] == ["Opportunité 1", "Opportunité 2"]
+    # Other financing offers follow, then the most urgent ones pad to five
+    assert len(picked) == 5
+    assert titles(candidates, picked)[2] == "Opportunité 3"
+    assert len(select_for(candidates, {"user_id": "u2"})) == 5
+
+
+def test_build_journals_resumes_after_crash(tmp_path):
+    candidates = load_candidates()
+    profiles = [{"user_id": f"u{n}", "sectors": "fintech"} for n in range(5)]
+    assert build_journals(candidates, profiles[:3], tmp_path, workers=1, chunk_size=2) == 3
+
+    path = tmp_path / "journal-2024-05-06.jsonl"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"user_id": "u3", "opp')  # interrupted write
+    assert completed_users(path) == {"u0", "u1", "u2"}
+
+    assert build_journals(candidates, profiles, tmp_path, workers=2, chunk_size=2) == 2
+    journals = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert sorted(j["user_id"] for j in journals) == [f"u{n}" for n in range(5)]
+    first = journals[0]
+    assert first["opportunities"][0]["title"] == "Opportunité 3"
+    assert "Date limite : 08/05/2024" in first["text"]
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from scrapy import Request, Spider, signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from komkom_scraper.metrics import CrawlMetrics, MetricsRegistry, ParseTimeMiddleware, upsert_timed
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_registry_renders_prometheus_and_summary(tmp_path):
+    clock = FakeClock()
+    registry = MetricsRegistry(clock=clock)
+    for latency in (0.03, 0.2, 0.2, 4.0):
+        registry.observe("request_latency_seconds", latency, spider="s", source="anpe")
+    registry.inc("items_total", 10, spider="s", source="anpe")
+    registry.inc("errors_total", kind='bad "quote"')
+    clock.now = 5.0
+
+    text = registry.render_prometheus()
+    assert "# TYPE komkom_request_latency_seconds histogram" in text
+    assert 'komkom_request_latency_seconds_bucket{source="anpe",spider="s",le="0.25"} 3' in text
+    assert 'komkom_request_latency_seconds_bucket{source="anpe",spider="s",le="+Inf"} 4' in text
+    assert 'komkom_request_latency_seconds_count{source="anpe",spider="s"} 4' in text
+    assert 'komkom_items_per_second{source="anpe",spider="s"} 2' in text
+    assert 'komkom_errors_total{kind="bad \\"quote\\""} 1' in text
+
+    registry.write(str(tmp_path / "m" / "run.prom"), str(tmp_path / "m" / "run.json"))
+    summary = json.loads((tmp_path / "m" / "run.json").read_text())
+    latency = summary["histograms"]["request_latency_seconds"]["source=anpe,spider=s"]
+    assert (latency["count"], latency["p50"], latency["p95"], latency["max"]) == (4, 0.25, 4.0, 4.0)
+    assert summary["counters"]["items_per_second"]["source=anpe,spider=s"] == 2.0
+    assert (tmp_path / "m" / "run.prom").read_text() == text
+
+
+def test_disabled_by_setting():
+    with pytest.raises(NotConfigured):
+        CrawlMetrics.from_crawler(get_crawler(settings_dict={"METRICS_ENABLED": False}))
+
+
+def test_extension_records_signals(tmp_path):
+    crawler = get_crawler(Spider, settings_dict={
+        "METRICS_ENABLED": True,
+        "METRICS_TEXTFILE": str(tmp_path / "%(spider)s.prom"),
+        "METRICS_SUMMARY": str(tmp_path / "%(spider)s.json"),
+        "METRICS_INTERVAL": 0,
+    })
+    ext = CrawlMetrics.from_crawler(crawler)
+    middleware = ParseTimeMiddleware.from_crawler(crawler)
+    spider = Spider(name="generic")
+    request = Request("https://example.sn/list", meta={"source": {"id": "anpe"}, "download_latency": 0.4})
+    response = HtmlResponse(request.url, body=b"<html>" + b"x" * 100 + b"</html>", request=request)
+
+    crawler.signals.send_catch_log(signals.response_received, response=response, request=request, spider=spider)
+    # Items are labelled by their response's sources.yaml id, never by source_id (a URL for Wekomkom)
+    items = list(middleware.process_spider_output(
+        response, ({"source_id": f"https://example.sn/op/{n}", "n": n} for n in range(3)), spider,
+    ))
+    for item in items:
+        crawler.signals.send_catch_log(signals.item_scraped, item=item, response=response, spider=spider)
+    other = HtmlResponse("https://example.sn/op/9", body=b"<html></html>",
+                         request=Request("https://example.sn/op/9", meta={"source_id": "https://example.sn/op/9"}))
+    crawler.signals.send_catch_log(signals.item_scraped, item={"source_id": other.url}, response=other, spider=spider)
+    crawler.signals.send_catch_log(signals.item_dropped, item={"source_id": other.url}, response=None,
+                                   exception=ValueError(), spider=spider)
+    crawler.signals.send_catch_log(upsert_timed, seconds=0.08, rows=3, spider=spider)
+    ext.spider_closed(spider, "finished")
+
+    summary = json.loads((tmp_path / "generic.json").read_text())
+    labels = "source=anpe,spider=generic"
+    assert summary["counters"]["items_total"] == {labels: 3, "source=generic,spider=generic": 1}
+    assert summary["counters"]["items_dropped_total"] == {"source=generic,spider=generic": 1}
+    assert summary["counters"]["response_bytes_total"][labels] == 113
+    assert summary["counters"]["responses_total"][labels + ",status=200"] == 1
+    assert summary["histograms"]["request_latency_seconds"][labels]["count"] == 1
+    assert summary["histograms"]["parse_cpu_seconds"][labels]["count"] == 1
+    assert summary["histograms"]["upsert_latency_seconds"]["spider=generic"]["sum"] == 0.08
+    assert "komkom_items_total" in (tmp_path / "generic.prom").read_text()
@@ -1,5 +1,7 @@
+import datetime
+
 import pytest
-from deep_research.utils.parsers import parse_date, parse_amount
+from deep_research.utils.parsers import parse_date, parse_dates, parse_amount
 
 def test_parse_date_valid():
     assert parse_date("18 avril 2024") is not None
@@ -12,4 +14,73 @@ def test_parse_date_invalid():
 def test_parse_amount():
     assert parse_amount("Montant: 15 000 000 XOF") == 15000000.0
     assert parse_amount("No amount here") is None
-    assert parse_amount("Budget: 1,200.50 EUR") == 1200.50
\ No newline at end of file
+    assert parse_amount("Budget: 1,200.50 EUR") == 1200.50
+
+def test_parse_date_french_formats():
+    assert parse_date("18 avril 2024") == datetime.date(2024, 4, 18)
+    assert parse_date("Clôture le 1er août 2024") == datetime.date(2024, 8, 1)
+    assert parse_date("Date limite : 15 Février 2025") == datetime.date(2025, 2, 15)
+    assert parse_date("31/07/2024") == datetime.date(2024, 7, 31)
+    assert parse_date("April 18, 2024") == datetime.date(2024, 4, 18)
+    assert parse_date("avant le 30 juin").month == 6
+
+
+def test_parse_date_relative_phrases():
+    today = datetime.date(2024, 1, 31)
+    assert parse_dates(["demain", "dans 2 semaines", "18 avril 2024"], today=today) == [
+        datetime.date(2024, 2, 1),
+        datetime.date(2024, 2, 14),
+        datetime.date(2024, 4, 18),
+    ]
+
+
+def test_parse_date_prefers_absolute_dates_and_rejects_impossible_ones():
+    today = datetime.date(2024, 1, 31)
+    assert parse_date("jusqu'au 30 juin 2024, réponse dans 2 semaines", today) == datetime.date(2024, 6, 30)
+    assert parse_date("31 sept 2024", today) is None
+    assert parse_date("31/09/2024", today) is None
+    assert parse_date("2 mars 24", today) == datetime.date(2024, 3, 2)
+    assert parse_date("avant le 30 juin à 10h", today) == datetime.date(2024, 6, 30)
+    assert parse_date("il y a 3 jours", today) == datetime.date(2024, 1, 28)
+    assert parse_date("2 weeks ago", today) == datetime.date(2024, 1, 17)
+    assert parse_date("Programme de 12 mois", today) is None
+
+
+def test_parse_date_year_less_input_follows_the_given_today():
+    assert parse_date("avant le 30 juin", datetime.date(2024, 1, 31)) == datetime.date(2024, 6, 30)
+    assert parse_date("avant le 30 juin", datetime.date(2025, 1, 31)) == datetime.date(2025, 6, 30)
+
+
+def test_extract_amount_with_currency():
+    from deep_research.utils.parsers import Amount, extract_amount
+    assert extract_amount("15 millions FCFA") == Amount(15000000.0, "XOF")
+    assert extract_amount("Jusqu'à 50 000 € par projet") == Amount(50000.0, "EUR")
+    assert extract_amount("Prix de 1,5 milliard de FCFA") == Amount(1500000000.0, "XOF")
+    assert extract_amount("USD 25,000") == Amount(25000.0, "USD")
+    assert extract_amount("Programme 2024 pour 50 startups") is None
+
+
+def test_taxonomy_multi_label_counts():
+    from deep_research.utils.parsers import tag_sectors
+    sectors = tag_sectors("Programme AgroTech pour le numérique", "Santé et agroalimentaire")
+    assert sectors == {"agri": 2, "tech": 1, "health": 1}
+
+
+def test_taxonomy_word_boundaries_and_accents():
+    from deep_research.komkom_scraper.komkom_scraper.utils.taxonomy import TaxonomyTagger
+    tagger = TaxonomyTagger({
+        "sectors": {"health": ["santé"], "tech": ["tech*"], "agri": ["agri*"]},
+        "stages": {"lancement": ["seed"]},
+    })
+    tags = tagger.tag("SANTE publique, biotechnologie et seedling", "Fonds pour l'agriculture")
+    assert tags["sectors"] == {"health": 1, "agri": 1}
+    assert tags["stages"] == {}
+
+
+def test_derive_sector_and_stage():
+    from deep_research.utils.parsers import derive_sector, derive_sector_and_stage
+    assert derive_sector_and_stage("Appel à projets Énergie solaire", "Pour PME en croissance") == (
+        "energy", "croissance",
+    )
+    assert derive_sector_and_stage("Concours ouvert", None) == (None, None)
+    assert derive_sector("Startups du digital", "") == "tech"
@@ -0,0 +1,78 @@
+import pstats
+
+import pytest
+from scrapy import Request, Spider
+from scrapy.exceptions import NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+
+from komkom_scraper.profiling import ProfilingMiddleware, SamplingProfiler, profiled, profiler_for
+
+
+def parse_card(n):
+    return {"title": f"Opportunité {n}", "words": sorted(str(n) * 50)}
+
+
+def parse_list(response):
+    for n in range(20):
+        yield parse_card(n)
+
+
+def upsert(rows):
+    return {"new": len(rows), "words": sum(len(row["words"]) for row in rows)}
+
+
+def crawl(tmp_path, rate):
+    crawler = get_crawler(Spider, settings_dict={
+        "PROFILING_ENABLED": True,
+        "PROFILING_SAMPLE_RATE": rate,
+        "PROFILING_OUTPUT": str(tmp_path / "profiles" / "%(spider)s"),
+    })
+    middleware = ProfilingMiddleware.from_crawler(crawler)
+    profiler = profiler_for(crawler)
+    spider = Spider(name="generic")
+    request = Request("https://example.sn/list", callback=parse_list)
+    response = HtmlResponse(request.url, body=b"<html></html>", request=request)
+    for _ in range(3):
+        rows = list(middleware.process_spider_output(response, parse_list(response), spider))
+        assert profiled(profiler, upsert, rows)["new"] == 20
+    profiler.spider_closed(spider, "finished")
+    return profiler
+
+
+def test_disabled_by_default():
+    crawler = get_crawler(Spider)
+    assert profiler_for(crawler) is None
+    with pytest.raises(NotConfigured):
+        ProfilingMiddleware.from_crawler(crawler)
+    assert profiled(None, upsert, []) == {"new": 0, "words": 0}
+
+
+def test_samples_are_merged_by_function(tmp_path):
+    profiler = crawl(tmp_path, rate=1.0)
+    assert profiler.samples == {"callback parse_list": 3, "pipeline upsert": 3}
+
+    stats = pstats.Stats(str(tmp_path / "profiles" / "generic.pstats"))
+    calls = {name: entry[1] for (_, _, name), entry in stats.stats.items()}
+    assert calls["parse_card"] == 60 and calls["upsert"] == 3
+
+    stacks = (tmp_path / "profiles" / "generic.collapsed").read_text().splitlines()
+    assert any(line.startswith("parse_list (test_profiling.py:") and ";parse_card (" in line for line in stacks)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+
+
+def test_unsampled_runs_are_not_profiled(tmp_path):
+    profiler = crawl(tmp_path, rate=0.0)
+    assert profiler.calls == {"callback parse_list": 3, "pipeline upsert": 3}
+    assert profiler.stats is None and not (tmp_path / "profiles").exists()
+
+
+def test_one_sample_at_a_time():
+    profiler = SamplingProfiler(rate=1.0)
+    steps = profiler.iterate("callback parse_list", parse_list(None))
+    next(steps)
+    with profiler.lock:  # another thread is profiling
+        assert profiled(profiler, upsert, [parse_card(1)])["new"] == 1
+        next(steps)
+    assert sum(1 for _ in steps) == 18
+    assert profiler.samples == {"callback parse_list": 1}
@@ -0,0 +1,141 @@
+import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+
+from komkom_scraper.db.backfill import backfill_features
+from komkom_scraper.db.db import Opportunity, UserWeights, bulk_upsert_opportunities, create_tables, get_engine
+from komkom_scraper.ranking import (
+    FeatureMatrix, WEIGHTS_DIM, load_weights, profile_weights, record_feedback,
+)
+from komkom_scraper.utils import features
+
+TODAY = datetime.date(2024, 5, 6)
+
+
+def item(n, sector, opportunity_type="financement", **fields):
+    return {
+        "id": f"o{n}",
+        "source_id": "test",
+        "title": f"Programme {sector} {n}",
+        "description": f"Appel à candidatures pour les startups {sector}.",
+        "opportunity_type": opportunity_type,
+        "sector": sector,
+        "source_url": f"https://example.sn/{n}",
+        **fields,
+    }
+
+
+def make_session():
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    session = sessionmaker(bind=engine, future=True)()
+    bulk_upsert_opportunities(session, [
+        item(1, "agritech", amount=5000000, deadline=datetime.date(2024, 5, 10)),
+        item(2, "agritech", "accompagnement", stage="lancement"),
+        item(3, "fintech", deadline=datetime.date(2024, 6, 1)),
+        item(4, "santé", "accompagnement", deadline=datetime.date(2024, 12, 1)),
+    ])
+    return session
+
+
+def test_encode_layout_and_storage():
+    vector = features.encode(item(1, "Agritech", amount=20000000))
+    assert len(vector) == features.DIM
+    assert vector[features.sector_slot("agritech")] == 1.0
+    assert vector[features.type_slot("financement")] == 1.0
+    assert vector[features.AMOUNT_OFFSET + 3] == 1.0
+    text = np.array(vector[features.TEXT_OFFSET:])
+    assert abs(float(text @ text) - 1.0) < 1e-6
+    assert np.allclose(features.unpack(features.pack(vector)), vector)
+
+    session = make_session()
+    stored = session.get(Opportunity, "o1").features
+    assert len(stored) == 4 + features.DIM * 4
+
+
+def test_vectors_of_another_features_version_are_rejected(monkeypatch):
+    session = make_session()
+    monkeypatch.setattr(features, "FEATURES_VERSION", features.FEATURES_VERSION + 1)
+    with pytest.raises(features.StaleFeaturesError):
+        FeatureMatrix.load(session)
+    assert backfill_features(session, all_rows=True) == 4
+    assert len(FeatureMatrix.load(session)) == 4
+
+
+def test_expired_opportunities_are_never_ranked():
+    session = make_session()
+    matrix = FeatureMatrix.load(session)
+    after_o1 = datetime.date(2024, 5, 20)
+    assert matrix.expired(after_o1).tolist() == [matrix.ids[i] == "o1" for i in range(4)]
+    proximity = matrix.proximity(after_o1)
+    assert proximity[matrix.index["o1"]].sum() == 0
+    # o3 is due in 12 days: the 8-30 days bin, not the first one
+    assert proximity[matrix.index["o3"]].tolist() == [0.0, 0.0, 1.0, 0.0]
+    users = np.stack([profile_weights({"sectors": ["agritech"], "opportunity_types": ["financement"]})])
+    indices, _ = matrix.top_k(users, k=10, today=after_o1)
+    assert sorted(matrix.ids[i] for i in indices[0]) == ["o2", "o3", "o4"]
+
+
+def test_top_k_ranks_by_profile_and_deadline():
+    session = make_session()
+    matrix = FeatureMatrix.load(session)
+    assert len(matrix) == 4
+    users = np.stack([
+        profile_weights({"sectors": ["agritech"], "opportunity_types": ["financement"]}),
+        profile_weights({"sectors": "fintech,santé"}),
+        profile_weights({}),
+    ])
+    indices, scores = matrix.top_k(users, k=2, today=TODAY)
+    ids = [[matrix.ids[i] for i in row] for row in indices]
+    assert ids[0] == ["o1", "o2"]
+    assert set(ids[1]) == {"o3", "o4"}
+    assert ids[2][0] == "o1"  # only the deadline proximity prior: due in 4 days
+    assert (scores[:, 0] >= scores[:, 1]).all()
+    assert matrix.top_k(users, k=10, today=TODAY)[0].shape == (3, 4)
+
+
+def test_matrix_upsert_and_remove():
+    session = make_session()
+    matrix = FeatureMatrix.load(session)
+    matrix.remove(["o1", "missing"])
+    assert sorted(matrix.ids) == ["o2", "o3", "o4"]
+    assert [matrix.index[i] for i in matrix.ids] == [0, 1, 2]
+    blob = features.pack(features.encode(item(5, "énergie")))
+    matrix.upsert([("o5", blob, None), ("o2", blob, None)])
+    assert len(matrix) == 4
+    assert np.array_equal(matrix.data[matrix.index["o2"]], matrix.data[matrix.index["o5"]])
+    proximity = matrix.proximity(TODAY)
+    assert proximity.shape == (4, features.PROXIMITY_DIM)
+    assert proximity.sum(axis=1).tolist() == [1.0] * 4
+
+
+def test_feedback_updates_and_persists_weights():
+    session = make_session()
+    profile = {"sectors": ["agritech"]}
+    matrix = FeatureMatrix.load(session)
+
+    def score(weights, opportunity_id):
+        row = matrix.index[opportunity_id]
+        return float(weights @ np.concatenate([matrix.data[row], matrix.proximity(TODAY)[row]]))
+
+    before = profile_weights(profile)
+    after = record_feedback(session, "u1", "o2", liked=False, comment="Hors sujet", profile=profile, today=TODAY)
+    assert score(after, "o2") < score(before, "o2")
+    record_feedback(session, "u1", "o2", liked=True, today=TODAY)
+    assert session.get(UserWeights, "u1").feedback_count == 2
+
+    weights = load_weights(session, ["u1", "u2"], profiles={"u2": {"sectors": ["fintech"]}})
+    assert weights.shape == (2, WEIGHTS_DIM)
+    assert weights[1][features.sector_slot("fintech")] == 4.0
+
+
+def test_backfill_features():
+    session = make_session()
+    session.execute(update(Opportunity).values(features=None))
+    session.commit()
+    assert backfill_features(session, chunk_size=3) == 4
+    assert backfill_features(session) == 0
+    assert len(FeatureMatrix.load(session)) == 4
@@ -0,0 +1,68 @@
+import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from komkom_scraper.db.db import get_engine, create_tables, bulk_upsert_opportunities, Opportunity
+from komkom_scraper.db.search import search_opportunities
+
+
+def item(n, title, description, **fields):
+    return {
+        "source_id": "test",
+        "title": title,
+        "description": description,
+        "opportunity_type": "financement",
+        "source_url": f"https://example.sn/{n}",
+        **fields,
+    }
+
+
+def make_session():
+    engine = get_engine(use_sqlite_memory=True)
+    create_tables(engine)
+    session = sessionmaker(bind=engine, future=True)()
+    bulk_upsert_opportunities(session, [
+        item(1, "Financement des startups agricoles", "Subvention pour les jeunes.",
+             sector="agri", amount=5000000, deadline=datetime.date(2024, 6, 30)),
+        item(2, "Incubateur numérique", "Accompagnement et financement de startups tech.",
+             sector="tech", amount=20000000, deadline=datetime.date(2024, 5, 1)),
+        item(3, "Prix de l'innovation", "Concours ouvert aux étudiants.",
+             sector="tech", opportunity_type="accompagnement", deadline=datetime.date(2024, 4, 1)),
+        item(4, "Bourse santé", "Recherche médicale; éligibilité : startups du financement santé.",
+             sector="health"),
+    ])
+    return session
+
+
+def titles(page):
+    return [row.title for row in page.results]
+
+
+def test_search_ranks_title_matches_first_and_ignores_accents():
+    session = make_session()
+    page = search_opportunities(session, "financement startups")
+    assert page.total == 3
+    assert titles(page)[0] == "Financement des startups agricoles"
+    assert titles(search_opportunities(session, "NUMERIQUE")) == ["Incubateur numérique"]
+    assert titles(search_opportunities(session, "financ")) == titles(page)
+
+
+def test_search_filters_and_pagination():
+    session = make_session()
+    page = search_opportunities(session, "startups", sector=["agri", "tech"], min_amount=10000000)
+    assert titles(page) == ["Incubateur numérique"]
+    page = search_opportunities(session, deadline_from=datetime.date(2024, 4, 15), per_page=1, page=2)
+    assert (page.total, titles(page)) == (2, ["Financement des startups agricoles"])
+    assert titles(search_opportunities(session, opportunity_type="accompagnement")) == ["Prix de l'innovation"]
+    assert search_opportunities(session, '"); DROP TABLE opportunities; --').total == 0
+
+
+def test_search_index_follows_updates_and_deletes():
+    session = make_session()
+    bulk_upsert_opportunities(session, [item(2, "Incubateur numérique", "Programme d'export.", sector="tech")])
+    assert "Incubateur numérique" not in titles(search_opportunities(session, "accompagnement"))
+    assert titles(search_opportunities(session, "export")) == ["Incubateur numérique"]
+
+    session.execute(Opportunity.__table__.delete())
+    session.commit()
+    assert search_opportunities(session, "export").total == 0
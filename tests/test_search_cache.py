@@ -0,0 +1,38 @@
+from deep_research.scrapers.search_cache import SearchCache
+
+RESULTS = [{"title": "Bourse", "source_url": "https://example.sn/bourse", "description": None}]
+
+
+class Clock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_round_trip_and_ttl(tmp_path):
+    clock = Clock()
+    cache = SearchCache(str(tmp_path / "cache.sqlite"), ttl=60, clock=clock)
+    assert cache.get("bourse", 0, "fr") is None
+
+    cache.put("bourse", 0, "fr", RESULTS, "<html>résultats</html>")
+    entry = cache.get("bourse", 0, "fr")
+    assert entry.results == RESULTS and entry.fresh
+    assert cache.get("bourse", 0, "en") is None
+    assert cache.html("bourse", 0, "fr") == "<html>résultats</html>"
+
+    clock.now += 61
+    assert not cache.get("bourse", 0, "fr").fresh
+    assert cache.stale_keys() == [("bourse", 0, "fr")]
+    assert cache.stale_keys(locale="en") == []
+
+    cache.put("bourse", 0, "fr", [], None)
+    assert cache.get("bourse", 0, "fr").fresh
+    assert cache.stale_keys() == []
+    cache.close()
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SearchCache(path).put("subvention", 1, "", RESULTS)
+    assert SearchCache(path).get("subvention", 1).results == RESULTS
@@ -0,0 +1,79 @@
+import copy
+
+import pytest
+from scrapy.http import HtmlResponse
+
+from deep_research.spiders.generic_opportunity_spider import GenericOpportunitySpider
+from deep_research.utils.selector_plan import ExtractionPlan, SourceConfigError, compile_sources
+
+SOURCE = {
+    "id": "incubateur_xy",
+    "name": "Incubateur XY Appels à projets",
+    "start_urls": ["https://incubateur-xy.org/appels-a-projets"],
+    "list_selector": "li.article",
+    "title_selector": "h2.title::text",
+    "description_selector": "p.summary::text",
+    "link_selector": "h2.title a::attr(href)",
+    "date_selector": "span.deadline::text",
+    "type": "accompagnement",
+}
+
+LISTING = """
+<html><body><ul>
+  <li class="article">
+    <h2 class="title">Appel <a href="/appel-1">Agritech 2024</a></h2>
+    <p class="summary">Programme   pour startups agro.</p>
+    <span class="deadline">2024-06-30</span>
+  </li>
+  <li class="article">
+    <h2 class="title">Sans lien</h2>
+  </li>
+</ul></body></html>
+"""
+
+
+def response():
+    url = SOURCE["start_urls"][0]
+    return HtmlResponse(url=url, body=LISTING, encoding="utf-8")
+
+
+def test_plan_matches_parsel_css_extraction():
+    plan = ExtractionPlan(SOURCE)
+    resp = response()
+    cards = plan.cards(resp)
+    assert len(cards) == len(resp.css(SOURCE["list_selector"]))
+    for card, elem in zip(cards, resp.css(SOURCE["list_selector"])):
+        raw = plan.extract_raw(card)
+        assert raw["title"] == "".join(elem.css(SOURCE["title_selector"]).getall())
+        assert raw["description"] == "".join(elem.css(SOURCE["description_selector"]).getall())
+        assert raw["link"] == elem.css(SOURCE["link_selector"]).get()
+
+
+def test_plan_post_processes_fields():
+    plan = ExtractionPlan(SOURCE)
+    first, second = [plan.extract(card, response().url) for card in plan.cards(response())]
+    assert first["description"] == "Programme pour startups agro."
+    assert first["link"] == "https://incubateur-xy.org/appel-1"
+    assert first["deadline"].isoformat() == "2024-06-30"
+    assert second["link"] == response().url
+
+
+@pytest.mark.parametrize("key, value", [
+    ("title_selector", "h2[[::text"),
+    ("type", "subvention"),
+    ("start_urls", "https://not-a-list.org"),
+])
+def test_invalid_config_fails_at_load(key, value):
+    source = copy.deepcopy(SOURCE)
+    source[key] = value
+    with pytest.raises(SourceConfigError):
+        ExtractionPlan(source)
+
+
+def test_duplicate_source_ids_are_rejected():
+    with pytest.raises(SourceConfigError):
+        compile_sources([SOURCE, dict(SOURCE)])
+
+
+def test_shipped_sources_compile():
+    assert set(GenericOpportunitySpider().plans) == {"anpe", "incubateur_xy"}
@@ -0,0 +1,154 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from twisted.internet import defer, task
+
+import komkom_scraper.pipelines as pipelines
+from komkom_scraper.db.db import Opportunity
+from komkom_scraper.db.migrations import migrate
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.sqlite'}", future=True)
+    migrate(engine)
+    monkeypatch.setattr(pipelines, "get_engine", lambda: engine)
+    # Run "threaded" writes inline so the Deferred chain is deterministic
+    deferred_writes = []
+
+    def fake_defer_to_thread(reactor, pool, fn, *args):
+        d = defer.Deferred()
+        deferred_writes.append(lambda: _run(d, fn, args))
+        return d
+
+    monkeypatch.setattr(pipelines.threads, "deferToThreadPool", fake_defer_to_thread)
+    engine.deferred_writes = deferred_writes
+    return engine
+
+
+def _run(d, fn, args):
+    try:
+        result = fn(*args)
+    except Exception:
+        d.errback()
+    else:
+        d.callback(result)
+
+
+def make_item(n):
+    return {
+        "source_id": "source1",
+        "title": f"Opportunity {n}",
+        "description": "Desc",
+        "opportunity_type": "financement",
+        "source_url": f"http://example.com/op/{n}",
+    }
+
+
+def run_writes(engine):
+    while engine.deferred_writes:
+        engine.deferred_writes.pop(0)()
+
+
+def test_threaded_pipeline_applies_backpressure_and_flushes(engine):
+    pipeline = pipelines.ThreadedUpsertPipeline(batch_size=1, max_pending=1)
+    pipeline.open_spider(None)
+    try:
+        first = pipeline.process_item(make_item(1), None)
+        assert first.called, "first batch should be accepted immediately"
+
+        second = pipeline.process_item(make_item(2), None)
+        assert not second.called, "second batch must wait for the in-flight write"
+
+        run_writes(engine)
+        assert second.called
+        run_writes(engine)
+
+        closed = pipeline.close_spider(None)
+        run_writes(engine)
+        assert closed.called
+    finally:
+        if not pipeline.threadpool.joined:
+            pipeline.threadpool.stop()
+
+    session = sessionmaker(bind=engine, future=True)()
+    assert session.query(Opportunity).count() == 2
+    assert pipeline.counts == {"new": 2, "changed": 0, "unchanged": 0}
+
+
+def test_batched_pipeline_flushes_on_a_timer_without_new_items(engine):
+    clock = task.Clock()
+    pipeline = pipelines.BatchedUpsertPipeline(batch_size=100, flush_interval=5.0)
+    pipeline.clock = clock
+    pipeline.open_spider(None)
+    session = sessionmaker(bind=engine, future=True)()
+
+    pipeline.process_item(make_item(1), None)
+    assert session.query(Opportunity).count() == 0
+    clock.advance(5.0)
+    assert session.query(Opportunity).count() == 1
+
+    pipeline.close_spider(None)
+    assert not pipeline.flush_loop.running
+
+
+def test_root_threaded_pipeline_hands_on_items_only_after_their_write(engine, monkeypatch):
+    from deep_research import pipelines as root_pipelines
+
+    monkeypatch.setattr(root_pipelines, "get_engine", lambda: engine)
+    pipeline = root_pipelines.ThreadedUpsertPipeline(max_pending=4)
+    pipeline.open_spider(None)
+    stored, errors = [], []
+    try:
+        pipeline.process_item(make_item(1), None).addCallback(stored.append)
+        assert stored == [], "the item must wait for its row to be committed"
+        run_writes(engine)
+        assert [item["title"] for item in stored] == ["Opportunity 1"]
+
+        broken = make_item(2)
+        del broken["title"]
+        pipeline.process_item(broken, None).addCallbacks(stored.append, errors.append)
+        run_writes(engine)
+        assert len(stored) == 1 and len(errors) == 1, "a failed write must fail the item"
+    finally:
+        run_writes(engine)
+        pipeline.close_spider(None)
+
+    session = sessionmaker(bind=engine, future=True)()
+    assert session.query(Opportunity).count() == 1
+
+
+def test_threaded_pipeline_retries_then_fails_the_close(engine, monkeypatch):
+    calls = []
+    real_upsert = pipelines.bulk_upsert_opportunities
+
+    def flaky_upsert(session, batch):
+        calls.append(len(batch))
+        if len(calls) < 3 or batch[0]["title"] == "Opportunity 2":
+            raise RuntimeError("connection reset")
+        return real_upsert(session, batch)
+
+    monkeypatch.setattr(pipelines, "bulk_upsert_opportunities", flaky_upsert)
+    pipeline = pipelines.ThreadedUpsertPipeline(batch_size=1, retries=2, retry_delay=0)
+    pipeline.open_spider(None)
+    assert not hasattr(pipeline, "session")
+    try:
+        pipeline.process_item(make_item(1), None)
+        run_writes(engine)
+        assert calls == [1, 1, 1], "the third attempt succeeds"
+
+        pipeline.process_item(make_item(2), None)
+        run_writes(engine)
+        assert pipeline.failed_rows == 1
+
+        closed = pipeline.close_spider(None)
+        errors = []
+        closed.addErrback(errors.append)
+        run_writes(engine)
+    finally:
+        if not pipeline.threadpool.joined:
+            pipeline.threadpool.stop()
+
+    assert errors and errors[0].check(pipelines.UpsertFailedError)
+    session = sessionmaker(bind=engine, future=True)()
+    assert session.query(Opportunity).count() == 1
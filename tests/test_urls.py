@@ -0,0 +1,20 @@
+from deep_research.utils.urls import canonicalize_url, opportunity_id
+
+
+def test_canonicalize_url_collapses_variants():
+    variants = [
+        "https://example.sn/appel/projets?a=1&b=2",
+        "http://example.sn/appel/projets/?b=2&a=1",
+        "https://WWW.Example.sn:443/appel//projets?utm_source=fb&utm_medium=social&a=1&b=2",
+        "https://example.sn/appel/./projets?a=1&fbclid=IwAR0&b=2#candidater",
+    ]
+    assert {canonicalize_url(url) for url in variants} == {"https://example.sn/appel/projets?a=1&b=2"}
+    assert len({opportunity_id(url) for url in variants}) == 1
+
+
+def test_canonicalize_url_keeps_meaningful_parts():
+    assert canonicalize_url("https://example.sn") == "https://example.sn/"
+    assert canonicalize_url("https://example.sn:8443/x?q=") == "https://example.sn:8443/x?q="
+    assert canonicalize_url("https://example.sn/Appel") != canonicalize_url("https://example.sn/appel")
+    assert canonicalize_url("mailto:contact@example.sn") == "mailto:contact@example.sn"
+    assert len(opportunity_id("https://example.sn/x")) == 36